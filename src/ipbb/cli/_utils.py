@@ -22,18 +22,7 @@ def completeDepFile(cmp_argname):
             return []
 
         lPkg, lCmp = ctx.params[cmp_argname]
-        basepath = ictx.pathMaker.getPath(lPkg, lCmp, 'include')
-        if not exists(basepath):
-            return []
-
-        from ..depparser import dep_file_types
-
-        # print()
-        # print(basepath)
-
-        lDepFiles = []
-        for root, dirs, files in walk(basepath):
-            lDepFiles += [normpath(f) for f in files if any([f.endswith(ext) for ext in dep_file_types])]
+        lDepFiles = ictx.componentIndex.depfiles(lPkg, lCmp)
 
         return [ f for f in lDepFiles if f.startswith(incomplete)]
 
@@ -96,41 +85,12 @@ def completeComponent(ctx, args, incomplete):
 
 
 # ------------------------------------------------------------------------------
-def _findComponentsInPackage(ictx, pkg, incomp_cmp='', exclude=['.git', '.svn'], match_subdir='firmware'):
+def _findComponentsInPackage(ictx, pkg, incomp_cmp=''):
     """
     Helper function to find components in a package, starting from an incomplete component path
 
     """
-    lMatchingComps = []
-    lPkgPath = join(ictx.srcdir, pkg)
-
-    # Resolve the list of paths to 
-    lSearchPaths = []
-    if incomp_cmp:
-        lPartialComPath = join(lPkgPath, dirname(incomp_cmp))
-        if not exists(lPartialComPath):
-            return []
-        lDirHint = basename(incomp_cmp)
-        if lDirHint:
-            root, dirs, files = next(walk(lPartialComPath))
-            lSearchPaths = [join(lPartialComPath, d) for d in dirs if d.startswith(lDirHint)]
-        else:
-            lSearchPaths = [lPartialComPath]
-    else:
-        lSearchPaths += [lPkgPath]
-
-    for p in lSearchPaths:
-        for root, dirs, files in walk(p, topdown=True):
-
-            if match_subdir in dirs:
-                lMatchingComps += [pkg + ':' + relpath(root, lPkgPath)]
-                dirs.remove(match_subdir)
-            dirs[:] = [d for d in dirs if d not in exclude]
-            if not dirs:
-                continue
-    return lMatchingComps
-
-
+    return [pkg + ':' + c for c in ictx.componentIndex.components(pkg) if c.startswith(incomp_cmp)]
 
 
 # ------------------------------------------------------------------------------
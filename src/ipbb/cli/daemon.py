@@ -0,0 +1,55 @@
+# Modules
+import click
+
+
+# ------------------------------------------------------------------------------
+@click.group('daemon', short_help="Keep the work area loaded between commands.")
+@click.pass_obj
+def daemon(ictx):
+    '''Run ipbb commands in a long-running local process
+
+    While the daemon of a work area is running, the ipbb commands issued in the
+    work area are forwarded to it and their output streamed back. The daemon
+    keeps the work area caches, the last parsed dependency tree and idle Vivado
+    consoles between commands.
+
+    Commands cannot prompt for input while running in the daemon.
+    Set IPBB_NO_DAEMON=1 to run a command in a new process.
+    '''
+    from ..cmds.daemon import daemon
+    daemon(ictx)
+
+
+# ------------------------------------------------------------------------------
+@daemon.command('start', short_help="Start the daemon of the work area.")
+@click.option('-f', '--foreground', is_flag=True, help='Run in the foreground, until interrupted.')
+@click.option(
+    '-t', '--idle-timeout',
+    type=click.IntRange(min=0),
+    default=120,
+    show_default=True,
+    help='Minutes without commands before the daemon exits, 0 to never exit.',
+)
+@click.pass_obj
+def start(ictx, foreground, idle_timeout):
+    '''Start the daemon of the work area'''
+    from ..cmds.daemon import start
+    start(ictx, foreground, idle_timeout)
+
+
+# ------------------------------------------------------------------------------
+@daemon.command('stop', short_help="Stop the daemon of the work area.")
+@click.pass_obj
+def stop(ictx):
+    '''Stop the daemon of the work area'''
+    from ..cmds.daemon import stop
+    stop(ictx)
+
+
+# ------------------------------------------------------------------------------
+@daemon.command('status', short_help="Show the status of the daemon of the work area.")
+@click.pass_obj
+def status(ictx):
+    '''Show the status of the daemon of the work area'''
+    from ..cmds.daemon import status
+    status(ictx)
@@ -7,11 +7,38 @@ from ..depparser import dep_command_types
 
 
 # ------------------------------------------------------------------------------
-@click.group()
+class DepGroup(click.Group):
+    '''Command group keeping track of the subcommand arguments, parsed after the group callback'''
+
+    def resolve_command(self, ctx, args):
+        lName, lCmd, lArgs = super().resolve_command(ctx, args)
+        ctx.meta['ipbb.dep.subcommand'] = (lCmd, lName, lArgs)
+        return lName, lCmd, lArgs
+
+
+# ------------------------------------------------------------------------------
+def _streamsToStdout(aCtx):
+    '''Checks whether the subcommand writes json/ndjson output to stdout'''
+    lCmd, lName, lArgs = aCtx.meta.get('ipbb.dep.subcommand', (None, None, None))
+    if lCmd is None or not any(p.name == 'fmt' for p in lCmd.params):
+        return False
+
+    # Parse the subcommand options in advance, without validating them
+    lSubCtx = lCmd.make_context(lName, list(lArgs), parent=aCtx, resilient_parsing=True)
+    return lSubCtx.params.get('fmt') not in (None, 'text') and lSubCtx.params.get('output') is None
+
+
+@click.group(cls=DepGroup)
 @click.pass_obj
 @click.option('-p', '--proj', default=None, autocompletion=completeProject)
 def dep(ictx, proj):
     '''Dependencies command group'''
+    if _streamsToStdout(click.get_current_context()):
+        # Keep stdout clean for the machine-readable output
+        import sys
+        from ..console import console
+        console.file = sys.stderr
+
     from ..cmds.dep import dep
     dep(ictx, proj)
 # ------------------------------------------------------------------------------
@@ -22,18 +49,40 @@ def dep(ictx, proj):
 @click.pass_obj
 @click.option('-p', '--pager', 'pager', help='Enable pager.', is_flag=True)
 @click.option('-f', '--filter', 'filters', help='Select dep entries with regexes.', multiple=True)
-def report(ictx, pager, filters):
+@click.option('--profile', 'profile', help='Parse the dependency tree again, reporting where time is spent.', is_flag=True)
+@click.option(
+    '--profile-json', 'profile_json',
+    type=click.Path(dir_okay=False),
+    default=None,
+    help='Write the profiling data to a JSON file (implies --profile).',
+)
+@click.option(
+    '--format', 'fmt',
+    type=click.Choice(['text', 'json', 'ndjson']),
+    default='text',
+    show_default=True,
+    help='Output format. json and ndjson stream settings, commands, packages, dep files, errors and unresolved entries.',
+)
+@click.option('-o', '--output', default=None, help="Destination of the json/ndjson output. Default: stdout")
+def report(ictx, pager, filters, profile, profile_json, fmt, output):
     '''Summarise the dependency tree of the current project'''
     from ..cmds.dep import report
-    report(ictx, pager, filters)
+    report(ictx, pager, filters, profile, profile_json, fmt, output)
 
 
 # ------------------------------------------------------------------------------
 @dep.command('ls', short_help="List project files by group")
 @click.argument('group', type=click.Choice(dep_command_types))
 @click.option('-o', '--output', default=None, help="Destination of the command output. Default: stdout")
+@click.option(
+    '--format', 'fmt',
+    type=click.Choice(['text', 'json', 'ndjson']),
+    default='text',
+    show_default=True,
+    help='Output format. json and ndjson list all the command attributes.',
+)
 @click.pass_obj
-def ls(ictx, group, output):
+def ls(ictx, group, output, fmt):
     '''List project files by group
 
     \b
@@ -47,7 +96,21 @@ def ls(ictx, group, output):
     '''
 
     from ..cmds.dep import ls
-    ls(ictx, group, output)
+    ls(ictx, group, output, fmt)
+
+
+# ------------------------------------------------------------------------------
+@dep.command('why', short_help="Show why files are part of the project")
+@click.argument('files', nargs=-1, required=True)
+@click.pass_obj
+def why(ictx, files):
+    '''Show the dep file entries and the include chains referencing FILES.
+
+    FILES can be relative to the current directory or to the source area.
+    See `ipbb toolbox affected-projects` to query all the project areas at once.
+    '''
+    from ..cmds.dep import why
+    why(ictx, files)
 
 
 # ------------------------------------------------------------------------------
@@ -1,7 +1,7 @@
 
 import click
 
-from ..utils import validateComponent, validateMultiplePackageOrComponents
+from ..utils import validateComponent, validateMultiplePackageOrComponents, validateMultipleComponentDepFiles
 from ._utils import completeComponent, completeDepFile
 
 
@@ -17,14 +17,67 @@ def toolbox(env):
 # ------------------------------------------------------------------------------
 @toolbox.command('check-dep', short_help="Performs basic checks on dependency files")
 @click.option('-v', '--verbose', count=True)
+@click.option('--profile', 'profile', help='Report where time is spent while parsing.', is_flag=True)
+@click.option(
+    '--profile-json', 'profile_json',
+    type=click.Path(dir_okay=False),
+    default=None,
+    help='Write the profiling data to a JSON file (implies --profile).',
+)
 @click.argument('toolset', type=click.Choice(['vivado', 'sim']))
 @click.argument('component', callback=validateComponent, autocompletion=completeComponent)
 @click.argument('depfile', required=False, default=None, autocompletion=completeDepFile('component'))
 @click.pass_obj
-def check_depfile(env, verbose, toolset, component, depfile):
+def check_depfile(env, verbose, profile, profile_json, toolset, component, depfile):
     '''Perform basic checks on dependency files'''
     from ..cmds.toolbox import check_depfile
-    check_depfile(env, verbose, toolset, component, depfile)
+    check_depfile(env, verbose, toolset, component, depfile, profile, profile_json)
+
+
+# ------------------------------------------------------------------------------
+@toolbox.command('check-deps', short_help="Checks the dependency trees of several projects in parallel")
+@click.option('-j', '--jobs', type=click.IntRange(min=1), default=None, help='Number of parallel processes. Defaults to the number of CPUs.')
+@click.option(
+    '-t', '--toolset',
+    type=click.Choice(['vivado', 'sim']),
+    default='vivado',
+    show_default=True,
+    help='Toolset used to parse the components given with -c.',
+)
+@click.option(
+    '-c', '--component',
+    callback=validateMultipleComponentDepFiles,
+    autocompletion=completeComponent,
+    multiple=True,
+    help=(
+        'Top component to check, as <package>:<component>[:<dep file>]. '
+        'The dep file defaults to <component>.d3 or <component>.dep. '
+        'Defaults to the tops of all the project areas.'
+    ),
+)
+@click.pass_obj
+def check_depfiles(env, jobs, toolset, component):
+    '''Checks the dependency trees of all the project areas, or of a list of top components, in parallel.
+
+    Reports the parsing errors and the missing files of each dependency tree, and fails if any has errors.
+    '''
+    from ..cmds.toolbox import check_depfiles
+    check_depfiles(env, jobs, toolset, component)
+
+
+# ------------------------------------------------------------------------------
+@toolbox.command('affected-projects', short_help="Lists the projects referencing the given files")
+@click.option('-j', '--jobs', type=click.IntRange(min=1), default=None, help='Number of parallel processes. Defaults to the number of CPUs.')
+@click.option('-n', '--names', 'names', is_flag=True, help='Print only the names of the affected projects, one per line.')
+@click.argument('files', nargs=-1, required=True)
+@click.pass_obj
+def affected_projects(env, jobs, names, files):
+    '''Lists the project areas which dependency trees reference any of FILES.
+
+    FILES can be relative to the current directory or to the source area. Projects which dependency tree cannot be parsed are reported as affected.
+    '''
+    from ..cmds.toolbox import affected_projects
+    affected_projects(env, jobs, files, names)
 
 
 @toolbox.command('vhdl-beautify', help="Beautifies VHDL files in components within an ipbb work area or standalone files/directories")
@@ -9,8 +9,9 @@ import importlib
 @click.group('vivado', short_help='Set up, syntesize, implement Vivado projects.', chain=True)
 # @click.option('-p', '--proj', default=None, help="Selected project, if not current")
 @click.option('-l', '--loglevel', type=click.Choice(['all', 'info', 'warn', 'cwarn', 'error', 'fatal', 'none']), default='all', help="Silence vivado messages")
+@click.option('--framed', is_flag=True, help="Frame the Vivado console commands with sentinel lines, lifting the command length limits.")
 @click.pass_obj
-def vivado(ictx, loglevel):
+def vivado(ictx, loglevel, framed):
     '''Vivado command group
     
     \b
@@ -26,14 +27,13 @@ def vivado(ictx, loglevel):
 # ------------------------------------------------------------------------------
 @vivado.resultcallback()
 @click.pass_obj
-def process_vivado(ictx, subcommands, loglevel):
+def process_vivado(ictx, subcommands, loglevel, framed):
 
-    from ..cmds.vivado import vivado
-    vivado(ictx, loglevel, (name for name,_,_,_ in subcommands))
+    from ..cmds.vivado import vivado, needs_session, run_subcommands
+    vivado(ictx, loglevel, (name for name,_,_,_ in subcommands), framed, needs_session(subcommands))
 
     # Executed the chained commands
-    for name, cmd, args, kwargs in subcommands:
-        cmd(*args, **kwargs)
+    run_subcommands(ictx, subcommands)
 
 # ------------------------------------------------------------------------------
 def vivado_get_command_aliases(self, ctx, cmd_name):
@@ -0,0 +1,189 @@
+
+import click
+import os
+import sys
+import time
+import subprocess
+
+from os.path import join
+
+from ..console import cprint, console
+from ..defaults import kVarDir, kWorkDaemonSocket, kWorkDaemonLog
+from ..tools.daemon import DaemonServer, connect, request
+from ..utils import printDictTable
+
+
+# ------------------------------------------------------------------------------
+class IpbbService(object):
+    """
+    Runs ipbb commands in the daemon, keeping the state of the work area between them
+
+    The caches of the work area and the last parsed dep tree are passed on
+    from one command to the next, Vivado consoles are kept open when idle.
+    """
+
+    # ------------------------------------------------------------------------------
+    def __init__(self):
+        super().__init__()
+        from ..console_scripts.builder import _compose_cli
+        from ..tools.xilinx import VivadoConsolePool
+
+        _compose_cli()
+        self.pool = VivadoConsolePool()
+        # Detected when the console was created, forced on by `start`
+        self._color_system = console._color_system
+        # Context of the last command
+        self._context = None
+        # Client of the running command gone away
+        self._aborted = False
+
+    # ------------------------------------------------------------------------------
+    def run(self, aArgs, aCwd, aColumns, aTty):
+        from ..console_scripts.builder import run
+        from ..context import Context
+
+        lCtx = Context(aCwd)
+        if self._context is not None:
+            lCtx.inheritCaches(self._context)
+        lCtx.vivadoConsolePool = self.pool
+        self._context = lCtx
+        self._aborted = False
+
+        # Follow the client terminal
+        console.file = None
+        console.width = aColumns
+        console._color_system = self._color_system if aTty else None
+
+        try:
+            run(lCtx, aArgs, 'ipbb')
+        finally:
+            # The kept Vivado console goes back to the pool, unless interrupted in the middle of a command
+            lSessions = vars(lCtx).pop('vivadoSessions', None)
+            if lSessions is not None:
+                lSessions.close(release=not self._aborted)
+
+    # ------------------------------------------------------------------------------
+    def abort(self):
+        self._aborted = True
+
+    # ------------------------------------------------------------------------------
+    def status(self):
+        lCtx = self._context
+        return {
+            'last project': lCtx.currentproj.name if lCtx is not None else None,
+            'idle vivado consoles': len(self.pool),
+        }
+
+    # ------------------------------------------------------------------------------
+    def close(self):
+        self.pool.close()
+
+
+# ------------------------------------------------------------------------------
+def serve(aSocketPath, aIdleTimeout=None):
+    """
+    Runs the daemon until stopped
+
+    Args:
+        aSocketPath (str): Path of the socket to listen on
+        aIdleTimeout (float, optional): Seconds without commands before exiting
+    """
+    lTimeout = float(aIdleTimeout) if aIdleTimeout else None
+    DaemonServer(aSocketPath, IpbbService(), lTimeout).serve()
+
+
+# ------------------------------------------------------------------------------
+def daemon(ictx):
+    '''Run ipbb commands in a long-running local process'''
+    # -------------------------------------------------------------------------
+    # Must be in a build area
+    if ictx.work.path is None:
+        raise click.ClickException('Build area root directory not found')
+    # -------------------------------------------------------------------------
+
+    ictx.daemonSocketPath = join(ictx.work.path, kVarDir, kWorkDaemonSocket)
+
+
+# ------------------------------------------------------------------------------
+def _isRunning(aSocketPath):
+    lSock = connect(aSocketPath)
+    if lSock is None:
+        return False
+    lSock.close()
+    return True
+
+
+# ------------------------------------------------------------------------------
+def start(ictx, foreground, idle_timeout, wait=30.):
+    '''Start the daemon of the work area'''
+
+    lSocketPath = ictx.daemonSocketPath
+    if _isRunning(lSocketPath):
+        raise click.ClickException(f'ipbb daemon already running for {ictx.work.path}')
+
+    os.makedirs(join(ictx.work.path, kVarDir), exist_ok=True)
+    lTimeout = idle_timeout * 60 if idle_timeout else None
+
+    if foreground:
+        cprint(f'ipbb daemon listening on {lSocketPath}', style='green')
+        serve(lSocketPath, lTimeout)
+        return
+
+    lLogPath = join(ictx.work.path, kVarDir, kWorkDaemonLog)
+    with open(lLogPath, 'a') as lLog:
+        lProc = subprocess.Popen(
+            [
+                sys.executable, '-c',
+                'import sys; from ipbb.cmds.daemon import serve; serve(*sys.argv[1:])',
+                lSocketPath, str(lTimeout or 0),
+            ],
+            cwd=ictx.work.path,
+            stdin=subprocess.DEVNULL,
+            stdout=lLog,
+            stderr=subprocess.STDOUT,
+            # Colors are set up when the console is created, the clients decide whether to use them
+            env=dict(os.environ, FORCE_COLOR='1'),
+            start_new_session=True,
+        )
+
+    t0 = time.time()
+    while not _isRunning(lSocketPath):
+        if lProc.poll() is not None or time.time() - t0 > wait:
+            raise click.ClickException(f'Failed to start the ipbb daemon, see {lLogPath}')
+        time.sleep(0.05)
+
+    cprint(f'ipbb daemon started (pid {lProc.pid}), listening on {lSocketPath}', style='green')
+
+
+# ------------------------------------------------------------------------------
+def _request(ictx, aOp):
+    try:
+        return next(request(ictx.daemonSocketPath, {'op': aOp}))['status']
+    except ConnectionRefusedError:
+        return None
+
+
+# ------------------------------------------------------------------------------
+def stop(ictx):
+    '''Stop the daemon of the work area'''
+
+    lStatus = _request(ictx, 'stop')
+    if lStatus is None:
+        cprint(f'No ipbb daemon running for {ictx.work.path}', style='yellow')
+        return
+
+    cprint(f"ipbb daemon (pid {lStatus['pid']}) stopped after {lStatus['requests']} commands", style='green')
+
+
+# ------------------------------------------------------------------------------
+def status(ictx):
+    '''Show the status of the daemon of the work area'''
+
+    lStatus = _request(ictx, 'status')
+    if lStatus is None:
+        cprint(f'No ipbb daemon running for {ictx.work.path}', style='yellow')
+        return
+
+    lStatus['uptime'] = '{:.0f} s'.format(lStatus['uptime'])
+    lStatus['socket'] = ictx.daemonSocketPath
+    printDictTable(lStatus, aHeader=False, aSort=False, aFmtr=str)
@@ -25,7 +25,7 @@ from os.path import (
 from contextlib import suppress
 from ..console import cprint, console
 from ..utils import which, SmartOpen
-from ..depparser import DepFormatter, dep_command_types
+from ..depparser import DepFormatter, DepExporter, DepParserProfile, dep_command_types
 from ..utils import DirSentry, printDictTable, printAlienTable, formatAlienTable
 from .schema import project_schema, validate_schema
 from rich.table import Table, Column
@@ -58,7 +58,20 @@ def dep(ictx, proj):
 
 
 # ------------------------------------------------------------------------------
-def report(ictx, pager, filters):
+def report_profile(aProfile, aSrcDir, aJsonPath=None):
+    '''Prints the dep parsing profile, and optionally saves it as JSON'''
+
+    cprint(Panel.fit(aProfile.draw_stages(), title='[bold blue]dep parsing profile[/bold blue]'))
+    cprint(Panel.fit(aProfile.draw_files(aSrcDir)))
+
+    if aJsonPath is not None:
+        with open(aJsonPath, 'w') as lFile:
+            aProfile.dump(lFile)
+        cprint(f"Profiling data written to {aJsonPath}")
+
+
+# ------------------------------------------------------------------------------
+def report(ictx, pager, filters, profile=False, profile_json=None, fmt='text', output=None):
     '''Summarise the dependency tree of the current project'''
 
     lCmdHeaders = ['path', 'flags', 'package', 'component']
@@ -100,9 +113,40 @@ def report(ictx, pager, filters):
         )
 
 
+    lProfile = None
+    if profile or profile_json:
+        # Parse from scratch, bypassing the dep tree cache
+        lParser = ictx.newDepParser()
+        lProfile = DepParserProfile()
+        try:
+            with lProfile.instrument(lParser):
+                lParser.parse(ictx.currentproj.settings['topPkg'], ictx.currentproj.settings['topCmp'], ictx.currentproj.settings['topDep'])
+        except OSError:
+            pass
+        if ictx.depAstCache is not None:
+            ictx.depAstCache.store()
+    else:
+        lParser = ictx.depParser
+
+    if fmt != 'text':
+        # Machine-readable output, streamed without building rich objects
+        def lCmdFilter(aCmd):
+            lRow = [relpath(aCmd.filepath, ictx.srcdir), ','.join(aCmd.flags()), aCmd.package, aCmd.component]
+            return all(rxp.match(lRow[i]) for i, rxp in lFilters)
+
+        with SmartOpen(output) as lWriter:
+            DepExporter(lParser, aCmdFilter=lCmdFilter if lFilters else None).write(lWriter.target, fmt)
+
+        if lProfile is not None and profile_json is not None:
+            with open(profile_json, 'w') as lFile:
+                lProfile.dump(lFile)
+
+        if lParser.errors or lParser.unresolved:
+            raise SystemExit(1)
+        return
+
     with console.pager(styles=True) if pager else suppress():
         # return
-        lParser = ictx.depParser
         lDepFmt = DepFormatter(lParser) 
 
         t = formatAlienTable(lParser.settings, aHeader=False)
@@ -147,6 +191,9 @@ def report(ictx, pager, filters):
 
         cprint(Panel.fit(lDepFmt.draw_depfile_tree(), title='[bold blue]dep tree structure[/bold blue]'))
 
+        if lProfile is not None:
+            report_profile(lProfile, ictx.srcdir, profile_json)
+
         if lDepFmt.hasErrors():
             cprint(Panel.fit(lDepFmt.draw_error_table(), title='[bold red]dep tree errors[/bold red]'))
             raise SystemExit(1)
@@ -155,7 +202,7 @@ def report(ictx, pager, filters):
 
 # ------------------------------------------------------------------------------
 
-def ls(ictx, group: str, output: str):
+def ls(ictx, group: str, output: str, fmt: str = 'text'):
     '''
     List project files by group
     
@@ -169,6 +216,8 @@ def ls(ictx, group: str, output: str):
     :type       group:   str
     :param      output:  The output
     :type       output:  str
+    :param      fmt:     Output format, 'text', 'json' or 'ndjson'
+    :type       fmt:     str
     
 
 
@@ -176,10 +225,55 @@ def ls(ictx, group: str, output: str):
     '''
 
     with SmartOpen(output) as lWriter:
+        if fmt != 'text':
+            DepExporter(ictx.depParser, aGroups=(group,)).write(lWriter.target, fmt, ('commands',))
+            return
+
         for f in ictx.depParser.commands[group]:
             lWriter(f.filepath)
 
 
+# ------------------------------------------------------------------------------
+def resolve_src_path(aPath, aSrcDir):
+    '''
+    Returns the absolute path of a file, relative to the current directory or, if not found, to the source area
+    '''
+    if not os.path.isabs(aPath) and not exists(aPath):
+        aPath = join(aSrcDir, aPath)
+    return os.path.normpath(abspath(aPath))
+
+
+# ------------------------------------------------------------------------------
+def why(ictx, files):
+    '''Show which dep file entries and include chains pull in the files'''
+
+    lParser = ictx.depParser
+
+    lMissing = []
+    for f in files:
+        lPath = resolve_src_path(f, ictx.srcdir)
+        if lParser.depfile is not None and lPath == lParser.depfile.path:
+            cprint(f"{relpath(lPath, ictx.srcdir)}: top dep file of {ictx.currentproj.name}", style='blue')
+            continue
+
+        lRefs = lParser.referrers(lPath)
+        if not lRefs:
+            lMissing.append(f)
+            continue
+
+        lTable = Table('referenced by', 'command', 'include chain', title=relpath(lPath, ictx.srcdir), title_style='blue', title_justify='left')
+        for lRef in lRefs:
+            lTable.add_row(
+                f'{relpath(lRef.depfile.path, ictx.srcdir)}:{lRef.line+1}',
+                lRef.command.cmd,
+                '\n'.join(relpath(d.path, ictx.srcdir) for d in lParser.include_chain(lRef.depfile)),
+            )
+        cprint(lTable)
+
+    if lMissing:
+        raise click.ClickException(f"Not referenced by the dependency tree of {ictx.currentproj.name}: {', '.join(lMissing)}")
+
+
 # ------------------------------------------------------------------------------
 
 def components(ictx, output: str):
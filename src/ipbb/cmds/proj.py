@@ -71,15 +71,11 @@ def create(ictx, toolset, projname, component, topdep):
             style='red',
         )
 
-        lParent = findFirstParentDir(lTopComponentPath, lPathmaker.getPath(lTopPackage))
-        cprint('\nSuggestions (based on the first existing parent path)', style='cyan')
-        # When in Py3 https://docs.python.org/3/library/os.html#os.scandir
-        for d in [
-            join(lParent, s)
-            for s in os.listdir(lParent)
-            if isdir(join(lParent, s))
-        ]:
-            cprint(' - ' + d)
+        lParent = relpath(findFirstParentDir(lTopComponentPath, lPathmaker.getPath(lTopPackage)), lPathmaker.getPath(lTopPackage))
+        cprint('\nSuggestions (components under the first existing parent path)', style='cyan')
+        for c in ictx.componentIndex.components(lTopPackage):
+            if lParent == '.' or c == lParent or c.startswith(lParent + os.sep):
+                cprint(' - ' + lTopPackage + ':' + c)
         cprint()
 
         raise click.Abort()
@@ -104,15 +100,14 @@ def create(ictx, toolset, projname, component, topdep):
 
     # ------------------------------------------------------------------------------
     if not lTopExists:
-        import glob
         cprint('Top-level dep file {} not found or not uniquely resolved'.format(lTopDepPath), style='red')
 
-        lTopDepDir = lPathmaker.getPath(lTopPackage, lTopComponent, 'include')
+        lDepFiles = ictx.componentIndex.depfiles(lTopPackage, lTopComponent)
 
         for ft in dep_file_types:
             lTopDepCandidates = [
-                "'{}'".format(relpath(p, lTopDepDir))
-                for p in glob.glob(join(lTopDepDir, '*' + ft))
+                "'{}'".format(f)
+                for f in lDepFiles if f.endswith(ft)
             ]
             cprint('Suggestions (*{}):'.format(ft))
             for lC in lTopDepCandidates:
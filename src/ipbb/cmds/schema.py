@@ -1,6 +1,6 @@
-import cerberus
 from ..console import cprint, console
 from ..utils import error_notice
+from ..utils.settings import get_validator
 
 project_schema = {
     'toolset': {'type': 'string', 'allowed': ['sim', 'vivado', 'vitis_hls'], 'required': True},
@@ -16,7 +16,7 @@ project_schema = {
 #------------------------------------------------------------------------------
 def validate_schema(schema, settings):
 
-    lValidator = cerberus.Validator(schema, allow_unknown=True)
+    lValidator = get_validator(schema, allow_unknown=True)
     if not lValidator.validate(settings.dict()):
         error_notice(f"""Project settings validation failed
                Detected errors: {lValidator.errors}
@@ -6,13 +6,15 @@ import ipaddress
 import sh
 import os
 
+from contextlib import suppress
 from rich.prompt import Confirm
 from os.path import basename, dirname, relpath, abspath, exists, splitext, join, isabs, sep, isdir, isfile
 
 from ..console import cprint, console
-from ..depparser import Pathmaker, DepFileParser
+from ..depparser import Pathmaker, DepFileParser, DepParserProfile
 from rich.table import Table, Column
 from rich.padding import Padding
+from rich.panel import Panel
 
 
 # ------------------------------------------------------------------------------
@@ -26,7 +28,7 @@ def toolbox(env):
 
 
 # ------------------------------------------------------------------------------
-def check_depfile(env, verbose, toolset, component, depfile):
+def check_depfile(env, verbose, toolset, component, depfile, profile=False, profile_json=None):
     '''Perform basic checks on dependency files'''
 
     lPackage, lComponent = component
@@ -35,14 +37,25 @@ def check_depfile(env, verbose, toolset, component, depfile):
 
     lPathMaker = Pathmaker(env.srcdir, env._verbosity)
 
+    lParser = DepFileParser(toolset, lPathMaker)
+    lParser.astcache = env.depAstCache
+    lProfile = DepParserProfile() if profile or profile_json else None
     try:
-        lParser = DepFileParser(toolset, lPathMaker)
-        lParser.parse(lPackage, lComponent, depfile)
+        with lProfile.instrument(lParser) if lProfile is not None else suppress():
+            lParser.parse(lPackage, lComponent, depfile)
     except OSError as lExc:
         raise click.ClickException("Failed to parse dep file - '{}'".format(lExc))
+    finally:
+        # None outside a work area
+        if env.depAstCache is not None:
+            env.depAstCache.store()
 
     cprint()
 
+    if lProfile is not None:
+        from .dep import report_profile
+        report_profile(lProfile, env.srcdir, profile_json)
+
     # N.B. Rest of this function is heavily based on implementation of 'dep report' command; assuming
     #   that output of these 2 commands does not significantly diverge, might make sense to implement
     #   command output in a separate function, that's invoked by both commands
@@ -134,6 +147,165 @@ def check_depfile(env, verbose, toolset, component, depfile):
         )
 
 
+# ------------------------------------------------------------------------------
+def _project_targets(env):
+    '''Returns the top dep files of all the project areas, as DepCheckTarget list'''
+
+    from ..context import ProjectInfo
+    from ..defaults import kProjDepTreeCacheFile
+    from ..depparser import DepCheckTarget
+
+    lTargets = []
+    for lProjName in sorted(env.projects):
+        lProj = ProjectInfo(join(env.projdir, lProjName))
+        try:
+            lTargets.append(DepCheckTarget(
+                lProj.name,
+                lProj.settings['toolset'],
+                lProj.settings['topPkg'],
+                lProj.settings['topCmp'],
+                lProj.settings['topDep'],
+                join(lProj.path, kProjDepTreeCacheFile),
+            ))
+        except (KeyError, TypeError):
+            cprint(f"WARNING: project {lProjName} has no top dep file defined, skipped", style='yellow')
+    return lTargets
+
+
+# ------------------------------------------------------------------------------
+def _default_top_depfile(aPathMaker, aPackage, aComponent):
+    '''Returns the default top dep file of a component, as `include -c` would resolve it'''
+
+    lNames = aPathMaker.getDefNames('include', basename(aComponent))
+    for lName in lNames:
+        if exists(aPathMaker.getPath(aPackage, aComponent, 'include', lName)):
+            return lName
+    # None found, reported as missing by the parser
+    return lNames[-1]
+
+
+# ------------------------------------------------------------------------------
+def check_depfiles(env, jobs, toolset, components):
+    '''Check the dependency trees of several projects or components in parallel'''
+
+    from ..depparser import DepCheckTarget, check_deptrees
+
+    lTargets = []
+    if components:
+        lPathMaker = Pathmaker(env.srcdir, env._verbosity)
+        for lTop in components:
+            lPackage, lComponent = lTop[:2]
+            lDepFile = lTop[2] if len(lTop) == 3 else _default_top_depfile(lPathMaker, lPackage, lComponent)
+            lTargets.append(DepCheckTarget(
+                f'{lPackage}:{lComponent}', toolset, lPackage, lComponent, lDepFile, None
+            ))
+    else:
+        lTargets = _project_targets(env)
+
+    if not lTargets:
+        raise click.ClickException('No projects or components to check')
+
+    lAstCachePath = env.depAstCache.path if env.depAstCache is not None else None
+    cprint(f"Checking {len(lTargets)} dependency tree(s)")
+    lResults = {}
+    for lResult in check_deptrees(env.srcdir, lTargets, env.deptreeDefaults, lAstCachePath, jobs, env._verbosity):
+        lResults[lResult.target] = lResult
+        lName = lResult.target.name
+        if lResult.failed:
+            cprint(f"  [red]\u2717[/red] {lName} ({lResult.elapsed:.2f}s)")
+        else:
+            cprint(f"  [green]\u2713[/green] {lName} ({lResult.elapsed:.2f}s)")
+
+    lSummary = Table('project', 'toolset', 'top', 'dep files', 'commands', 'errors', 'missing', 'time (s)', title='Dependency trees', title_justify='left')
+    for t in lTargets:
+        r = lResults[t]
+        lMissing = len(r.unresolved_packages) + len(r.unresolved_components) + len(r.unresolved_files)
+        lSummary.add_row(
+            t.name,
+            t.toolset,
+            f'{t.package}:{t.component}/{t.depfile}',
+            str(r.depfiles),
+            str(sum(r.commands.values())),
+            f'[red]{len(r.errors)}[/red]' if r.errors else '0',
+            f'[red]{lMissing}[/red]' if lMissing else '0',
+            f'{r.elapsed:.2f}' + (' (cached)' if r.restored else ''),
+            style='red' if r.exception else None,
+        )
+    cprint(lSummary)
+
+    lFailed = [lResults[t] for t in lTargets if lResults[t].failed]
+    for r in lFailed:
+        lErrsTable = Table.grid(Column('error_tables'))
+        if r.exception:
+            lErrsTable.add_row(f'[bold red]Parsing failed[/bold red]: {r.exception}')
+
+        if r.errors:
+            t = Table('dep file', 'line', 'error', title='Dep tree parsing error(s)', title_style='bold red', title_justify='left')
+            for lDepFile, lLine, lErr in r.errors:
+                t.add_row(lDepFile, "'" + lLine + "'", lErr)
+            lErrsTable.add_row(t)
+
+        if r.unresolved_packages or r.unresolved_components:
+            t = Table('package / component', title='Unresolved packages & components', title_style='bold red', title_justify='left')
+            for lPkgCmp in r.unresolved_packages + r.unresolved_components:
+                t.add_row(lPkgCmp)
+            lErrsTable.add_row(t)
+
+        if r.unresolved_files:
+            t = Table(title='Unresolved files', title_style='bold red', title_justify='left')
+            t.add_column('path', overflow='fold')
+            t.add_column('included by', overflow='fold')
+            for lPathExp, lIncludedBy in r.unresolved_files:
+                t.add_row(lPathExp, '\n'.join(lIncludedBy))
+            lErrsTable.add_row(t)
+
+        cprint(Panel.fit(lErrsTable, title=f'[bold red]{r.target.name}[/bold red]'))
+
+    if lFailed:
+        raise click.ClickException(f"{len(lFailed)} of {len(lTargets)} dependency tree(s) failed the checks: {', '.join(r.target.name for r in lFailed)}")
+
+
+# ------------------------------------------------------------------------------
+def affected_projects(env, jobs, files, names):
+    '''List the project areas which dependency trees reference any of the files'''
+
+    from ..depparser import check_deptrees
+    from .dep import resolve_src_path
+
+    lPaths = [resolve_src_path(f, env.srcdir) for f in files]
+    lTargets = _project_targets(env)
+    lAstCachePath = env.depAstCache.path if env.depAstCache is not None else None
+
+    lAffected, lFailed = [], []
+    for lResult in check_deptrees(env.srcdir, lTargets, env.deptreeDefaults, lAstCachePath, jobs, env._verbosity, lPaths):
+        if lResult.exception:
+            lFailed.append(lResult)
+        elif lResult.references:
+            lAffected.append(lResult)
+
+    lAffected.sort(key=lambda r: r.target.name)
+    lFailed.sort(key=lambda r: r.target.name)
+
+    # Projects which dep tree cannot be parsed may be affected as well
+    for r in lFailed:
+        click.secho(f"WARNING: project {r.target.name} could not be parsed, assumed affected. {r.exception}", fg='yellow', err=True)
+
+    if names:
+        for r in lAffected + lFailed:
+            click.echo(r.target.name)
+        return
+
+    if not lAffected:
+        cprint(f"None of the {len(lTargets)} project(s) reference the given files")
+        return
+
+    lTable = Table('project', 'file', 'referenced by', 'include chain', title=f'Affected projects ({len(lAffected)} of {len(lTargets)})', title_justify='left')
+    for r in lAffected:
+        for lPath, lDepFile, lLine, lCmd, lChain in r.references:
+            lTable.add_row(r.target.name, lPath, lDepFile + (f':{lLine+1}' if lLine is not None else '') + f' ({lCmd})', '\n'.join(lChain))
+    cprint(lTable)
+
+
 # ------------------------------------------------------------------------------
 def vhdl_beautify(env, component, path):
     """
@@ -13,7 +13,6 @@ import cerberus
 
 # Elements
 from os.path import join, split, exists, splitext, abspath, basename, getmtime
-from collections import OrderedDict
 from copy import deepcopy
 from rich.table import Table
 
@@ -94,7 +93,7 @@ def ensure_vivado_project_path(aProjPath: str):
         raise click.ClickException("Vivado project %s does not exist" % aProjPath)
 
 # ------------------------------------------------------------------------------
-def vivado(ictx, loglevel, cmdlist):
+def vivado(ictx, loglevel, cmdlist, framed=False, prewarm=False):
     '''Vivado command group
     
     Args:
@@ -102,6 +101,8 @@ def vivado(ictx, loglevel, cmdlist):
         ictx (ipbb.Context): Context object
         proj (str): Project name
         loglevel (str): Verbosity level
+        framed (bool): Frame the console commands with sentinel lines
+        prewarm (bool): Start Vivado while the project settings are validated
     
     Raises:
         click.ClickException: Undefined project area
@@ -119,8 +120,6 @@ def vivado(ictx, loglevel, cmdlist):
             'Project area not defined. Move to a project area and try again'
         )
     
-    validate_settings(ictx)
-
     lKeep = True
     lLogLabel = None if not lKeep else '_'.join( cmdlist )
 
@@ -132,10 +131,70 @@ def vivado(ictx, loglevel, cmdlist):
     ictx.vivado_synth_dir = join(ictx.vivadoProjPath, f'{ictx.currentproj.name}', _rum_synth)
     ictx.vivado_impl_dir = join(ictx.vivadoProjPath, f'{ictx.currentproj.name}.runs', _rum_impl)
 
-    ictx.vivadoSessions = VivadoSessionManager(keep=lKeep, echo=(loglevel != 'none'), loglabel=lLogLabel, loglevel=loglevel)
-
     ensure_vivado(ictx)
 
+    ictx.vivadoSessions = VivadoSessionManager(
+        keep=lKeep,
+        echo=(loglevel != 'none'),
+        loglabel=lLogLabel,
+        loglevel=loglevel,
+        pool=ictx.vivadoConsolePool,
+        framed=framed,
+    )
+
+    # Vivado starts up while the dependency tree is parsed
+    if prewarm:
+        ictx.vivadoSessions.prewarm()
+
+    try:
+        validate_settings(ictx)
+    except BaseException:
+        ictx.vivadoSessions.close(release=False)
+        raise
+
+
+# ------------------------------------------------------------------------------
+def run_subcommands(ictx, aSubcommands):
+    """Runs the chained subcommands of the vivado group
+
+    The Vivado session is closed if any of them fails, Vivado may be busy
+    with an interrupted command.
+
+    Args:
+        ictx (ipbb.Context): Context object
+        aSubcommands (list): Chained subcommands, as (name, function, args, kwargs)
+    """
+    try:
+        for name, cmd, args, kwargs in aSubcommands:
+            cmd(*args, **kwargs)
+    except BaseException:
+        ictx.vivadoSessions.close(release=False)
+        raise
+
+
+# ------------------------------------------------------------------------------
+# Subcommands using a Vivado session
+_session_cmds = {
+    'generate-project', 'check-syntax', 'synth', 'impl', 'resource-usage', 'bitfile',
+    'debug-probes', 'memcfg', 'status', 'reset-runs', 'archive', 'ipy'
+}
+
+
+def needs_session(aSubcommands):
+    """Checks if any of the chained subcommands uses a Vivado session
+
+    Args:
+        aSubcommands (list): Chained subcommands, as (name, function, args, kwargs)
+
+    Returns:
+        bool: True if Vivado is needed
+    """
+    return any(
+        # Dry runs of generate-project do not start Vivado
+        name in _session_cmds and not (kwargs.get('aToScript') or kwargs.get('aToStdout'))
+        for name, _, _, kwargs in aSubcommands
+    )
+
 
 
 # ------------------------------------------------------------------------------
@@ -147,6 +206,7 @@ def genproject(ictx, aEnableIPCache, aOptimise, aToScript, aToStdout):
     # Check if vivado is around
     ensure_vivado(ictx)
 
+    # Parsed while the prewarmed Vivado session starts up (see `vivado`)
     lDepFileParser = ictx.depParser
 
     # Ensure that no parsing errors are present
@@ -184,7 +244,7 @@ def genproject(ictx, aEnableIPCache, aOptimise, aToScript, aToStdout):
         )
         cprint(lExc)
         raise click.Abort()
-    
+
     console.log(
         f"{ictx.currentproj.name}: Project created successfully.",
         style='green',
@@ -398,22 +458,22 @@ def resource_usage(ictx, aCell, aDepth, aFile, aSLR):
     if aCell:
         lCmd += ' -cells ' + aCell
 
-    if aFile:
-        lCmd += ' -file ' + aFile
-
-
     try:
         with ictx.vivadoSessions.getctx(lSessionId) as lConsole:
             lProject = VivadoProject(lConsole, ictx.vivadoProjFile)
-            for c in (
-                    'open_run impl_1',
-                    lCmd
-                ):
-                lConsole(c)
+            lConsole('open_run impl_1')
+            if aFile:
+                lConsole(lCmd + ' -file ' + aFile)
+            else:
+                # Read back from file, rather than through the console output
+                lReport = lConsole.report(lCmd)
     except VivadoConsoleError as lExc:
         logVivadoConsoleError(lExc)
         raise click.Abort()
 
+    if not aFile:
+        cprint(lReport, markup=False, highlight=False)
+
 
 # ------------------------------------------------------------------------------
 def bitfile(ictx):
@@ -624,35 +684,14 @@ def memcfg(ictx):
 
 # ------------------------------------------------------------------------------
 def read_run_info(aConsole, aProps=None):
-    lInfos = {}
-    lProps = aProps if aProps is not None else [
-        'STATUS',
-        'NEEDS_REFRESH',
-        'PROGRESS',
-        # 'IS_IMPLEMENTATION',
-        # 'IS_SYNTHESIS',
-        'STATS.ELAPSED',
-        # 'STATS.ELAPSED',
-    ]
-
-    # Gather data about existing runs
-    lRuns = aConsole('get_runs')[0].split()
-
-    for lRun in sorted(lRuns):
-
-        lValues = (
-                aConsole('get_property {0} [get_runs {1}]'.format(p, lRun))[0]
-                for p in lProps
-            )
-        lInfos[lRun] = OrderedDict(zip(lProps, lValues))
-
-    return lInfos
+    return VivadoProject(aConsole).read_run_info(aProps)
 
 # ------------------------------------------------------------------------------
 def make_runs_table(aInfos, title=None):
-    lSummary = Table("Run", *list(next(iter(aInfos.values()))), title=title)
     if not aInfos:
-        return lSummary
+        return Table("Run", title=title)
+
+    lSummary = Table("Run", *list(next(iter(aInfos.values()))), title=title)
 
     for lRun in sorted(aInfos):
         lInfo = aInfos[lRun]
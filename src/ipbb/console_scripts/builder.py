@@ -3,13 +3,13 @@ import click
 import click_didyoumean
 
 import sys
+import importlib
 import traceback
 from io import StringIO, BytesIO
 
 
 from ..context import Context
 
-from ..depparser import DepFormatter
 from ..console import cprint, console
 from .. import __version__
 
@@ -19,13 +19,49 @@ CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'], show_default=True)
 # ------------------------------------------------------------------------------
 
 
+# ------------------------------------------------------------------------------
+class LazyGroup(click_didyoumean.DYMGroup):
+    """
+    Click group importing the implementation of its sub-commands only when they are needed
+
+    Sub-commands are declared as command name -> (module, attribute, common commands),
+    where module is relative to `ipbb.cli` and common commands are added from `ipbb.cli.common`.
+    """
+
+    # ------------------------------------------------------------------------------
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
+
+    # ------------------------------------------------------------------------------
+    def _load_command(self, aName):
+        lModule, lAttr, lCommonCmds = self.lazy_commands[aName]
+        lCmd = getattr(importlib.import_module(f'..cli.{lModule}', __package__), lAttr)
+
+        if lCommonCmds:
+            from ..cli import common
+            for c in lCommonCmds:
+                lCmd.add_command(getattr(common, c))
+        return lCmd
+
+    # ------------------------------------------------------------------------------
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    # ------------------------------------------------------------------------------
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            self.add_command(self._load_command(cmd_name), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+
 # ------------------------------------------------------------------------------
 # @shell(
 #     prompt=click.style('ipbb', fg='blue') + '> ',
 #     intro='Starting IPBus Builder...',
 #     context_settings=CONTEXT_SETTINGS
 # )
-@click.group(cls=click_didyoumean.DYMGroup, context_settings=CONTEXT_SETTINGS)
+@click.group(cls=LazyGroup, context_settings=CONTEXT_SETTINGS)
 @click.option('-e', '--exception-stack', 'aExcStack', is_flag=True, help="Display full exception stack")
 @click.pass_context
 @click.version_option()
@@ -37,70 +73,41 @@ def climain(ctx, aExcStack):
 
 # ------------------------------------------------------------------------------
 def _compose_cli():
-    # Add custom cli to shell
-    from ..cli import repo
-
-    climain.add_command(repo.init)
-    climain.add_command(repo.info)
-    climain.add_command(repo.add)
-    climain.add_command(repo.srcs)
-
-    from ..cli import proj
-
-    climain.add_command(proj.proj)
-
-    from ..cli import dep
-
-    climain.add_command(dep.dep)
-
-    from ..cli import toolbox
-
-    climain.add_command(toolbox.toolbox)
-
-    from ..cli import common
-
-    from ..cli import vivado
-
-    vivado.vivado.add_command(common.cleanup)
-    vivado.vivado.add_command(common.addrtab)
-    vivado.vivado.add_command(common.user_config)
-    climain.add_command(vivado.vivado)
-
-    from ..cli import sim
-
-    sim.sim.add_command(common.cleanup)
-    sim.sim.add_command(common.addrtab)
-    sim.sim.add_command(common.user_config)
-    climain.add_command(sim.sim)
-
-    from ..cli import vitishls
-
-    vitishls.vitishls.add_command(common.cleanup)
-    climain.add_command(vitishls.vitishls)
-
-    from ..cli import ipbus
-    climain.add_command(ipbus.ipbus)
-
-    from ..cli import debug
-    climain.add_command(debug.debug)
-
-    # from ..cli import vunit
-    # climain.add_command(vunit.vunit)
+    # Add custom cli to shell. The modules are imported on first use of each command
+    lCommonCmds = ('cleanup', 'addrtab', 'user_config')
+
+    climain.lazy_commands.update({
+        'init': ('repo', 'init', ()),
+        'info': ('repo', 'info', ()),
+        'add': ('repo', 'add', ()),
+        'srcs': ('repo', 'srcs', ()),
+        'proj': ('proj', 'proj', ()),
+        'dep': ('dep', 'dep', ()),
+        'toolbox': ('toolbox', 'toolbox', ()),
+        'vivado': ('vivado', 'vivado', lCommonCmds),
+        'sim': ('sim', 'sim', lCommonCmds),
+        'vitis-hls': ('vitishls', 'vitishls', ('cleanup',)),
+        'ipbus': ('ipbus', 'ipbus', ()),
+        'debug': ('debug', 'debug', ()),
+        'daemon': ('daemon', 'daemon', ()),
+        # 'vunit': ('vunit', 'vunit', ()),
+    })
 
 
 # ------------------------------------------------------------------------------
-def main():
-    '''Discovers the env at startup'''
+def run(aContext, aArgs=None, aProgName=None):
+    '''Runs an ipbb command line in a given context
 
-    if sys.version_info[0:2] < (3, 6):
-        cprint("Error: Python 3.6 is required to run IPBB", style='red')
-        raise SystemExit(-1)
+    Args:
+        aContext (Context): Context object
+        aArgs (list, optional): Command line arguments. Defaults to the process ones.
+        aProgName (str, optional): Program name shown in the help messages
 
-    _compose_cli()
-
-    obj = Context()
+    Raises:
+        SystemExit: with the exit code of the command
+    '''
     try:
-        climain(obj=obj, show_default=True)
+        climain(args=aArgs, prog_name=aProgName, obj=aContext, show_default=True)
     except Exception as e:
         # from sys import version_info
         # exc_type, exc_obj, exc_tb = sys.exc_info()
@@ -122,10 +129,23 @@ def main():
         cprint("ERROR: exception caught!", style='red')
         cprint(e, style='red')
 
-        if obj.printExceptionStack:
+        if aContext.printExceptionStack:
             console.print_exception()
 
         raise SystemExit(-1)
 
 
+# ------------------------------------------------------------------------------
+def main():
+    '''Discovers the env at startup'''
+
+    if sys.version_info[0:2] < (3, 6):
+        cprint("Error: Python 3.6 is required to run IPBB", style='red')
+        raise SystemExit(-1)
+
+    _compose_cli()
+
+    run(Context())
+
+
 # ------------------------------------------------------------------------------
@@ -0,0 +1,40 @@
+# Modules
+import os
+import sys
+
+from ..tools.daemon import forward, find_socket, kNoDaemonEnvVar
+from ..defaults import kWorkAreaFile, kVarDir, kWorkDaemonSocket
+
+
+# ------------------------------------------------------------------------------
+def _runLocally(aArgs):
+    # Shell completion, and the daemon control commands
+    if os.environ.get(kNoDaemonEnvVar) or '_IPBB_COMPLETE' in os.environ:
+        return True
+    lCmd = next((a for a in aArgs if not a.startswith('-')), None)
+    return lCmd == 'daemon'
+
+
+# ------------------------------------------------------------------------------
+def main():
+    '''Forwards the command to the daemon of the work area, if running, otherwise runs it'''
+
+    lArgs = sys.argv[1:]
+    if not _runLocally(lArgs):
+        lSocketPath = find_socket(kWorkDaemonSocket, os.getcwd(), kWorkAreaFile, kVarDir)
+        try:
+            lCode = forward(lSocketPath, lArgs) if lSocketPath else None
+        except BrokenPipeError:
+            # Output closed early, e.g. piped into `head`
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            lCode = 1
+        except KeyboardInterrupt:
+            # The connection is closed, the daemon stops the command
+            sys.stderr.write('Aborted!\n')
+            lCode = 130
+        if lCode is not None:
+            raise SystemExit(lCode)
+
+    # Imported here, not needed when the command is forwarded
+    from .builder import main as builder_main
+    builder_main()
@@ -1,16 +1,17 @@
 
 # Import click for ansi colors
-import yaml
-import cerberus
-
 from .. import utils
 from ..console import cprint
 
 from os import walk, getcwd
 from os.path import join, split, exists, splitext, basename, dirname
 
-from ..defaults import kWorkAreaFile, kProjAreaFile, kProjUserFile, kSourceDir, kProjDir, kRepoFile, kDeprecatesSetupFile
+from ..defaults import (
+    kWorkAreaFile, kProjAreaFile, kProjUserFile, kProjDepTreeCacheFile, kWorkDepAstCacheFile, kWorkCmpIndexFile,
+    kSourceDir, kProjDir, kVarDir, kRepoFile, kDeprecatesSetupFile,
+)
 from ..utils.printing import deprecation_warning, error_notice
+from ..utils.settings import file_stamp, load_yaml, dump_yaml, get_validator
 
 
 # TODO:
@@ -60,6 +61,7 @@ class SourceInfo(FolderInfo):
 
 
         self._repo_settings = None
+        self._repo_settings_stamp = None
 
         self.name = aName
         self.path = aPath
@@ -77,10 +79,16 @@ class SourceInfo(FolderInfo):
         return join(self.path, kRepoFile)
 
 
+    # ------------------------------------------------------------------------------
+    @property
+    def repo_settings_stamp(self):
+        return (file_stamp(self.repo_settings_path), file_stamp(self.deprecated_setup_settings_path))
+
     # ------------------------------------------------------------------------------
     @property
     def repo_settings(self):
-        if self._repo_settings is None:
+        # Reloaded and validated again only if the settings files have changed
+        if self._repo_settings is None or self._repo_settings_stamp != self.repo_settings_stamp:
             self.load_repo_settings()
 
         return self._repo_settings
@@ -88,6 +96,7 @@ class SourceInfo(FolderInfo):
     # ------------------------------------------------------------------------------
     def load_repo_settings(self):
 
+        self._repo_settings_stamp = self.repo_settings_stamp
         repo_settings_path = self.repo_settings_path
 
         # Check if repo_setting exists
@@ -100,10 +109,14 @@ class SourceInfo(FolderInfo):
                 self._repo_settings = {}
                 return
 
-        with open(repo_settings_path, 'r') as f:
-            self._repo_settings = yaml.safe_load(f)
+        self._repo_settings = load_yaml(repo_settings_path)
 
-        self.validate_repo_settings()
+        try:
+            self.validate_repo_settings()
+        except Exception:
+            # Not to be reused, the next access fails again
+            self._repo_settings = None
+            raise
 
     # ------------------------------------------------------------------------------
     def validate_repo_settings(self):
@@ -112,7 +125,7 @@ class SourceInfo(FolderInfo):
         if not ss:
             return
 
-        vtor = cerberus.Validator(src_repo_schema)
+        vtor = get_validator(src_repo_schema)
 
         if not vtor.validate(ss):
             error_notice(f"""Source repo settings validation failed
@@ -179,37 +192,32 @@ class ProjectInfo(FolderInfo):
         self.name = basename(self.path)
 
         # Import project settings
-        with open(self.filepath, 'r') as f:
-            self.settings = yaml.safe_load(f)
+        self.settings = load_yaml(self.filepath)
 
     # ------------------------------------------------------------------------------
     def load_user_settings(self):
         if not exists(self.userfilepath):
             return
 
-        with open(self.userfilepath, 'r') as f:
-            self.usersettings = yaml.safe_load(f)
+        self.usersettings = load_yaml(self.userfilepath)
 
     # ------------------------------------------------------------------------------
     def save_settings(self, jsonindent=2):
         if not self.settings:
             return
-        with open(self.filepath, 'w') as f:
-            yaml.safe_dump(self.settings, f, indent=jsonindent, default_flow_style=False)
+        dump_yaml(self.settings, self.filepath, indent=jsonindent, default_flow_style=False)
 
     # ------------------------------------------------------------------------------
     def save_user_settings(self, jsonindent=2):
         if not self.usersettings:
             return
-        with open(self.userfilepath, 'w') as f:
-            yaml.safe_dump(self.usersettings, f, indent=jsonindent, default_flow_style=False)
+        dump_yaml(self.usersettings, self.userfilepath, indent=jsonindent, default_flow_style=False)
 
     # ------------------------------------------------------------------------------
     def validate_settings(self):
-        import cerberus
-        v = cerberus.Validator()
+        v = get_validator(proj_settings_schema)
 
-        x = v.validate(self.settings, proj_settings_schema)
+        x = v.validate(self.settings)
         print('Proj Doc Validated', x)
         print(v.errors)
 
@@ -225,6 +233,8 @@ class Context(object):
 
     _verbosity = 0
     printExceptionStack = False
+    # Idle Vivado consoles, kept by long-running processes
+    vivadoConsolePool = None
 
     # ----------------------------------------------------------------------------
     def __init__(self, wd=getcwd()):
@@ -237,6 +247,11 @@ class Context(object):
     # ------------------------------------------------------------------------------
     def _clear(self):
         self._dep_parser = None
+        self._warm_dep_parser = None
+        self._dep_ast_cache = None
+        self._cmp_index = None
+        self._path_maker = None
+        self._sources_info = {}
 
         self.work = FolderInfo()
         self.work.path = None
@@ -244,12 +259,8 @@ class Context(object):
 
         self.currentproj = ProjectInfo()
 
-        self.pathMaker = None
-
     # ----------------------------------------------------------------------------
     def _autodetect(self):
-        from ..depparser import Pathmaker
-
         self._clear()
 
         # -----------------------------
@@ -261,9 +272,6 @@ class Context(object):
 
         self.work.path, self.work.cfgFile = lWorkAreaPath, kWorkAreaFile
 
-        # -----------------------------
-        self.pathMaker = Pathmaker(self.srcdir, self._verbosity)
-
         # -----------------------------
         lProjAreaPath = utils.findFileDirInParents(kProjAreaFile, self._wd)
         if not lProjAreaPath:
@@ -280,33 +288,118 @@ class Context(object):
     project area: {currentproj.name}
     project configuration: {currentproj.settings}
     user settings: {currentproj.usersettings}
-    pathMaker: {pathMaker}
+    pathMaker: {_path_maker}
     parser: {_dep_parser}
     }})'''.format(
                 **(self.__dict__)
             )
         )
 
+    # -----------------------------------------------------------------------------
+    def inheritCaches(self, aContext):
+        """
+        Takes over the caches of a previous context of the same work area
+
+        Meant for long-running processes: the caches check the work area for
+        changes when used, and the dep tree parsed by the previous context is
+        reused only if its dep files are unchanged.
+        """
+        if self.work.path is None or aContext.work.path != self.work.path:
+            return
+
+        self._dep_ast_cache = aContext._dep_ast_cache
+        self._sources_info = aContext._sources_info
+        self._cmp_index = aContext._cmp_index
+        if self._cmp_index is not None:
+            self._cmp_index.expire()
+
+        if self.currentproj.path is not None and aContext.currentproj.path == self.currentproj.path:
+            lParser = aContext._dep_parser if aContext._dep_parser is not None else aContext._warm_dep_parser
+            # Settings changes affecting the parser invalidate it
+            if lParser is not None and self.currentproj.settings == aContext.currentproj.settings:
+                self._warm_dep_parser = lParser
+
+    # -----------------------------------------------------------------------------
+    def newDepParser(self):
+        """
+        Creates a dep file parser for the current project, without parsing
+        """
+        from ..depparser import DepFileParser
+
+        lParser = DepFileParser(
+            self.currentproj.settings['toolset'],
+            self.pathMaker,
+            self.deptreeDefaults,
+            self._verbosity,
+        )
+        lParser.astcache = self.depAstCache
+        return lParser
+
+    # -----------------------------------------------------------------------------
+    @property
+    def deptreeDefaults(self):
+        """
+        Package-level deptree defaults, from the source repository settings
+        """
+        return { k:v.repo_settings.get('deptree', {}) for k,v in self.sources_info.items() }
+
+    # -----------------------------------------------------------------------------
+    @property
+    def pathMaker(self):
+        """
+        Path builder of the work area, created on first use
+        """
+        if self._path_maker is None and self.work.path is not None:
+            from ..depparser import Pathmaker
+            self._path_maker = Pathmaker(self.srcdir, self._verbosity)
+        return self._path_maker
+
+    # -----------------------------------------------------------------------------
+    @property
+    def depAstCache(self):
+        """
+        Pre-processed dep files, shared by all the projects of the work area
+        """
+        if self._dep_ast_cache is None and self.work.path is not None:
+            from ..depparser import DepAstCache
+            self._dep_ast_cache = DepAstCache(join(self.work.path, kVarDir, kWorkDepAstCacheFile), self._verbosity)
+        return self._dep_ast_cache
+
+    # -----------------------------------------------------------------------------
+    @property
+    def componentIndex(self):
+        """
+        Packages, components and dep files of the source area
+        """
+        if self._cmp_index is None and self.work.path is not None:
+            from ..depparser import ComponentIndex
+            self._cmp_index = ComponentIndex(self.srcdir, join(self.work.path, kVarDir, kWorkCmpIndexFile), self._verbosity)
+        return self._cmp_index
+
     # -----------------------------------------------------------------------------
     @property
     def depParser(self):
         if self._dep_parser is None:
 
-            from ..depparser import DepFileParser
+            from ..depparser import DepTreeCache
 
-            # Collect package-level deptree defaults
-            deptree_defaults = { k:v.repo_settings.get('deptree', {}) for k,v in self.sources_info.items() }
-            self._dep_parser = DepFileParser(
-                self.currentproj.settings['toolset'],
-                self.pathMaker,
-                deptree_defaults,
-                self._verbosity,
-            )
+            self._dep_parser = self.newDepParser()
+
+            lTop = (self.currentproj.settings['topPkg'], self.currentproj.settings['topCmp'], self.currentproj.settings['topDep'])
+            lCache = DepTreeCache(join(self.currentproj.path, kProjDepTreeCacheFile), self._verbosity)
 
-            try:
-                self._dep_parser.parse( self.currentproj.settings['topPkg'], self.currentproj.settings['topCmp'], self.currentproj.settings['topDep'],)
-            except OSError:
-                pass
+            # The package defaults come from the repository settings, that may have changed
+            lWarm, self._warm_dep_parser = self._warm_dep_parser, None
+            if lWarm is not None and lWarm.pkg_defaults == self._dep_parser.pkg_defaults and lCache.current(lWarm, *lTop):
+                self._dep_parser = lWarm
+            elif not lCache.restore(self._dep_parser, *lTop):
+                try:
+                    self._dep_parser.parse(*lTop, aPrevious=lCache.reusable)
+                    lCache.store(self._dep_parser, *lTop)
+                except OSError:
+                    pass
+                if self.depAstCache is not None:
+                    self.depAstCache.store()
 
             if self._dep_parser.errors:
                 cprint('WARNING: dep parsing errors detected', style='yellow')
@@ -326,7 +419,7 @@ class Context(object):
     # -----------------------------------------------------------------------------
     @property
     def sources(self):
-        return next(walk(self.srcdir))[1]
+        return self.componentIndex.packages
 
     # -----------------------------------------------------------------------------
     @property
@@ -340,6 +433,12 @@ class Context(object):
     # -----------------------------------------------------------------------------
     @property
     def sources_info(self):
-        return {src: SourceInfo(src, join(self.srcdir, src)) for src in self.sources }
+        # SourceInfos are kept, to load and validate the repository settings only once
+        lInfos = {}
+        for src in self.sources:
+            lInfo = self._sources_info.get(src)
+            lInfos[src] = lInfo if lInfo is not None else SourceInfo(src, join(self.srcdir, src))
+        self._sources_info = lInfos
+        return dict(lInfos)
 
 # -----------------------------------------------------------------------------
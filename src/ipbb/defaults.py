@@ -2,9 +2,15 @@
 kWorkAreaFile = '.ipbb_work.yml'
 kProjAreaFile = '.ipbb_proj.yml'
 kProjUserFile = '.ipbb_user.yml'
+kProjDepTreeCacheFile = '.ipbb_deptree.cache'
+kWorkDepAstCacheFile = '.ipbb_depast.cache'
+kWorkCmpIndexFile = '.ipbb_cmpindex.cache'
+kWorkDaemonSocket = '.ipbb_daemon.sock'
+kWorkDaemonLog = 'ipbb_daemon.log'
 kRepoFile = 'ipbb_repo_settings.yml'
 kDeprecatesSetupFile = '.ipbb_setup.yml'
 kSourceDir = 'src'
 kProjDir = 'proj'
+kVarDir = 'var'
 kTopDep = 'top'
 kTopEntity = 'top'
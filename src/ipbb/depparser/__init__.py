@@ -3,4 +3,10 @@ from ._pathmaker import Pathmaker
 from ._definitions import *
 from ._formatters import *
 from ._definitions import dep_command_types
-from ._fileparser import DepFileParser, dep_file_types
+from ._fileparser import DepFileParser, DepReference, dep_file_types
+from ._cache import DepTreeCache
+from ._astcache import DepAstCache
+from ._profile import DepParserProfile
+from ._export import DepExporter, kExportSections
+from ._batch import DepCheckTarget, DepCheckResult, check_deptrees
+from ._cmpindex import ComponentIndex
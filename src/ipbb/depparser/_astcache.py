@@ -0,0 +1,188 @@
+import os
+import hashlib
+import marshal
+import threading
+
+from os.path import exists, dirname
+
+from .. import __version__
+from ..console import cprint
+from ._cmdparser import split_line
+
+# Bump whenever the layout of the cached data changes
+_kCacheFormat = 1
+
+
+# -----------------------------------------------------------------------------
+def tokenize_depfile(aLines, aTokenize=True):
+    """
+    Pre-processes the lines of a dep file, independently of the settings
+
+    Comments and blank lines are dropped. If aTokenize is set, command lines
+    not using settings are split in tokens, after stripping the conditional
+    directive, if any.
+
+    Returns:
+        tuple: (line number, stripped line, tokens or None) for each line to be processed
+    """
+    lAst = []
+    for lLineNr, lLine in enumerate(aLines):
+        lLine = lLine.strip()
+        if lLine == "" or lLine[0] == "#":
+            continue
+
+        lTokens = None
+        if not aTokenize:
+            lAst.append((lLineNr, lLine, lTokens))
+            continue
+
+        lBody = lLine
+        if lBody[0] == '?':
+            lBody = lBody.split('?')
+            lBody = lBody[2].strip() if len(lBody) == 3 else ''
+        if lBody and lBody[0] != '@' and '$' not in lBody:
+            try:
+                lTokens = tuple(split_line(lBody))
+            except ValueError:
+                # Left to the parser to report
+                pass
+        lAst.append((lLineNr, lLine, lTokens))
+    return tuple(lAst)
+
+
+# -----------------------------------------------------------------------------
+class DepAstCache(object):
+    """
+    Work-area cache of pre-processed dep files, shared by all project areas
+
+    Dep files are stored as returned by `tokenize_depfile`, indexed by the
+    hash of their content. A stat index maps each file path to its content
+    hash, so that unchanged files are not read at all.
+    """
+
+    # -----------------------------------------------------------------------------
+    def __init__(self, aPath, aVerbosity=0):
+        super().__init__()
+        self.path = aPath
+        self._verbosity = aVerbosity
+        self._lock = threading.Lock()
+        # path -> (stamp, hash)
+        self._stats = None
+        # hash -> ast
+        self._asts = None
+        self._modified = False
+        self.hits = 0
+        self.misses = 0
+
+    # -----------------------------------------------------------------------------
+    def _load(self):
+        self._stats, self._asts = {}, {}
+        if not exists(self.path):
+            return
+
+        try:
+            with open(self.path, 'rb') as f:
+                lData = marshal.load(f)
+            if lData['format'] != _kCacheFormat or lData['version'] != __version__:
+                return
+            self._stats, self._asts = lData['stats'], lData['asts']
+        except Exception as lExc:
+            # A corrupted or outdated cache is just a cache miss
+            if self._verbosity > 0:
+                cprint(f"Failed to load dep ast cache {self.path}: {lExc}", style='yellow')
+
+    # -----------------------------------------------------------------------------
+    def get(self, aPath):
+        """
+        Returns the pre-processed content and the stamp of a dep file, None if not cached or changed
+        """
+        with self._lock:
+            if self._stats is None:
+                self._load()
+
+        lEntry = self._stats.get(aPath)
+        if lEntry is None:
+            self.misses += 1
+            return None
+
+        try:
+            st = os.stat(aPath)
+        except OSError:
+            self.misses += 1
+            return None
+
+        lStamp, lHash = lEntry
+        lAst = self._asts.get(lHash)
+        if lAst is None or (st.st_mtime_ns, st.st_size) != lStamp:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return lAst, lStamp
+
+    # -----------------------------------------------------------------------------
+    def add(self, aPath, aStamp, aLines, aPreprocess=tokenize_depfile):
+        """
+        Returns the pre-processed content of a dep file that was read, reusing
+        the cached one if the content is already known
+
+        Args:
+            aPath (str): Dep file path
+            aStamp (tuple): Dep file modification time and size
+            aLines (list): Dep file lines
+            aPreprocess (callable): Pre-processing function, applied to the lines if not cached
+        """
+        lHash = hashlib.sha1(''.join(aLines).encode()).hexdigest()
+        with self._lock:
+            if self._stats is None:
+                self._load()
+            lAst = self._asts.get(lHash)
+
+        if lAst is None:
+            lAst = aPreprocess(aLines)
+        else:
+            self.hits += 1
+
+        with self._lock:
+            self._stats[aPath] = (aStamp, lHash)
+            self._asts[lHash] = lAst
+            self._modified = True
+        return lAst
+
+    # -----------------------------------------------------------------------------
+    def store(self):
+        """
+        Saves the cache, if modified, merging the entries stored by other processes meanwhile
+        """
+        if not self._modified:
+            return
+
+        lStats, lAsts = self._stats, self._asts
+        self._load()
+        self._stats.update(lStats)
+        self._asts.update(lAsts)
+        # Drop the contents no longer referenced by any path
+        lHashes = { h for _, h in self._stats.values() }
+        self._asts = { h: a for h, a in self._asts.items() if h in lHashes }
+
+        lData = {
+            'format': _kCacheFormat,
+            'version': __version__,
+            'stats': self._stats,
+            'asts': self._asts,
+        }
+
+        # Write to a temporary file first, to never leave a truncated cache behind
+        lTmpPath = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(dirname(self.path), exist_ok=True)
+            with open(lTmpPath, 'wb') as f:
+                marshal.dump(lData, f)
+            os.replace(lTmpPath, self.path)
+            self._modified = False
+        except Exception as lExc:
+            # Failing to store the cache must not affect the command being run
+            if exists(lTmpPath):
+                os.remove(lTmpPath)
+            if self._verbosity > 0:
+                cprint(f"Failed to store dep ast cache {self.path}: {lExc}", style='yellow')
@@ -0,0 +1,201 @@
+import os
+import time
+
+from collections import namedtuple
+from multiprocessing.util import Finalize
+from os.path import relpath
+
+from ._pathmaker import Pathmaker
+from ._fileparser import DepFileParser
+from ._cache import DepTreeCache
+from ._astcache import DepAstCache
+
+
+# Dep tree to check. cache is the path of the dep tree cache, if any
+DepCheckTarget = namedtuple('DepCheckTarget', ['name', 'toolset', 'package', 'component', 'depfile', 'cache'])
+
+
+# -----------------------------------------------------------------------------
+class DepCheckResult(object):
+    """
+    Picklable summary of the parsing of a dep tree
+
+    Paths are relative to the source directory. Parsing errors are stored as
+    (dep file, line number, line, message), missing files as
+    (path expression, included by) and references to the queried files as
+    (file, dep file, line index, command, include chain) tuples. The top
+    dep file itself is reported as referenced by itself, without line index.
+    """
+
+    # -----------------------------------------------------------------------------
+    def __init__(self, aTarget):
+        super().__init__()
+        self.target = aTarget
+        self.depfiles = 0
+        self.commands = {}
+        self.errors = []
+        self.unresolved_packages = []
+        self.unresolved_components = []
+        self.unresolved_files = []
+        self.references = []
+        # Failure preventing the parsing from completing
+        self.exception = None
+        self.restored = False
+        self.elapsed = 0.
+
+    # -----------------------------------------------------------------------------
+    @property
+    def failed(self):
+        return bool(self.exception or self.errors or self.unresolved_packages or self.unresolved_components or self.unresolved_files)
+
+    # -----------------------------------------------------------------------------
+    def collect(self, aParser, aQueryPaths=()):
+        """
+        Extracts the summary from a parser, including the references to aQueryPaths
+        """
+        lRootDir = aParser.rootdir
+        self.depfiles = len(aParser._depregistry)
+        self.commands = { k: len(v) for k, v in aParser.commands.items() }
+
+        for lPkg, lCmp, lDepName, lDepPath, lLineNo, lLine, lErr in aParser.errors:
+            self.errors.append((
+                relpath(lDepPath, lRootDir) + ':' + str(lLineNo),
+                lLine,
+                str(lErr) + (': {}'.format(lErr.__cause__) if lErr.__cause__ is not None else ''),
+            ))
+
+        self.unresolved_packages = sorted(aParser.unresolved_packages)
+        self.unresolved_components = [
+            f'{lPkg}:{lCmp}'
+            for lPkg, lCmps in sorted(aParser.unresolved_components.items())
+            for lCmp in sorted(lCmps)
+        ]
+        for lPkg, lCmps in sorted(aParser.unresolved_files.items()):
+            for lCmp, lPathExps in sorted(lCmps.items()):
+                for lPathExp in sorted(lPathExps):
+                    self.unresolved_files.append((
+                        relpath(lPathExp, lRootDir),
+                        tuple(relpath(p, lRootDir) for p in lPathExps[lPathExp]),
+                    ))
+
+        for lPath in aQueryPaths:
+            # The top dep file is not referenced by any entry
+            if aParser.depfile is not None and lPath == aParser.depfile.path:
+                self.references.append((relpath(lPath, lRootDir), relpath(lPath, lRootDir), None, 'top', ()))
+
+            for lRef in aParser.referrers(lPath):
+                self.references.append((
+                    relpath(lPath, lRootDir),
+                    relpath(lRef.depfile.path, lRootDir),
+                    lRef.line,
+                    lRef.command.cmd,
+                    tuple(relpath(f.path, lRootDir) for f in aParser.include_chain(lRef.depfile)),
+                ))
+
+
+# Per-process state of the batch workers
+_kWorker = {}
+
+
+# -----------------------------------------------------------------------------
+def _init_worker(aSrcDir, aPkgDefaults, aAstCachePath, aVerbosity, aQueryPaths, aPrefetchWorkers=None):
+    _kWorker['args'] = (aSrcDir, aPkgDefaults, aVerbosity, aQueryPaths, aPrefetchWorkers)
+    # Loaded once per process, shared by all the dep trees it parses
+    _kWorker['astcache'] = DepAstCache(aAstCachePath, aVerbosity) if aAstCachePath else None
+
+
+# -----------------------------------------------------------------------------
+def _init_pool_worker(*aArgs):
+    # The worker processes already parse in parallel, no reader threads on top
+    _init_worker(*aArgs, aPrefetchWorkers=0)
+
+    # Stored once, when the worker process exits
+    lAstCache = _kWorker['astcache']
+    if lAstCache is not None:
+        Finalize(lAstCache, lAstCache.store, exitpriority=0)
+
+
+# -----------------------------------------------------------------------------
+def _check_worker(aTarget):
+    lSrcDir, lPkgDefaults, lVerbosity, lQueryPaths, lPrefetchWorkers = _kWorker['args']
+    return check_deptree(lSrcDir, aTarget, lPkgDefaults, _kWorker['astcache'], lVerbosity, lQueryPaths, lPrefetchWorkers)
+
+
+# -----------------------------------------------------------------------------
+def check_deptree(aSrcDir, aTarget, aPkgDefaults={}, aAstCache=None, aVerbosity=0, aQueryPaths=(), aPrefetchWorkers=None):
+    """
+    Parses a dep tree, using the dep tree cache of the target if available
+
+    Args:
+        aQueryPaths (tuple): Absolute paths of the files to look up in the dep tree
+        aPrefetchWorkers (int, optional): Number of dep file reader threads, the parser default if None
+
+    Returns:
+        DepCheckResult: Summary of the parsing
+    """
+    lResult = DepCheckResult(aTarget)
+    t0 = time.perf_counter()
+
+    lParser = DepFileParser(aTarget.toolset, Pathmaker(aSrcDir, aVerbosity), aPkgDefaults, aVerbosity)
+    lParser.astcache = aAstCache
+    if aPrefetchWorkers is not None:
+        lParser.prefetch_workers = aPrefetchWorkers
+    lTop = (aTarget.package, aTarget.component, aTarget.depfile)
+    lCache = DepTreeCache(aTarget.cache, aVerbosity) if aTarget.cache else None
+
+    try:
+        lResult.restored = lCache is not None and lCache.restore(lParser, *lTop)
+        if not lResult.restored:
+            lParser.parse(*lTop, aPrevious=lCache.reusable if lCache is not None else None)
+            if lCache is not None:
+                lCache.store(lParser, *lTop)
+        lResult.collect(lParser, aQueryPaths)
+    except Exception as lExc:
+        lResult.exception = f'{type(lExc).__name__}: {lExc}'
+
+    lResult.elapsed = time.perf_counter() - t0
+    return lResult
+
+
+# -----------------------------------------------------------------------------
+def check_deptrees(aSrcDir, aTargets, aPkgDefaults={}, aAstCachePath=None, aJobs=None, aVerbosity=0, aQueryPaths=()):
+    """
+    Parses several dep trees in a pool of processes
+
+    The pre-processed dep files are shared through the work area dep ast
+    cache, stored once by each process, each dep tree uses its own dep tree
+    cache. The worker processes read the dep files without prefetching threads.
+
+    Args:
+        aSrcDir (str): Source directory
+        aTargets (list): DepCheckTarget list
+        aPkgDefaults (dict): Package-level deptree defaults
+        aAstCachePath (str, optional): Path of the dep ast cache
+        aJobs (int, optional): Number of worker processes. Defaults to the number of CPUs.
+            With 1 the dep trees are parsed in the current process.
+        aVerbosity (int): Verbosity level
+        aQueryPaths (tuple): Absolute paths of the files to look up in each dep tree
+
+    Yields:
+        DepCheckResult: parsing summaries, as they are completed
+    """
+    lArgs = (aSrcDir, aPkgDefaults, aAstCachePath, aVerbosity, tuple(aQueryPaths))
+    lJobs = min(aJobs or os.cpu_count() or 1, len(aTargets))
+
+    if lJobs <= 1:
+        _init_worker(*lArgs)
+        try:
+            for t in aTargets:
+                yield _check_worker(t)
+        finally:
+            if _kWorker['astcache'] is not None:
+                _kWorker['astcache'].store()
+        return
+
+    # Imported here, multiprocessing is not needed by the other commands
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(lJobs, initializer=_init_pool_worker, initargs=lArgs) as lPool:
+        lFutures = [lPool.submit(_check_worker, t) for t in aTargets]
+        for f in as_completed(lFutures):
+            yield f.result()
@@ -0,0 +1,229 @@
+import os
+import uuid
+import hashlib
+import pickle
+
+from collections import OrderedDict
+from os.path import exists
+
+from .. import __version__
+from ..console import cprint
+
+# Bump whenever the layout of the cached data changes
+_kCacheFormat = 5
+
+
+# -----------------------------------------------------------------------------
+def _file_stamp(aPath):
+    """
+    Returns the modification time and size of a file, None if it doesn't exist
+    """
+    try:
+        st = os.stat(aPath)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+# -----------------------------------------------------------------------------
+def _dir_fingerprint(aPath):
+    """
+    Returns a digest of the directory listing, None if the directory doesn't exist
+    """
+    try:
+        lEntries = sorted(os.listdir(aPath))
+    except OSError:
+        return None
+    return hashlib.sha1('\0'.join(lEntries).encode()).hexdigest()
+
+
+# -----------------------------------------------------------------------------
+class DepTreeCache(object):
+    """
+    On-disk cache of the dependency tree resolved by a DepFileParser
+
+    The cache is invalidated when any of the parsed dep files or any of the
+    directories listed while resolving the file expressions changes.
+    In that case the depfiles not affected by the changes are made available
+    in `reusable`, to be passed to the next parsing.
+
+    The file holds two pickles: a header, with what is needed to check the
+    validity of the cache, followed by the parser results.
+    """
+
+    # -----------------------------------------------------------------------------
+    def __init__(self, aPath, aVerbosity=0):
+        super().__init__()
+        self.path = aPath
+        self._verbosity = aVerbosity
+        # Unchanged depfiles from an outdated cache, indexed by path
+        self.reusable = {}
+
+    # -----------------------------------------------------------------------------
+    @staticmethod
+    def _key(aParser, aPackage, aComponent, aDepFileName):
+        return (
+            _kCacheFormat,
+            __version__,
+            aParser._toolset,
+            aParser.rootdir,
+            (aPackage, aComponent, aDepFileName),
+            repr(aParser.pkg_defaults),
+        )
+
+    # -----------------------------------------------------------------------------
+    def _load(self, aResults=True):
+        if not exists(self.path):
+            return None
+
+        try:
+            with open(self.path, 'rb') as f:
+                lData = pickle.load(f)
+                if aResults:
+                    lData['results'] = pickle.load(f)
+                return lData
+        except Exception as lExc:
+            # A corrupted or outdated cache is just a cache miss
+            if self._verbosity > 0:
+                cprint(f"Failed to load dep tree cache {self.path}: {lExc}", style='yellow')
+            return None
+
+    # -----------------------------------------------------------------------------
+    def restore(self, aParser, aPackage, aComponent, aDepFileName):
+        """
+        Restores the parser results from the cache, if still valid
+
+        Returns:
+            bool: True if the parser was restored from cache
+        """
+        self.reusable = {}
+
+        lData = self._load()
+        if lData is None:
+            return False
+
+        if lData['key'] != self._key(aParser, aPackage, aComponent, aDepFileName):
+            return False
+
+        lChangedFiles, lChangedDirs = self._changes(lData)
+
+        lResults = lData['results']
+        if lChangedFiles or lChangedDirs:
+            # Drop the libraries assigned by the defaults, they are applied again after parsing
+            for c in lResults['defaulted']:
+                c.lib = None
+
+            self.reusable = {
+                p: f for p, f in lResults['depregistry'].items()
+                if p not in lChangedFiles and lChangedDirs.isdisjoint(lData['depfiles'][p][1])
+            }
+            if self._verbosity > 0:
+                cprint(f"Dep tree cache outdated: {len(lChangedFiles)} files and {len(lChangedDirs)} directories changed")
+            return False
+
+        aParser._depregistry = lResults['depregistry']
+        aParser.depfile = lResults['depfile']
+        aParser.settings = lResults['settings']
+        aParser.libs = lResults['libs']
+        aParser.packages = lResults['packages']
+        aParser.commands = lResults['commands']
+        aParser.unresolved = lResults['unresolved']
+        aParser._defaulted = lResults['defaulted']
+        aParser._index_references()
+        aParser.errors = []
+        for lError, lCause in lResults['errors']:
+            # Exception causes are not preserved by pickle
+            lError[-1].__cause__ = lCause
+            aParser.errors.append(lError)
+
+        aParser.cacheid = lData['id']
+
+        if self._verbosity > 0:
+            cprint(f"Dep tree restored from {self.path}")
+        return True
+
+    # -----------------------------------------------------------------------------
+    @staticmethod
+    def _changes(aData):
+        """
+        Returns the dep files and directories changed since the cache was stored
+        """
+        lChangedFiles = { p for p, (lStamp, _) in aData['depfiles'].items() if _file_stamp(p) != lStamp }
+        lChangedDirs = { d for d, lFingerprint in aData['dirs'].items() if _dir_fingerprint(d) != lFingerprint }
+        return lChangedFiles, lChangedDirs
+
+    # -----------------------------------------------------------------------------
+    def current(self, aParser, aPackage, aComponent, aDepFileName):
+        """
+        Checks if a parser, kept in memory, still holds an up-to-date dep tree
+
+        That is the case if the parser results were last stored in or restored
+        from this cache, and the cache is still valid. The results are not loaded.
+
+        Returns:
+            bool: True if the parser results can be used as they are
+        """
+        if aParser.cacheid is None:
+            return False
+
+        lData = self._load(aResults=False)
+        if lData is None or lData['id'] != aParser.cacheid:
+            return False
+
+        if lData['key'] != self._key(aParser, aPackage, aComponent, aDepFileName):
+            return False
+
+        lChangedFiles, lChangedDirs = self._changes(lData)
+        return not (lChangedFiles or lChangedDirs)
+
+    # -----------------------------------------------------------------------------
+    def store(self, aParser, aPackage, aComponent, aDepFileName):
+        """
+        Saves the parser results to the cache
+        """
+        lDepFiles = {}
+        lDirs = set()
+        for p, f in aParser._depregistry.items():
+            lFileDirs = set()
+            for lExpr in OrderedDict.fromkeys(f.globexprs):
+                lFileDirs.update(aParser._pathMaker.globDirs(lExpr))
+            lDepFiles[p] = (f.stamp, tuple(sorted(lFileDirs)))
+            lDirs |= lFileDirs
+
+        lData = {
+            'key': self._key(aParser, aPackage, aComponent, aDepFileName),
+            'id': uuid.uuid4().hex,
+            'depfiles': lDepFiles,
+            'dirs': { d: _dir_fingerprint(d) for d in sorted(lDirs) },
+        }
+        lResults = {
+            'depregistry': aParser._depregistry,
+            'depfile': aParser.depfile,
+            'settings': aParser.settings,
+            'libs': aParser.libs,
+            'packages': aParser.packages,
+            'commands': aParser.commands,
+            'unresolved': aParser.unresolved,
+            'defaulted': aParser._defaulted,
+            'errors': [(e, e[-1].__cause__) for e in aParser.errors],
+        }
+
+        # Write to a temporary file first, to never leave a truncated cache behind
+        lTmpPath = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(lTmpPath, 'wb') as f:
+                pickle.dump(lData, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(lResults, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(lTmpPath, self.path)
+            aParser.cacheid = lData['id']
+        except Exception as lExc:
+            # Failing to store the cache must not affect the command being run
+            if exists(lTmpPath):
+                os.remove(lTmpPath)
+            if self._verbosity > 0:
+                cprint(f"Failed to store dep tree cache {self.path}: {lExc}", style='yellow')
+
+    # -----------------------------------------------------------------------------
+    def clear(self):
+        if exists(self.path):
+            os.remove(self.path)
@@ -1,5 +1,6 @@
 
-import cerberus
+import re
+import shlex
 import argparse
 from ._cmdtypes import Command, IncludeCommand, SrcCommand, HlsSrcCommand, SetupCommand, AddrtabCommand
 from ..console import cprint, console
@@ -17,6 +18,23 @@ cmds_defaults_schema = {
     }    
 }
 
+# Characters requiring the full shell-like tokenizer
+_kShellSpecial = re.compile(r'[\'"\\]')
+# Tokens of a line without quotes or escapes, split on shlex whitespace
+_kPlainToken = re.compile(r'[^ \t\r\n]+')
+
+
+# -----------------------------------------------------------------------------
+def split_line(aLine):
+    """
+    Splits a dep line into tokens, equivalent to shlex.split.
+    Lines without quotes and escapes, the vast majority, are split directly.
+    """
+    if _kShellSpecial.search(aLine) is None:
+        return _kPlainToken.findall(aLine)
+    return shlex.split(aLine)
+
+
 # -----------------------------------------------------------------------------
 class ComponentAction(argparse.Action):
     '''
@@ -95,13 +113,25 @@ class DepSubCmdParser(argparse.ArgumentParser):
 
 # -----------------------------------------------------------------------------
 class DepCmdParser(argparse.ArgumentParser):
+    """
+    Dep command line parser
+
+    Lines are parsed by a table-driven fast parser built from the argparse
+    sub-parsers. Anything the fast parser does not handle, errors included,
+    is passed to argparse.
+    """
+
+    # Toggles the fast parser
+    fastpath = True
 
     def error(self, message):
         raise DepCmdParserError(message)
 
 
     def validate_defaults(self):
-        lValidator = cerberus.Validator(cmds_defaults_schema, allow_unknown=True)
+        from ..utils.settings import get_validator
+
+        lValidator = get_validator(cmds_defaults_schema, allow_unknown=True)
         for pkg,defs in self.package_defaults.items():
             if not lValidator.validate(defs):
                 cprint(f"ERROR: {pkg} repository settings validation failed", style='red')
@@ -178,6 +208,9 @@ class DepCmdParser(argparse.ArgumentParser):
         subp.add_argument('file', nargs='*')
 
 
+        # Fast parser lookup tables
+        self._fasttables = { n: self._make_table(p) for n, p in parser_add.choices.items() }
+
         self.creators = {
             'include' : lambda a : IncludeCommand(a.cmd, a.file, a.component[0], a.component[1], a.cd),
             'src'     : lambda a : SrcCommand(a.cmd, a.file, a.component[0], a.component[1], a.cd, a.lib, a.vhdl2008, a.vhdl2019, 'synth' in a.usein, 'sim' in a.usein, a.usefor, a.simflags),
@@ -189,21 +222,115 @@ class DepCmdParser(argparse.ArgumentParser):
 
 
     # --------------------------------------------------------------
+    @staticmethod
+    def _make_table(aParser):
+        """
+        Builds the fast parser lookup table for a sub-parser
+
+        Returns:
+            tuple: the parser, its defaults, its options, its positional argument
+                and the mutually exclusive groups by action. None if the
+                sub-parser grammar is not supported by the fast parser.
+        """
+        lDefaults = {}
+        lOptions = {}
+        lPositionals = []
+        for a in aParser._actions:
+            if isinstance(a, argparse._HelpAction):
+                continue
+            if a.dest is not argparse.SUPPRESS and a.default is not argparse.SUPPRESS:
+                lDefaults[a.dest] = a.default
+            if not a.option_strings:
+                lPositionals.append(a)
+            elif a.nargs not in (None, 0):
+                return None
+            else:
+                lOptions.update((o, a) for o in a.option_strings)
+
+        if len(lPositionals) != 1 or lPositionals[0].nargs not in ('*', '+'):
+            return None
+
+        lExclusive = { a: g for g in aParser._mutually_exclusive_groups for a in g._group_actions }
+
+        return aParser, lDefaults, lOptions, lPositionals[0], lExclusive
 
-    def parse_line(self, *args, current_package : str = None, current_component : str = None):
-
-        # Parse commandline
-        parsed_args = self.parse_args(*args)
-
-        
-        # Extract command identffier
-        cmd = parsed_args.cmd if parsed_args.cmd in self.creators else '*'
-
-        # Turn namespace into a dict
-        vars_args = vars(parsed_args)
+    # --------------------------------------------------------------
+    def _fast_parse(self, aArgs):
+        """
+        Parses a tokenized line without going through argparse
+
+        Returns:
+            argparse.Namespace: the parsed arguments, or None if the line
+                must be parsed by argparse
+        """
+        lTable = self._fasttables.get(aArgs[0]) if aArgs else None
+        if lTable is None:
+            return None
+        lParser, lDefaults, lOptions, lPositional, lExclusive = lTable
+
+        lNamespace = argparse.Namespace(cmd=aArgs[0], **lDefaults)
+
+        lFiles = []
+        # 0: no files yet, 1: reading files, 2: files done
+        lFilesState = 0
+        lGroups = {}
+        i, n = 1, len(aArgs)
+        try:
+            while i < n:
+                lToken = aArgs[i]
+                if lToken[:1] != '-':
+                    if lFilesState == 2:
+                        return None
+                    lFilesState = 1
+                    lFiles.append(lToken)
+                    i += 1
+                    continue
+
+                a = lOptions.get(lToken)
+                lValue = None
+                if a is None and lToken[:2] == '--' and '=' in lToken:
+                    # --option=value form
+                    lToken, lValue = lToken.split('=', 1)
+                    a = lOptions.get(lToken)
+                    if a is None or a.nargs == 0:
+                        return None
+                if a is None:
+                    return None
+                if lFilesState == 1:
+                    lFilesState = 2
+
+                g = lExclusive.get(a)
+                if g is not None and lGroups.setdefault(g, a) is not a:
+                    return None
+
+                if lValue is not None:
+                    a(lParser, lNamespace, lValue, lToken)
+                    i += 1
+                elif a.nargs == 0:
+                    a(lParser, lNamespace, [], lToken)
+                    i += 1
+                else:
+                    if i + 1 >= n or aArgs[i + 1][:1] == '-':
+                        return None
+                    a(lParser, lNamespace, aArgs[i + 1], lToken)
+                    i += 2
+
+            if not lFiles and lPositional.nargs == '+':
+                return None
+            lPositional(lParser, lNamespace, lFiles, None)
+        except Exception:
+            # Let argparse report the error
+            return None
+
+        return lNamespace
 
-        # Apply current package and component
-        p,c = vars_args["component"]
+    # --------------------------------------------------------------
+    @staticmethod
+    def resolve_component(aComponent, current_package : str = None, current_component : str = None):
+        """
+        Applies the current package and component to a parsed -c argument
+        """
+        p,c = aComponent
         if p is None and c is None:
             # case: -c not specified, current package and component
             p, c = current_package, current_component
@@ -216,6 +343,25 @@ class DepCmdParser(argparse.ArgumentParser):
         else:
             # Nothig to do
             pass
+        return p, c
+
+    # --------------------------------------------------------------
+    def parse_line(self, *args, current_package : str = None, current_component : str = None):
+
+        # Parse commandline
+        parsed_args = self._fast_parse(*args) if self.fastpath else None
+        if parsed_args is None:
+            parsed_args = self.parse_args(*args)
+
+        
+        # Extract command identffier
+        cmd = parsed_args.cmd if parsed_args.cmd in self.creators else '*'
+
+        # Turn namespace into a dict
+        vars_args = vars(parsed_args)
+
+        # Apply current package and component
+        p, c = self.resolve_component(vars_args["component"], current_package, current_component)
         vars_args["component"] = (p,c)
 
         # Get defaults for this package/command
@@ -1,4 +1,13 @@
 
+import sys
+
+
+# -----------------------------------------------------------------------------
+def _intern(aValue):
+    return sys.intern(aValue) if type(aValue) is str else aValue
+
+
+# -----------------------------------------------------------------------------
 class Command(object):
     """Container class for dep commands parsed form dep files
 
@@ -8,16 +17,37 @@ class Command(object):
         package   (str): package the target belongs to.
         component (str): component withon 'Package' the target belongs to
     """
+    __slots__ = ('cmd', 'filepath', 'package', 'component', 'cd')
+
+    # --------------------------------------------------------------
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = tuple(f for c in reversed(cls.__mro__) for f in c.__dict__.get('__slots__', ()))
 
     # --------------------------------------------------------------
     def __init__(self, aCmd, aFilePath, aPackage, aComponent, aCd):
         super().__init__()
-        self.cmd = aCmd
+        self.cmd = _intern(aCmd)
         self.filepath = aFilePath
-        self.package = aPackage
-        self.component = aComponent
+        self.package = _intern(aPackage)
+        self.component = _intern(aComponent)
         self.cd = aCd
 
+    # --------------------------------------------------------------
+    def clone(self, aFilePath, aPackage, aComponent):
+        """
+        Creates a copy of the command for a different target, using this
+        command as template. Attributes other than the target are shared
+        with the template, therefore must not be modified in place.
+        """
+        lCmd = object.__new__(type(self))
+        for f in self._fields:
+            setattr(lCmd, f, getattr(self, f))
+        lCmd.filepath = aFilePath
+        lCmd.package = aPackage
+        lCmd.component = aComponent
+        return lCmd
+
     # --------------------------------------------------------------
     def __str__(self):
 
@@ -53,6 +83,8 @@ class Command(object):
 
     __repr__ = __str__
 
+Command._fields = Command.__slots__
+
 
 # -----------------------------------------------------------------------------
 class SrcCommand(Command):
@@ -71,11 +103,14 @@ class SrcCommand(Command):
         usefor     (str):  use specification for constraint files
         simflags   (str):  flags to be passed to Modelsim/Questasim
     """
+    # --------------------------------------------------------------
+    __slots__ = ('lib', 'vhdl2008', 'vhdl2019', 'useInSynth', 'useInSim', 'useFor', 'simflags')
+
     # --------------------------------------------------------------
     def __init__(self, aCmd, aFilePath, aPackage, aComponent, aCd, aLib, aVhdl2008, aVhdl2019, aUseInSynth, aUseInSim, aUseFor, aSimflags):
         super().__init__(aCmd, aFilePath, aPackage, aComponent, aCd)
 
-        self.lib = aLib
+        self.lib = _intern(aLib)
         self.vhdl2008 = aVhdl2008
         self.vhdl2019 = aVhdl2019
         self.useInSynth = aUseInSynth
@@ -119,6 +154,8 @@ class HlsSrcCommand(Command):
         csimflags  (str):  c compiler flags in simulation
         testbench  (bool): this file is a testbench
     """
+    __slots__ = ('cflags', 'csimflags', 'testbench', 'includeComponents')
+
     def __init__(self, aCmd, aFilePath, aPackage, aComponent, aCd, aCFlags, aCSimFlags, aTestBench, aIncludeComps):
         super().__init__(aCmd, aFilePath, aPackage, aComponent, aCd)
         self.cflags = aCFlags
@@ -150,6 +187,8 @@ class SetupCommand(Command):
         component (str):  component withon 'Package' the target belongs to
         finalise  (bool): setup-only flag, identifies setup scripts to be executed at the end
     """
+    __slots__ = ('finalize',)
+
     # --------------------------------------------------------------
     def __init__(self, aCmd, aFilePath, aPackage, aComponent, aCd, aFinalise):
         super().__init__(aCmd, aFilePath, aPackage, aComponent, aCd)
@@ -172,6 +211,8 @@ class AddrtabCommand(Command):
         component (str):  component withon 'Package' the target belongs to
         toplevel  (bool): addrtab-only flag, identifies address table as top-level
     """
+    __slots__ = ('toplevel',)
+
     # --------------------------------------------------------------
     def __init__(self, aCmd, aFilePath, aPackage, aComponent, aCd, aTopLevel):
         super().__init__(aCmd, aFilePath, aPackage, aComponent, aCd)
@@ -190,6 +231,8 @@ class IncludeCommand(Command):
         package   (str):  package the target belongs to.
         component (str):  component withon 'Package' the target belongs to
     """
+    __slots__ = ('depfile',)
+
     def __init__(self, aCmd, aFilePath, aPackage, aComponent, aCd, aDepFileObj=None):
         super().__init__(aCmd, aFilePath, aPackage, aComponent, aCd)
         self.depfile = aDepFileObj
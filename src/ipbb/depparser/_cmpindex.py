@@ -0,0 +1,223 @@
+import os
+import marshal
+
+from collections import OrderedDict
+from os.path import exists, dirname, join
+
+from .. import __version__
+from ..console import cprint
+from ._definitions import dep_file_types
+from ._pathmaker import Pathmaker
+
+# Bump whenever the layout of the cached data changes
+_kCacheFormat = 1
+
+
+# -----------------------------------------------------------------------------
+class ComponentIndex(object):
+    """
+    Persistent index of the packages, components and dep files of a work area
+
+    A component is any directory of a package holding a `firmware`
+    sub-directory, its dep files are the ones found under `firmware/cfg`.
+
+    The listing of each directory is stored together with its modification
+    time. When the index is refreshed, directories are listed again only if
+    modified, the others are just checked with a `stat` call.
+    """
+
+    # Directories never holding components
+    kSkipDirs = ('.git', '.svn')
+
+    # -----------------------------------------------------------------------------
+    def __init__(self, aSrcDir, aPath, aVerbosity=0):
+        super().__init__()
+        self.srcdir = aSrcDir
+        self.path = aPath
+        self._verbosity = aVerbosity
+        self._fwdir = Pathmaker.fpaths['fw']
+        self._cfgdir = Pathmaker.fpaths['include']
+        self._depexts = tuple(dep_file_types)
+        # relative directory path -> (mtime, sub-directories, symlinks to directories, dep files)
+        self._dirs = None
+        # package -> component -> dep files
+        self._packages = None
+        self._modified = False
+        # directories listed during the last refresh
+        self.scanned = 0
+
+    # -----------------------------------------------------------------------------
+    def _load(self):
+        if not exists(self.path):
+            return {}
+
+        try:
+            with open(self.path, 'rb') as f:
+                lData = marshal.load(f)
+            if lData['format'] != _kCacheFormat or lData['version'] != __version__ or lData['srcdir'] != self.srcdir:
+                return {}
+            return lData['dirs']
+        except Exception as lExc:
+            # A corrupted or outdated index is just rebuilt
+            if self._verbosity > 0:
+                cprint(f"Failed to load component index {self.path}: {lExc}", style='yellow')
+            return {}
+
+    # -----------------------------------------------------------------------------
+    def _listdir(self, aRelPath, aPrevious):
+        """
+        Returns the listing of a directory, None if it doesn't exist
+
+        Returns:
+            tuple: (mtime, sub-directories, symlinks to directories, dep files)
+        """
+        lPath = join(self.srcdir, aRelPath)
+        try:
+            lMTime = os.stat(lPath).st_mtime_ns
+        except OSError:
+            return None
+
+        lEntry = aPrevious.get(aRelPath)
+        if lEntry is None or lEntry[0] != lMTime:
+            lDirs, lLinks, lDepFiles = [], [], []
+            try:
+                with os.scandir(lPath) as it:
+                    for e in it:
+                        if e.is_dir():
+                            (lLinks if e.is_symlink() else lDirs).append(e.name)
+                        elif e.name.endswith(self._depexts):
+                            lDepFiles.append(e.name)
+            except OSError:
+                return None
+            lEntry = (lMTime, tuple(sorted(lDirs)), tuple(sorted(lLinks)), tuple(sorted(lDepFiles)))
+            self.scanned += 1
+            self._modified = True
+
+        self._dirs[aRelPath] = lEntry
+        return lEntry
+
+    # -----------------------------------------------------------------------------
+    def _find_components(self, aPackage, aPrevious):
+        """
+        Returns the components of a package with their dep files, as os.walk would find them
+        """
+        lCmps = OrderedDict()
+        lStack = [aPackage]
+        while lStack:
+            d = lStack.pop()
+            lEntry = self._listdir(d, aPrevious)
+            if lEntry is None:
+                continue
+            _, lDirs, lLinks, _ = lEntry
+
+            if self._fwdir in lDirs or self._fwdir in lLinks:
+                lCmps[os.path.relpath(d, aPackage)] = self._find_depfiles(join(d, self._cfgdir), aPrevious)
+
+            # Symlinks to directories are not followed, components are not nested in the firmware directory
+            lStack.extend(join(d, s) for s in reversed(lDirs) if s != self._fwdir and s not in self.kSkipDirs)
+        return lCmps
+
+    # -----------------------------------------------------------------------------
+    def _find_depfiles(self, aCfgDir, aPrevious):
+        lDepFiles = []
+        lStack = [aCfgDir]
+        while lStack:
+            d = lStack.pop()
+            lEntry = self._listdir(d, aPrevious)
+            if lEntry is None:
+                continue
+            lDepFiles += [os.path.relpath(join(d, f), aCfgDir) for f in lEntry[3]]
+            lStack.extend(join(d, s) for s in lEntry[1] + lEntry[2])
+        return sorted(lDepFiles)
+
+    # -----------------------------------------------------------------------------
+    def refresh(self):
+        """
+        Brings the index up to date with the source area, and saves it if modified
+        """
+        lPrevious = self._dirs if self._dirs is not None else self._load()
+        self._dirs = {}
+        self._modified = False
+        self.scanned = 0
+
+        lPackages = OrderedDict()
+        lRoot = self._listdir('', lPrevious)
+        if lRoot is not None:
+            for lPkg in sorted(lRoot[1] + lRoot[2]):
+                lPackages[lPkg] = self._find_components(lPkg, lPrevious)
+
+        # Directories removed since
+        self._modified |= (lPrevious.keys() != self._dirs.keys())
+        self._packages = lPackages
+
+        if self._modified:
+            self.store()
+
+    # -----------------------------------------------------------------------------
+    def expire(self):
+        """
+        Makes the next access check all the directories again, not only the source directory
+        """
+        self._packages = None
+
+    # -----------------------------------------------------------------------------
+    def _index(self):
+        if self._packages is None:
+            self.refresh()
+        else:
+            # Packages may have been added or removed meanwhile, by the current command
+            try:
+                lMTime = os.stat(self.srcdir).st_mtime_ns
+            except OSError:
+                lMTime = None
+            lRoot = self._dirs.get('')
+            if lMTime != (lRoot[0] if lRoot is not None else None):
+                self.refresh()
+        return self._packages
+
+    # -----------------------------------------------------------------------------
+    @property
+    def packages(self):
+        """
+        Names of the packages in the source area
+        """
+        return list(self._index())
+
+    # -----------------------------------------------------------------------------
+    def components(self, aPackage):
+        """
+        Returns the components of a package, relative to the package directory
+        """
+        return list(self._index().get(aPackage, ()))
+
+    # -----------------------------------------------------------------------------
+    def depfiles(self, aPackage, aComponent):
+        """
+        Returns the dep files of a component, relative to its `firmware/cfg` directory
+        """
+        lCmps = self._index().get(aPackage, {})
+        return list(lCmps.get(os.path.normpath(aComponent), ()))
+
+    # -----------------------------------------------------------------------------
+    def store(self):
+        lData = {
+            'format': _kCacheFormat,
+            'version': __version__,
+            'srcdir': self.srcdir,
+            'dirs': self._dirs,
+        }
+
+        # Write to a temporary file first, to never leave a truncated index behind
+        lTmpPath = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(dirname(self.path), exist_ok=True)
+            with open(lTmpPath, 'wb') as f:
+                marshal.dump(lData, f)
+            os.replace(lTmpPath, self.path)
+            self._modified = False
+        except Exception as lExc:
+            # Failing to store the index must not affect the command being run
+            if exists(lTmpPath):
+                os.remove(lTmpPath)
+            if self._verbosity > 0:
+                cprint(f"Failed to store component index {self.path}: {lExc}", style='yellow')
@@ -0,0 +1,142 @@
+import json
+
+from ._definitions import dep_command_types
+
+
+# Sections of the exported dep tree, in output order
+kExportSections = ('settings', 'commands', 'packages', 'depfiles', 'errors', 'unresolved')
+
+
+# -----------------------------------------------------------------------------
+class DepExporter(object):
+    """
+    Machine-readable export of the results of a DepFileParser
+
+    Records are plain dictionaries generated lazily from the parser results,
+    one at a time, and written out as they are generated. The output size is
+    therefore not limited by memory.
+
+    Formats:
+        ndjson: one JSON object per line, with the section name in the `type` field
+        json: a single JSON object, with a list of records per section
+    """
+
+    # -----------------------------------------------------------------------------
+    def __init__(self, aParser, aGroups=dep_command_types, aCmdFilter=None):
+        """
+        Args:
+            aParser (DepFileParser): Parser holding the dep tree
+            aGroups (tuple): Command groups to export
+            aCmdFilter (callable, optional): Predicate selecting the commands to export
+        """
+        super().__init__()
+        self.parser = aParser
+        self.groups = aGroups
+        self.cmdfilter = aCmdFilter
+        self._encoder = json.JSONEncoder(default=str)
+
+    # -----------------------------------------------------------------------------
+    def iter_settings(self):
+        for lName, lValue in self.parser.settings.leaves():
+            yield {'name': lName, 'value': lValue}
+
+    # -----------------------------------------------------------------------------
+    def iter_commands(self):
+        for k in self.groups:
+            for lCmd in self.parser.commands.get(k, ()):
+                if self.cmdfilter is not None and not self.cmdfilter(lCmd):
+                    continue
+                lRecord = {f: getattr(lCmd, f) for f in lCmd._fields}
+                lRecord['flags'] = lCmd.flags()
+                yield lRecord
+
+    # -----------------------------------------------------------------------------
+    def iter_packages(self):
+        for lPkg, lCmps in self.parser.packages.items():
+            yield {'package': lPkg, 'components': sorted(lCmps)}
+
+    # -----------------------------------------------------------------------------
+    def iter_depfiles(self):
+        """
+        Walks the include tree depth-first, parents first
+        """
+        if self.parser.depfile is None:
+            return
+
+        # Iterative, dep trees can be deeper than the recursion limit
+        lStack = [(self.parser.depfile, 0)]
+        while lStack:
+            lDepFile, lDepth = lStack.pop()
+            yield {
+                'path': lDepFile.path,
+                'package': lDepFile.pkg,
+                'component': lDepFile.cmp,
+                'name': lDepFile.name,
+                'parent': lDepFile.parent.path if lDepFile.parent is not None else None,
+                'depth': lDepth,
+                'errors': len(lDepFile.errors),
+                'unresolved': len(lDepFile.unresolved),
+            }
+            lStack.extend((c, lDepth + 1) for c in reversed(lDepFile.children))
+
+    # -----------------------------------------------------------------------------
+    def iter_errors(self):
+        for lPkg, lCmp, lDepName, lDepPath, lLineNo, lLine, lErr in self.parser.errors:
+            yield {
+                'depfile': lDepPath,
+                'package': lPkg,
+                'component': lCmp,
+                'line': lLineNo,
+                'text': lLine,
+                'error': type(lErr).__name__,
+                'message': str(lErr),
+                'cause': str(lErr.__cause__) if lErr.__cause__ is not None else None,
+            }
+
+    # -----------------------------------------------------------------------------
+    def iter_unresolved(self):
+        for lPathExpr, lCmd, lPackage, lComponent, lDepPackage, lDepComponent, lDepFilePath in self.parser.unresolved:
+            yield {
+                'path': lPathExpr,
+                'cmd': lCmd,
+                'package': lPackage,
+                'component': lComponent,
+                'depfile': lDepFilePath,
+            }
+
+    # -----------------------------------------------------------------------------
+    def iter_section(self, aSection):
+        if aSection not in kExportSections:
+            raise ValueError(f"Unknown dep export section {aSection}. Expected one of {', '.join(kExportSections)}")
+        return getattr(self, f'iter_{aSection}')()
+
+    # -----------------------------------------------------------------------------
+    def write_ndjson(self, aFile, aSections=kExportSections):
+        lEncode = self._encoder.encode
+        for s in aSections:
+            for lRecord in self.iter_section(s):
+                aFile.write(lEncode({'type': s, **lRecord}))
+                aFile.write('\n')
+
+    # -----------------------------------------------------------------------------
+    def write_json(self, aFile, aSections=kExportSections):
+        lEncode = self._encoder.encode
+        aFile.write('{')
+        for i, s in enumerate(aSections):
+            aFile.write(f'{"," if i else ""}\n  {lEncode(s)}: [')
+            for j, lRecord in enumerate(self.iter_section(s)):
+                aFile.write(f'{"," if j else ""}\n    {lEncode(lRecord)}')
+            aFile.write('\n  ]')
+        aFile.write('\n}\n')
+
+    # -----------------------------------------------------------------------------
+    def write(self, aFile, aFormat, aSections=kExportSections):
+        """
+        Writes the selected sections to a file object, in 'json' or 'ndjson' format
+        """
+        if aFormat == 'ndjson':
+            self.write_ndjson(aFile, aSections)
+        elif aFormat == 'json':
+            self.write_json(aFile, aSections)
+        else:
+            raise ValueError(f"Unknown dep export format {aFormat}")
@@ -2,24 +2,27 @@
 import argparse
 import os
 import glob
-import copy
 import string
 import re
-import shlex
-import cerberus
+import types
+import itertools
+import queue
+import threading
 
 from typing import Tuple
 
 from ._definitions import dep_file_types, dep_command_types
 from ._pathmaker import Pathmaker
-from ._cmdparser import ComponentAction, DepCmdParser, DepCmdParserError
+from ._cmdparser import ComponentAction, DepCmdParser, DepCmdParserError, split_line
 from ._cmdtypes import SrcCommand, IncludeCommand
+from ._prefetch import DepFilePrefetcher, read_depfile
+from ._astcache import tokenize_depfile
 
 from ..console import cprint, console
 from ..tools.alien import AlienTree, AlienTemplate
 from ..utils.printing import error_notice
 
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
 from os.path import exists, splitext, sep
 
 DepInfo = Tuple[str, int]
@@ -29,16 +32,114 @@ repo_defaults_schema = {
     'default_library': { 'type': 'string' },
 }
 
+# group 1: settings name
+# group 2: invalid setting name
+# group 3: rest of the line
+_kAssignmentPattern = re.compile(r'^(?:([a-zA-Z][a-zA-Z0-9_]*(?:\.[a-zA-Z][a-zA-Z0-9_]*)*)|([^=\n\s]*))\s*=\s*(.*)?$')
+
+
+# -----------------------------------------------------------------------------
+def _code_names(aCode):
+    """
+    Returns all the names referenced by a code object, nested ones included
+    """
+    lNames = set(aCode.co_names)
+    for c in aCode.co_consts:
+        if isinstance(c, types.CodeType):
+            lNames |= _code_names(c)
+    return lNames
+
+
+# -----------------------------------------------------------------------------
+class ExprCache(object):
+    """
+    Bounded LRU cache of the expressions evaluated in dep files, compiled
+    into code objects, and of the results of conditional directives.
+
+    A cached conditional result is valid as long as none of the settings it
+    references has changed since it was evaluated.
+    """
+    def __init__(self, aMaxSize=1024):
+        super().__init__()
+        self.maxsize = aMaxSize
+        self._code = OrderedDict()
+        self._results = OrderedDict()
+        # settings version, by top-level name
+        self._versions = dict()
+        self._counter = itertools.count(1)
+        self.reset_stats()
+
+    # -----------------------------------------------------------------------------
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.reused = 0
+
+    # -----------------------------------------------------------------------------
+    def _store(self, aCache, aKey, aValue):
+        aCache[aKey] = aValue
+        if len(aCache) > self.maxsize:
+            aCache.popitem(last=False)
+
+    # -----------------------------------------------------------------------------
+    def compile(self, aExpr):
+        """
+        Returns the compiled expression and the names it references
+        """
+        try:
+            lEntry = self._code[aExpr]
+        except KeyError:
+            self.misses += 1
+            # Like eval, ignore leading and trailing spaces and tabs
+            lCode = compile(aExpr.strip(' \t'), '<dep>', 'eval')
+            lEntry = (lCode, tuple(sorted(_code_names(lCode))))
+            self._store(self._code, aExpr, lEntry)
+        else:
+            self.hits += 1
+            self._code.move_to_end(aExpr)
+        return lEntry
+
+    # -----------------------------------------------------------------------------
+    def touch(self, aName):
+        """
+        Records that the setting aName (and its top-level branch) changed
+        """
+        self._versions[aName.split('.', 1)[0]] = next(self._counter)
+
+    # -----------------------------------------------------------------------------
+    def evaluate(self, aExpr, aSettings):
+        """
+        Evaluates an expression, reusing the previous result if the settings it
+        references have not changed in the meantime
+        """
+        lEntry = self._results.get(aExpr)
+        if lEntry is not None:
+            lValue, lVersions = lEntry
+            if all(self._versions.get(n, 0) == v for n, v in lVersions):
+                self.reused += 1
+                self._results.move_to_end(aExpr)
+                return lValue
+
+        lCode, lNames = self.compile(aExpr)
+        lValue = eval(lCode, None, aSettings)
+        self._store(self._results, aExpr, (lValue, tuple((n, self._versions.get(n, 0)) for n in lNames)))
+        return lValue
+
+    # -----------------------------------------------------------------------------
+    def __str__(self):
+        return f'expressions: {self.hits} hits, {self.misses} misses, {self.reused} conditionals reused'
+
+
 # -----------------------------------------------------------------------------
 def _copy_update_command(aCmd, aFilePath, aPkg, aCmp):
     """
     Utility function to update parsed commands
     """
-    cmd = copy.deepcopy(aCmd)
-    cmd.filepath = aFilePath
-    cmd.package = aPkg
-    cmd.component = aCmp
-    return cmd
+    return aCmd.clone(aFilePath, aPkg, aCmp)
+
+
+# Dep file entry referencing a file. line is the index of the line in the dep file
+DepReference = namedtuple('DepReference', ['depfile', 'line', 'command'])
 
 
 # -----------------------------------------------------------------------------
@@ -52,6 +153,15 @@ class DepFile(object):
         self.path = aPath
         self.parent = aParent
         self.entries = list()
+        # line index of each entry in the dep file
+        self.lines = list()
+        # modification time and size of the file when parsed
+        self.stamp = None
+        # path expressions globbed while resolving the entries
+        self.globexprs = list()
+        # state of the settings when entering and leaving the file
+        self.settings_in = None
+        self.settings_out = None
 
         self.errors = list()
         self.unresolved = list()
@@ -121,11 +231,62 @@ class State(object):
 # -----------------------------------------------------------------------------
 
 
+# -----------------------------------------------------------------------------
+class _CommandStream(object):
+    """Utility class that de-duplicates the commands resolved by the parser
+    and queues them for DepFileParser.iterparse"""
+
+    # End of stream marker
+    kDone = object()
+
+    def __init__(self):
+        super().__init__()
+        self.queue = queue.Queue()
+        self._seen = {c: set() for c in dep_command_types}
+        # sources which library may be set by the package defaults
+        self._held = []
+
+    def push(self, aCmds):
+        for c in aCmds:
+            if isinstance(c, SrcCommand) and c.lib is None:
+                self._held.append(c)
+            else:
+                self._put(c)
+
+    def finish(self, aLibMap):
+        for c in self._held:
+            lLib = aLibMap.get(c.package, None) if aLibMap is not None else None
+            if c.lib is None and lLib is not None:
+                # The parsed commands are left untouched
+                c = c.clone(c.filepath, c.package, c.component)
+                c.lib = lLib
+            self._put(c)
+        self._held = []
+        self.queue.put(self.kDone)
+
+    def _put(self, aCmd):
+        lSeen = self._seen[aCmd.cmd]
+        if aCmd in lSeen:
+            return
+        lSeen.add(aCmd)
+        self.queue.put(aCmd)
+
+
 # -----------------------------------------------------------------------------
 class DepFileParser(object):
     """
     Dependency file parser class
     """
+
+    # Number of threads reading files ahead of the parser, 0 to disable
+    prefetch_workers = 8
+
+    # Splits dep command lines in tokens
+    _tokenize = staticmethod(split_line)
+
+    # Drops comments and pre-tokenizes the lines of a dep file
+    _preprocess = staticmethod(tokenize_depfile)
+
     # -----------------------------------------------------------------------------
     @staticmethod
     def forward_parsing(aDepFileName):
@@ -141,8 +302,9 @@ class DepFileParser(object):
 
     @staticmethod
     def repo_settings_to_defaults(repo_settings):
+        from ..utils.settings import get_validator
 
-        vtor = cerberus.Validator(repo_defaults_schema)
+        vtor = get_validator(repo_defaults_schema)
         errors = {}
 
         pkg_defaults = {}
@@ -185,6 +347,22 @@ class DepFileParser(object):
         self._state = None
         # list of all known depfiles
         self._depregistry = OrderedDict()
+        # depfiles from a previous parsing that can be reused
+        self._previous = dict()
+        # snapshot of the settings, reset when settings are modified
+        self._settingsSnapshot = None
+        # src commands which library was set by _apply_defaults
+        self._defaulted = list()
+        # compiled expressions and conditional results
+        self.exprcache = ExprCache()
+        # background reader of dep files and directories, while parsing
+        self._prefetcher = None
+        # resolved commands queue, while iterparse is running
+        self._stream = None
+        # pre-processed dep files shared across parsers, optional
+        self.astcache = None
+        # id of the dep tree cache entry the results were stored in or restored from
+        self.cacheid = None
 
         # Results
         self.depfile = None
@@ -196,6 +374,10 @@ class DepFileParser(object):
 
         self.unresolved = list()
         self.errors = list()
+        # unresolved paths, packages, components and files
+        self._unresolvedIndex = None
+        # resolved file path -> referencing entries
+        self._referenceIndex = None
 
         # --------------------------------------------------------------
         self.pkg_defaults = self.repo_settings_to_defaults(aRepoSettings)
@@ -203,6 +385,7 @@ class DepFileParser(object):
         # --------------------------------------------------------------
         # Set the toolset
         self.settings['toolset'] = self._toolset
+        self.exprcache.touch('toolset')
 
         # --------------------------------------------------------------
         # Set up the parser
@@ -211,47 +394,35 @@ class DepFileParser(object):
     # -----------------------------------------------------------------------------
 
     # -----------------------------------------------------------------------------
-    @property
-    def unresolved_paths(self):
-        lNotFound = set()
-
-        for lPathExpr, aCmd, lPackage, lComponent, lDepFilePath, lDepPackage, lDepComponent in self.unresolved:
-            lNotFound.add(lPathExpr)
-
-        return lNotFound
-    # -----------------------------------------------------------------------------
-
-    # -------------------------------------------------------------------------
-    @property
-    def unresolved_packages(self):
-        lNotFound = set()
-
-        for lPathExpr, lCmd, lPackage, lComponent, lDepPackage, lDepComponent, lDepFilePath in self.unresolved:
-            if os.path.exists(self._pathMaker.getPath(lPackage)):
-                continue
+    def _index_unresolved(self):
+        """
+        Builds the indexes of the unresolved entries, in a single pass
 
-            lNotFound.add(lPackage)
-        return lNotFound
+        The existence of packages and components is checked once per path.
+        """
+        lPaths = set()
+        lPackages = set()
+        lComponents = OrderedDict()
+        lFiles = OrderedDict()
+        lExists = {}
 
-    # -------------------------------------------------------------------------
-    @property
-    def unresolved_components(self):
-        lNotFound = OrderedDict()
+        def exists_memo(aPath):
+            try:
+                return lExists[aPath]
+            except KeyError:
+                lExists[aPath] = os.path.exists(aPath)
+                return lExists[aPath]
 
         for lPathExpr, lCmd, lPackage, lComponent, lDepPackage, lDepComponent, lDepFilePath in self.unresolved:
-            if os.path.exists(self._pathMaker.getPath(lPackage, lComponent)):
-                continue
+            lPaths.add(lPathExpr)
 
-            lNotFound.setdefault(lPackage, set()).add(lComponent)
+            if not exists_memo(self._pathMaker.getPath(lPackage)):
+                lPackages.add(lPackage)
 
-        return lNotFound
+            if not exists_memo(self._pathMaker.getPath(lPackage, lComponent)):
+                lComponents.setdefault(lPackage, set()).add(lComponent)
 
-    # -----------------------------------------------------------------------------
-    @property
-    def unresolved_files(self):
-        lNotFound = OrderedDict()
-        for lPathExpr, lCmd, lPackage, lComponent, lDepPackage, lDepComponent, lDepFilePath in self.unresolved:
-            lNotFound.setdefault(
+            lFiles.setdefault(
                 lPackage,
                 OrderedDict()
             ).setdefault(
@@ -262,31 +433,90 @@ class DepFileParser(object):
                 set()
             ).add(lDepFilePath)
 
-        return lNotFound
+        self._unresolvedIndex = (id(self.unresolved), len(self.unresolved)), (lPaths, lPackages, lComponents, lFiles)
+
+    # -----------------------------------------------------------------------------
+    def _get_unresolved_index(self, i):
+        # Rebuild if the list of unresolved entries was changed or replaced since
+        if self._unresolvedIndex is None or self._unresolvedIndex[0] != (id(self.unresolved), len(self.unresolved)):
+            self._index_unresolved()
+        return self._unresolvedIndex[1][i]
+
+    # -----------------------------------------------------------------------------
+    def _index_depfile(self, aDepFile):
+        """
+        Adds the entries of a dep file to the reverse index of the dep tree,
+        from the resolved file paths to the dep file entries referencing them
+        """
+        lIndex = self._referenceIndex[1]
+        for lCmd, lLineNr in zip(aDepFile.entries, aDepFile.lines):
+            lIndex.setdefault(lCmd.filepath, []).append(DepReference(aDepFile, lLineNr, lCmd))
+
+    # -----------------------------------------------------------------------------
+    def _index_references(self):
+        """
+        Builds the reverse index of the whole dep tree, e.g. once restored from a cache
+        """
+        self._referenceIndex = None, {}
+        for f in self._depregistry.values():
+            self._index_depfile(f)
+
+        self._referenceIndex = (id(self._depregistry), len(self._depregistry)), self._referenceIndex[1]
+
+    # -----------------------------------------------------------------------------
+    def referrers(self, aPath):
+        """
+        Returns the dep file entries referencing a file
+
+        The reverse index is built while parsing, lookups take constant time.
+
+        Args:
+            aPath (str): Absolute, normalised path of a source, dep or any other file
+
+        Returns:
+            list: DepReference tuples, empty if the file is not part of the dep tree
+        """
+        # Rebuild if the dep file registry was changed or replaced since, e.g. by a failed parsing
+        if self._referenceIndex is None or self._referenceIndex[0] != (id(self._depregistry), len(self._depregistry)):
+            self._index_references()
+        return self._referenceIndex[1].get(aPath, [])
+
+    # -----------------------------------------------------------------------------
+    @staticmethod
+    def include_chain(aDepFile):
+        """
+        Returns the dep files through which aDepFile is included, from the top dep file down to aDepFile
+        """
+        lChain = []
+        while aDepFile is not None:
+            lChain.append(aDepFile)
+            aDepFile = aDepFile.parent
+        lChain.reverse()
+        return lChain
+
+    # -----------------------------------------------------------------------------
+    @property
+    def unresolved_paths(self):
+        return self._get_unresolved_index(0)
 
     # -------------------------------------------------------------------------
-    def _line_drop_Comments(self, aLine: str, aInfo: DepInfo):
-        '''Drop blank lines and comments
-        '''
-        lLine = aLine.strip()
+    @property
+    def unresolved_packages(self):
+        return self._get_unresolved_index(1)
 
-        # Ignore blank lines and comments
-        if lLine != "" and lLine[0] != "#":
-            # Return None (i.e. continue)
-            return lLine
+    # -------------------------------------------------------------------------
+    @property
+    def unresolved_components(self):
+        return self._get_unresolved_index(2)
 
-        # Return None (i.e. continue)
-        return
+    # -----------------------------------------------------------------------------
+    @property
+    def unresolved_files(self):
+        return self._get_unresolved_index(3)
 
     # -------------------------------------------------------------------------
     def _line_process_assignments(self, aLine: str, aInfo: DepInfo):
         # Process the assignment directive
-        
-        pattern = re.compile(r'^([a-zA-Z][a-zA-Z0-9_]*(?:\.[a-zA-Z][a-zA-Z0-9_]*)*)?\s*=\s*(.*)$')
-        # group 1: settings name
-        # group 2: invalid setting name
-        # group 3: rest of the line
-        pattern = re.compile(r'^(?:([a-zA-Z][a-zA-Z0-9_]*(?:\.[a-zA-Z][a-zA-Z0-9_]*)*)|([^=\n\s]*))\s*=\s*(.*)?$')
 
         if aLine[0] != "@":
             return aLine
@@ -294,7 +524,7 @@ class DepFileParser(object):
         lLine = aLine[1:].strip()
 
         # Validate assignment structure
-        m = pattern.match(aLine[1:].strip())
+        m = _kAssignmentPattern.match(lLine)
 
         if m is None:
             raise DepAssignmentError(f"Assignment expression does not have the key = value form '{lLine}'")
@@ -315,12 +545,14 @@ class DepFileParser(object):
             self.settings.lock(True)
             try:
                 # exec(aLine[1:], None, self.settings)
-                x = eval(lExpr, None, self.settings)
+                x = eval(self.exprcache.compile(lExpr)[0], None, self.settings)
             except Exception as lExc:
                 cprint(lExc)
                 raise DepLineError("VariableAssignmentError") from lExc
             self.settings.lock(lOldLock)
             self.settings[lPar] = x
+            self.exprcache.touch(lPar)
+            self._settingsSnapshot = None
 
         if self._verbosity > 1:
             print(self._state.tab, ':', aLine)
@@ -341,11 +573,14 @@ class DepFileParser(object):
             )
 
         try:
-            lExprValue = eval(
-                aLine[lTokens[0] + 1: lTokens[1]], None, self.settings
+            lExprValue = self.exprcache.evaluate(
+                aLine[lTokens[0] + 1: lTokens[1]], self.settings
             )
         except Exception as lExc:
             raise DepLineError("Parsing directive failed") from lExc
+        finally:
+            # Unknown settings are autovivified by the evaluation
+            self._settingsSnapshot = None
 
         if not isinstance(lExprValue, bool):
             raise DepLineError("Directive does not evaluate to boolean type in {0}".format(lExprValue))
@@ -380,10 +615,11 @@ class DepFileParser(object):
         # or not
         if (not aParsedCmd.filepath):
             lComponentName = lComponent.split(sep)[-1]
+            lFileExprs = self._pathMaker.getDefNames(aParsedCmd.cmd, lComponentName)
 
             f, u = self._pathMaker.globall(
                 lPackage, lComponent, aParsedCmd.cmd, 
-                self._pathMaker.getDefNames(aParsedCmd.cmd, lComponentName),
+                lFileExprs,
                 cd=aParsedCmd.cd
             )
 
@@ -400,12 +636,17 @@ class DepFileParser(object):
                     )
                 ]
         else:
+            lFileExprs = aParsedCmd.filepath
             lFileLists, lUnmatchedExprs = self._pathMaker.globall(
                 lPackage, lComponent, aParsedCmd.cmd, 
-                aParsedCmd.filepath,
+                lFileExprs,
                 cd=aParsedCmd.cd
             )
 
+        # Keep track of the expressions, their expansion depends on the directory content
+        for lExpr in lFileExprs:
+            aParentDep.globexprs.append(self._pathMaker.getPath(lPackage, lComponent, aParsedCmd.cmd, lExpr, cd=aParsedCmd.cd))
+
         lEntries = list()
 
         # --------------------------------------------------------------
@@ -428,6 +669,98 @@ class DepFileParser(object):
         return lEntries, (lUnmatchedExprs, lPackage, lComponent)
         # --------------------------------------------------------------
 
+    # -------------------------------------------------------------------------
+    def _settings_snapshot(self):
+        """
+        Returns a comparable snapshot of the current settings
+        """
+        if self._settingsSnapshot is None:
+            self._settingsSnapshot = (tuple(self.settings), tuple(self.settings.leaves()))
+        return self._settingsSnapshot
+
+    # -------------------------------------------------------------------------
+    def _reuse_file(self, aDepFile, aParentDep):
+        """
+        Attempts to reuse a depfile from a previous parsing, together with the
+        sub-tree it owns.
+
+        Reuse is only possible if the settings are the same as when the
+        depfile was originally parsed and the sub-tree is not linked to
+        depfiles first included elsewhere.
+        """
+        if aDepFile.settings_in != self._settings_snapshot():
+            return False
+
+        # Collect the owned sub-tree, in parsing order
+        lOwned = []
+        lSeen = set()
+        lStack = [aDepFile]
+        while lStack:
+            f = lStack.pop()
+            if id(f) in lSeen:
+                continue
+            lSeen.add(id(f))
+
+            if self._previous.get(f.path) is not f or f.path in self._depregistry:
+                return False
+            if any(c.parent is not f for c in f.children):
+                return False
+
+            lOwned.append(f)
+            lStack.extend(reversed(f.children))
+
+        if self._verbosity > 1:
+            print(self._state.tab, 'Reusing', aDepFile.path, f'({len(lOwned)} depfiles)')
+
+        aDepFile.parent = aParentDep
+        for f in lOwned:
+            self._depregistry[f.path] = f
+            self._index_depfile(f)
+
+        # Replay the changes to the settings
+        lKnown = set(self.settings)
+        lKeys, lLeaves = aDepFile.settings_out
+        lLeaves = dict(lLeaves)
+        for k in lKeys:
+            if k in lKnown:
+                continue
+            if k in lLeaves:
+                self.settings[k] = lLeaves[k]
+            else:
+                # Autovivify the branch
+                self.settings[k]
+            self.exprcache.touch(k)
+        self._settingsSnapshot = None
+
+        return True
+
+    # -------------------------------------------------------------------------
+    def _read_file(self, aDepFilePath):
+        return read_depfile(aDepFilePath)
+
+    # -------------------------------------------------------------------------
+    def _load(self, aDepFilePath):
+        """
+        Returns the pre-processed lines of a dep file and its stamp, from the
+        ast cache if available. Called by the prefetcher threads.
+        """
+        if self.astcache is None:
+            lLines, lStamp = self._read_file(aDepFilePath)
+            return self._preprocess(lLines, False), lStamp
+
+        lCached = self.astcache.get(aDepFilePath)
+        if lCached is not None:
+            return lCached
+
+        lLines, lStamp = self._read_file(aDepFilePath)
+        return self.astcache.add(aDepFilePath, lStamp, lLines, self._preprocess), lStamp
+
+    # -------------------------------------------------------------------------
+    def _load_file(self, aPackage, aComponent, aDepFilePath):
+        if self._prefetcher is not None:
+            return self._prefetcher.get(aPackage, aComponent, aDepFilePath)
+        return self._load(aDepFilePath)
+
     # -------------------------------------------------------------------------
     def _parse_file(self, aPackage, aComponent, aDepFileName, aParentDep):
         """
@@ -446,84 +779,103 @@ class DepFileParser(object):
         if lDepFilePath in self._depregistry:
             return self._depregistry[lDepFilePath]
 
+        lPrevious = self._previous.get(lDepFilePath)
+        if lPrevious is not None and self._reuse_file(lPrevious, aParentDep):
+            if self._stream is not None:
+                self._stream.push(lPrevious.itercmd())
+            return lPrevious
+
         if self._verbosity > 1:
             print('>' * self._state.depth, 'Parsing',
                   aPackage, aComponent, aDepFileName)
 
-        # This shouldn't be needed, case already covered elsewhere
-        if not exists(lDepFilePath):
+        try:
+            lLines, lStamp = self._load_file(aPackage, aComponent, lDepFilePath)
+        except OSError:
+            if exists(lDepFilePath):
+                raise
+            # This shouldn't be needed, case already covered elsewhere
             self.unresolved.append(
                 (lDepFilePath, 'include', aPackage, aComponent, '__top__', '__top__', '__top__'))
-            raise OSError("File " + lDepFilePath + " does not exist")
+            raise OSError("File " + lDepFilePath + " does not exist") from None
 
         # Ok, this is a new file. Let's dig in
         self._state.depth += 1
 
         lCurrentFile = DepFile(aPackage, aComponent, aDepFileName, lDepFilePath, aParentDep)
+        lCurrentFile.settings_in = self._settings_snapshot()
         self._depregistry[lDepFilePath] = lCurrentFile
 
-        with open(lDepFilePath) as lDepFile:
-            for lLineNr, lLine in enumerate(lDepFile):
+        lCurrentFile.stamp = lStamp
+        # Comments are already dropped
+        for lLineNr, lLine, lTokens in lLines:
 
-                lDepInfo = (lCurrentFile.full_path(), lLineNr)
+            lDepInfo = (lCurrentFile.full_path(), lLineNr)
 
-                # --------------------------------------------------------------
-                # Pre-processing
-                try:
-                    # Sanitize/drop comments
-                    lLine = self._line_drop_Comments(lLine, lDepInfo)
-                    if not lLine:
-                        continue
-
-                    # Process variable assignment directives
-                    lLine = self._line_process_assignments(lLine, lDepInfo)
-                    if not lLine:
-                        continue
-
-                    # Process conditional directives
-                    lLine = self._line_process_conditional(lLine, lDepInfo)
-                    if not lLine:
-                        continue
-
-                    # Replace variables
-                    lLine = self._line_replace_vars(lLine, lDepInfo)
-
-                except DepLineError as lExc:
-                    lCurrentFile.errors.append((aPackage, aComponent, aDepFileName, lDepFilePath, lLineNr, lLine, lExc))
+            # --------------------------------------------------------------
+            # Pre-processing
+            try:
+                # Process variable assignment directives
+                lLine = self._line_process_assignments(lLine, lDepInfo)
+                if not lLine:
                     continue
 
-                # --------------------------------------------------------------
-                # Parse the line using arg_parse
-                try:
-                    lParsedCmd = self.cmdparser.parse_line(shlex.split(lLine), current_package=aPackage, current_component=aComponent)
-                except DepCmdParserError as lExc:
-                    lCurrentFile.errors.append((aPackage, aComponent, aDepFileName, lDepFilePath, lLineNr, lLine, lExc))
-                    continue
-                except Exception as lExc:
-                    lCurrentFile.errors.append((aPackage, aComponent, aDepFileName, lDepFilePath, lLineNr, lLine, lExc))
+                # Process conditional directives
+                lLine = self._line_process_conditional(lLine, lDepInfo)
+                if not lLine:
                     continue
 
-                if self._verbosity > 1:
-                    print(self._state.tab, '- Parsed line', vars(lParsedCmd))
+                # Replace variables, unless the line was pre-tokenized as not using any
+                if lTokens is None:
+                    lLine = self._line_replace_vars(lLine, lDepInfo)
 
-                # --------------------------------------------------------------
-                lEntries, (lUnresolvedExpr, lParsedPackage, lParsedComponent) = self._resolve_paths(lParsedCmd, lDepFilePath, lCurrentFile)
-                lCurrentFile.entries += lEntries
-                if lParsedCmd.cmd == 'include':
-                    for inc in lEntries:
-                        lCurrentFile.children.append(inc.depfile)
-
-                # Log unresolved entries
-                lCurrentFile.unresolved += [
-                    (lExpr, lParsedCmd.cmd, lParsedPackage, lParsedComponent, aPackage, aComponent, lDepFilePath)
-                    for lExpr in lUnresolvedExpr
-                ]
+            except DepLineError as lExc:
+                lCurrentFile.errors.append((aPackage, aComponent, aDepFileName, lDepFilePath, lLineNr, lLine, lExc))
+                continue
+
+            # --------------------------------------------------------------
+            # Parse the line using arg_parse
+            try:
+                lParsedCmd = self.cmdparser.parse_line(
+                    list(lTokens) if lTokens is not None else self._tokenize(lLine),
+                    current_package=aPackage,
+                    current_component=aComponent,
+                )
+            except DepCmdParserError as lExc:
+                lCurrentFile.errors.append((aPackage, aComponent, aDepFileName, lDepFilePath, lLineNr, lLine, lExc))
+                continue
+            except Exception as lExc:
+                lCurrentFile.errors.append((aPackage, aComponent, aDepFileName, lDepFilePath, lLineNr, lLine, lExc))
+                continue
+
+            if self._verbosity > 1:
+                print(self._state.tab, '- Parsed line', lParsedCmd)
+
+            # --------------------------------------------------------------
+            lEntries, (lUnresolvedExpr, lParsedPackage, lParsedComponent) = self._resolve_paths(lParsedCmd, lDepFilePath, lCurrentFile)
+            lCurrentFile.entries += lEntries
+            lCurrentFile.lines += [lLineNr] * len(lEntries)
+            if lParsedCmd.cmd == 'include':
+                for inc in lEntries:
+                    lCurrentFile.children.append(inc.depfile)
+            elif self._stream is not None:
+                self._stream.push(lEntries)
 
-                if self._verbosity > 1:
-                    print(self._state.tab, '  -- Entries of', aDepFileName, ':', lEntries)
+            # Log unresolved entries
+            lCurrentFile.unresolved += [
+                (lExpr, lParsedCmd.cmd, lParsedPackage, lParsedComponent, aPackage, aComponent, lDepFilePath)
+                for lExpr in lUnresolvedExpr
+            ]
+
+            if self._verbosity > 1:
+                print(self._state.tab, '  -- Entries of', aDepFileName, ':', lEntries)
 
         if not self.forward_parsing(aDepFileName):
             lCurrentFile.entries.reverse()
+            lCurrentFile.lines.reverse()
+        self._index_depfile(lCurrentFile)
+
+        lCurrentFile.settings_out = self._settings_snapshot()
 
         if self._verbosity > 1:
             print(self._state.tab, lCurrentFile)
@@ -559,6 +911,8 @@ class DepFileParser(object):
             self.errors.extend(f.errors)
             self.unresolved.extend(f.unresolved)
 
+        self._index_unresolved()
+
     # -------------------------------------------------------------------------
     def _remove_duplicates(self):
         """
@@ -585,19 +939,49 @@ class DepFileParser(object):
             for c in cmds:
                 if isinstance(c, SrcCommand) and c.lib is None and not pkg_lib_map is None:
                         c.lib = pkg_lib_map.get(c.package, None)
+                        self._defaulted.append(c)
 
   
     # -------------------------------------------------------------------------
-    def parse(self, aPackage, aComponent, aDepFileName):
+    def parse(self, aPackage, aComponent, aDepFileName, aPrevious=None):
+        """
+        Parses the dependency tree starting from a top dep file
+
+        Args:
+            aPackage (str): Top package
+            aComponent (str): Top component
+            aDepFileName (str): Top dep file name
+            aPrevious (dict, optional): Unchanged depfiles from a previous parsing, indexed by path.
+                Their sub-trees are reused where possible instead of being parsed again.
+        """
 
         # TODO: create a reset method
         self._state = State()
+        self._previous = aPrevious if aPrevious is not None else {}
+        self.exprcache.reset_stats()
+        # Directories may have changed since the last parsing
+        self._pathMaker.resetIndex()
+        # Filled in as the dep files are parsed
+        self._referenceIndex = None, {}
+
+        if self.prefetch_workers > 0:
+            self._prefetcher = DepFilePrefetcher(self._pathMaker, self.cmdparser, self._load, self.prefetch_workers)
+            self._prefetcher.request(aPackage, aComponent, self._pathMaker.getPath(aPackage, aComponent, 'include', aDepFileName))
 
         # Do the parsing here
-        self.depfile = self._parse_file(aPackage, aComponent, aDepFileName, None)
+        try:
+            self.depfile = self._parse_file(aPackage, aComponent, aDepFileName, None)
+        finally:
+            self._previous = {}
+            if self._prefetcher is not None:
+                self._prefetcher.close()
+                self._prefetcher = None
 
         # Lock the config variables tree
         self.settings.lock(True)
+
+        self._referenceIndex = (id(self._depregistry), len(self._depregistry)), self._referenceIndex[1]
+
         # --------------------------------------------------------------
         # If we are exiting the top-level, uniquify the commands list, keeping
         # the order as defined in Dave's origianl voodoo
@@ -617,6 +1001,52 @@ class DepFileParser(object):
         # Apply default settings
         self._apply_defaults()
 
+        if self._stream is not None:
+            self._stream.finish(self.settings.get('package_to_lib_mapping', None))
+
+        if self._verbosity > 0:
+            print(self.exprcache)
+
+    # -------------------------------------------------------------------------
+    def iterparse(self, aPackage, aComponent, aDepFileName, aPrevious=None):
+        """
+        Parses the dependency tree, yielding the resolved commands as parsing progresses.
+
+        Commands are yielded once, in the order they are resolved, dep file
+        by dep file, and not in the final order of `commands`. Sources without
+        a library are held back until the package defaults are applied, at the
+        end of the parsing.
+
+        Once the iteration is over, the parser is in the same state as after parse().
+        """
+        lStream = _CommandStream()
+        lErrors = []
+
+        def producer():
+            self._stream = lStream
+            try:
+                self.parse(aPackage, aComponent, aDepFileName, aPrevious)
+            except BaseException as lExc:
+                lErrors.append(lExc)
+                lStream.queue.put(lStream.kDone)
+            finally:
+                self._stream = None
+
+        lThread = threading.Thread(target=producer, name='iterparse', daemon=True)
+        lThread.start()
+        try:
+            while True:
+                lCmd = lStream.queue.get()
+                if lCmd is lStream.kDone:
+                    break
+                yield lCmd
+        finally:
+            lThread.join()
+
+        if lErrors:
+            raise lErrors[0]
+
+
 
 
         # --------------------------------------------------------------
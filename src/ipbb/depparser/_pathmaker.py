@@ -1,4 +1,10 @@
 import os
+import glob
+import fnmatch
+import threading
+import collections
+
+from concurrent.futures import CancelledError
 
 # --------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
@@ -29,11 +35,185 @@ class Pathmaker(object):
     def __init__(self, rootdir, verbosity=0):
         self._rootdir = rootdir
         self._verbosity = verbosity
+        self._lock = threading.Lock()
+        # filesystem calls issued to resolve paths, by kind
+        self.fscalls = collections.Counter()
+
+        self.resetIndex()
 
         if self._verbosity > 3:
             print("+++ Pathmaker init", rootdir)
     # --------------------------------------------------------------
 
+    # --------------------------------------------------------------
+    def resetIndex(self):
+        """
+        Drops the directory listings and the expansions cached so far
+        """
+        # directory listings, as name -> isdir dictionaries (None if not a directory)
+        self._dirindex = {}
+        # expansion of path expressions, including those without matches
+        self._globcache = {}
+        # directories listed to expand each path expression
+        self._globdirs = {}
+        self._listed = None
+        # directory listings being read in the background
+        self._pending = {}
+    # --------------------------------------------------------------
+
+    # --------------------------------------------------------------
+    def prefetch(self, dirnames, executor):
+        """
+        Lists directories in the background, ahead of their use
+
+        Args:
+            dirnames (list): Directories to list
+            executor (concurrent.futures.Executor): Executor running the listings
+        """
+        with self._lock:
+            for d in dirnames:
+                if d in self._dirindex or d in self._pending:
+                    continue
+                self._pending[d] = executor.submit(self._readdir, d)
+    # --------------------------------------------------------------
+
+    # --------------------------------------------------------------
+    @staticmethod
+    def _readdir(dirname):
+        lEntries = {}
+        try:
+            with os.scandir(dirname or os.curdir) as it:
+                for entry in it:
+                    try:
+                        lEntries[entry.name] = entry.is_dir()
+                    except OSError:
+                        lEntries[entry.name] = False
+        except OSError:
+            lEntries = None
+        return lEntries
+
+    def _scandir(self, dirname):
+        if self._listed is not None:
+            self._listed.add(dirname)
+
+        try:
+            return self._dirindex[dirname]
+        except KeyError:
+            pass
+
+        with self._lock:
+            lFuture = self._pending.pop(dirname, None)
+
+        try:
+            lEntries = lFuture.result() if lFuture is not None else self._readdir(dirname)
+        except CancelledError:
+            lEntries = self._readdir(dirname)
+
+        self.fscalls['listdir'] += 1
+        self._dirindex[dirname] = lEntries
+        return lEntries
+
+    def _lexists(self, path):
+        lDirName, lName = os.path.split(path)
+        if lName in ('', os.curdir, os.pardir):
+            self.fscalls['stat'] += 1
+            return os.path.lexists(path)
+        lEntries = self._scandir(lDirName)
+        return lEntries is not None and lName in lEntries
+
+    def _isdir(self, path):
+        lDirName, lName = os.path.split(path)
+        if lName in ('', os.curdir, os.pardir):
+            self.fscalls['stat'] += 1
+            return os.path.isdir(path)
+        lEntries = self._scandir(lDirName)
+        return lEntries is not None and lEntries.get(lName, False)
+
+    def _listdir(self, dirname, dironly):
+        lEntries = self._scandir(dirname)
+        if not lEntries:
+            return []
+        return [n for n, d in lEntries.items() if d] if dironly else list(lEntries)
+
+    # The following mirror glob's internals, with recursive '**' enabled
+    def _glob0(self, dirname, basename, dironly):
+        if basename:
+            if self._lexists(os.path.join(dirname, basename)):
+                return [basename]
+        elif self._isdir(dirname):
+            return [basename]
+        return []
+
+    def _glob1(self, dirname, pattern, dironly):
+        lNames = self._listdir(dirname, dironly)
+        if pattern[0] != '.':
+            lNames = [n for n in lNames if n[0] != '.']
+        return fnmatch.filter(lNames, pattern)
+
+    def _glob2(self, dirname, pattern, dironly):
+        yield pattern[:0]
+        yield from self._rlistdir(dirname, dironly)
+
+    def _rlistdir(self, dirname, dironly):
+        lEntries = self._scandir(dirname)
+        if not lEntries:
+            return
+        for n, d in lEntries.items():
+            if n[0] == '.' or (dironly and not d):
+                continue
+            yield n
+            if d:
+                for m in self._rlistdir(os.path.join(dirname, n), dironly):
+                    yield os.path.join(n, m)
+
+    def _iglob(self, pathname, dironly):
+        dirname, basename = os.path.split(pathname)
+        if not glob.has_magic(pathname):
+            if basename:
+                if self._lexists(pathname):
+                    yield pathname
+            elif self._isdir(dirname):
+                yield pathname
+            return
+
+        if dirname != pathname and glob.has_magic(dirname):
+            dirs = self._iglob(dirname, True)
+        else:
+            dirs = [dirname]
+
+        if basename == '**':
+            glob_in_dir = self._glob2
+        elif glob.has_magic(basename):
+            glob_in_dir = self._glob1
+        else:
+            glob_in_dir = self._glob0
+
+        for d in dirs:
+            for name in glob_in_dir(d, basename, dironly):
+                yield os.path.join(d, name)
+
+    # --------------------------------------------------------------
+    def expand(self, pathexpr):
+        """
+        Expands a path expression like glob.glob(pathexpr, recursive=True),
+        using the cached directory listings.
+        """
+        try:
+            return self._globcache[pathexpr]
+        except KeyError:
+            pass
+
+        self._listed = set()
+        try:
+            lPaths = [p for p in self._iglob(pathexpr, False) if p]
+            self._globdirs[pathexpr] = tuple(self._listed)
+        finally:
+            self._listed = None
+
+        self._globcache[pathexpr] = lPaths
+        return lPaths
+    # --------------------------------------------------------------
+
     # --------------------------------------------------------------
     def getPackagePath(self, aPackage):
         return os.path.normpath(os.path.join(self._rootdir, aPackage))
@@ -84,13 +264,11 @@ class Pathmaker(object):
         """
         Returns the complete path expression as well as the list of files matches
         """
-        import glob
-
         lPathExpr = self.getPath(package, component, command, fileexpr, cd=cd)
         lKindPath = self.getPath(package, component, command, cd=cd)
 
         # Expand the expression
-        lFilePaths = glob.glob(lPathExpr)
+        lFilePaths = self.expand(lPathExpr)
 
         # Calculate the relative path and pair it up with the absolute path
         lFileList = [(os.path.relpath(lPath2, lKindPath), lPath2)
@@ -99,6 +277,16 @@ class Pathmaker(object):
         return lPathExpr, lFileList
     # --------------------------------------------------------------
 
+    # --------------------------------------------------------------
+    def globDirs(self, pathexpr):
+        """
+        Returns the directories whose content determines the expansion of a path expression
+        """
+        if pathexpr not in self._globdirs:
+            self.expand(pathexpr)
+        return self._globdirs[pathexpr]
+    # --------------------------------------------------------------
+
     # --------------------------------------------------------------
     def globall(self, package, component, command, fileexprlist, cd=None):
         """Expands a list of file expressions 
@@ -0,0 +1,147 @@
+import os
+import glob
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ._cmdparser import split_line
+
+
+# -----------------------------------------------------------------------------
+def read_depfile(aPath):
+    """
+    Reads a dep file
+
+    Returns:
+        tuple: the lines of the file, and its modification time and size
+    """
+    with open(aPath) as lDepFile:
+        lStat = os.fstat(lDepFile.fileno())
+        return lDepFile.readlines(), (lStat.st_mtime_ns, lStat.st_size)
+
+
+# -----------------------------------------------------------------------------
+class DepFilePrefetcher(object):
+    """
+    Loads dep files and lists directories in a thread pool, ahead of the parser.
+
+    Dep files are loaded by the parser's loader, which returns them
+    pre-processed, from the dep ast cache when unchanged. Each dep file loaded
+    is scanned for the files it includes and the directories its commands
+    refer to, which are fetched in turn. The scan is speculative: lines using
+    settings are skipped, and conditionals are ignored. Only the parser
+    evaluates the dep files, in their original order.
+    """
+
+    # -----------------------------------------------------------------------------
+    def __init__(self, aPathmaker, aCmdParser, aLoader, aWorkers):
+        """
+        Args:
+            aPathmaker (Pathmaker): Path maker of the parser
+            aCmdParser (DepCmdParser): Command parser of the parser
+            aLoader (callable): Returns the pre-processed lines of a dep file and its stamp, given its path
+            aWorkers (int): Number of threads
+        """
+        super().__init__()
+        self._pathMaker = aPathmaker
+        self._cmdparser = aCmdParser
+        self._loader = aLoader
+        self._executor = ThreadPoolExecutor(aWorkers)
+        self._lock = threading.Lock()
+        # dep files read or being read, by path
+        self._files = {}
+        self._seen = set()
+        self._closed = False
+
+    # -----------------------------------------------------------------------------
+    def request(self, aPackage, aComponent, aPath):
+        """
+        Schedules a dep file to be read in the background
+        """
+        with self._lock:
+            if self._closed or aPath in self._seen:
+                return
+            self._seen.add(aPath)
+            self._files[aPath] = self._executor.submit(self._fetch, aPackage, aComponent, aPath)
+
+    # -----------------------------------------------------------------------------
+    def get(self, aPackage, aComponent, aPath):
+        """
+        Returns the pre-processed lines and stamp of a dep file, loading it if not prefetched
+        """
+        with self._lock:
+            self._seen.add(aPath)
+            lFuture = self._files.pop(aPath, None)
+
+        if lFuture is None:
+            return self._fetch(aPackage, aComponent, aPath)
+        return lFuture.result()
+
+    # -----------------------------------------------------------------------------
+    def close(self):
+        with self._lock:
+            self._closed = True
+            for f in self._files.values():
+                f.cancel()
+            self._files.clear()
+        self._executor.shutdown(wait=True)
+
+    # -----------------------------------------------------------------------------
+    def _fetch(self, aPackage, aComponent, aPath):
+        lResult = self._loader(aPath)
+        try:
+            self._discover(aPackage, aComponent, lResult[0])
+        except Exception:
+            # Discovery is only an optimisation
+            pass
+        return lResult
+
+    # -----------------------------------------------------------------------------
+    def _discover(self, aPackage, aComponent, aLines):
+        lDirs = []
+        for _, lLine, lTokens in aLines:
+            if lTokens is None:
+                # Not tokenized in advance, unless cached
+                if lLine[0] == '@' or '$' in lLine:
+                    continue
+
+                if lLine[0] == '?':
+                    lLine = lLine.split('?')
+                    if len(lLine) != 3:
+                        continue
+                    lLine = lLine[2]
+
+                try:
+                    lTokens = split_line(lLine)
+                except ValueError:
+                    continue
+
+            try:
+                lArgs = self._cmdparser._fast_parse(list(lTokens))
+            except ValueError:
+                continue
+            if lArgs is None:
+                continue
+
+            p, c = self._cmdparser.resolve_component(lArgs.component, aPackage, aComponent)
+            lExprs = lArgs.file
+            if not lExprs:
+                if lArgs.cmd not in self._pathMaker.fexts:
+                    continue
+                lExprs = self._pathMaker.getDefNames(lArgs.cmd, c.split(os.sep)[-1])
+
+            for lExpr in lExprs:
+                lPath = self._pathMaker.getPath(p, c, lArgs.cmd, lExpr, cd=lArgs.cd)
+                lDirName = os.path.dirname(lPath)
+                if not glob.has_magic(lDirName):
+                    lDirs.append(lDirName)
+                if lArgs.cmd != 'include' or glob.has_magic(lPath):
+                    continue
+                # Only one of the default names exists, if any
+                if lArgs.file or os.path.exists(lPath):
+                    self.request(p, c, lPath)
+
+        with self._lock:
+            if self._closed:
+                return
+            self._pathMaker.prefetch(lDirs, self._executor)
@@ -0,0 +1,202 @@
+import contextlib
+import json
+import time
+
+from collections import OrderedDict
+
+
+# Line processing stages, in processing order
+kProfileStages = (
+    'read',
+    'preprocess',
+    'assignments',
+    'conditionals',
+    'substitution',
+    'tokenize',
+    'cmdparse',
+    'glob',
+)
+
+
+# -----------------------------------------------------------------------------
+class DepFileProfile(object):
+    """Utility class holding the profiling data of a dep file"""
+    __slots__ = ('path', 'inclusive', 'exclusive', 'fscalls', 'reused')
+
+    def __init__(self, aPath):
+        super().__init__()
+        self.path = aPath
+        # wall time, including and excluding the included files
+        self.inclusive = 0.
+        self.exclusive = 0.
+        # filesystem calls issued while parsing the file, excluding the included files
+        self.fscalls = 0
+        self.reused = False
+
+    def to_dict(self):
+        return OrderedDict((s, getattr(self, s)) for s in self.__slots__)
+
+
+# -----------------------------------------------------------------------------
+class DepParserProfile(object):
+    """
+    Collects timing and call counts of a DepFileParser while parsing
+
+    The parser is instrumented only for the duration of `instrument`, the
+    parsing code is not affected otherwise.
+
+    Usage:
+        lProfile = DepParserProfile()
+        with lProfile.instrument(lParser):
+            lParser.parse(aPackage, aComponent, aDepFileName)
+    """
+
+    # -----------------------------------------------------------------------------
+    def __init__(self):
+        super().__init__()
+        # stage -> [cumulative time, calls]
+        self.stages = OrderedDict((s, [0., 0]) for s in kProfileStages)
+        # depfile path -> DepFileProfile, in parsing order
+        self.files = OrderedDict()
+        # filesystem calls by kind
+        self.fscalls = OrderedDict()
+        self.total = 0.
+        # children time accumulators of the files being parsed
+        self._stack = []
+
+    # -----------------------------------------------------------------------------
+    def _timed(self, aStage, aFunc):
+        lStage = self.stages[aStage]
+        lClock = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            t0 = lClock()
+            try:
+                return aFunc(*args, **kwargs)
+            finally:
+                lStage[0] += lClock() - t0
+                lStage[1] += 1
+        return wrapper
+
+    # -----------------------------------------------------------------------------
+    def _timed_file(self, aParser, aFunc):
+        lClock = time.perf_counter
+        lPathMaker = aParser._pathMaker
+
+        def wrapper(aPackage, aComponent, aDepFileName, aParentDep):
+            lKnown = lPathMaker.getPath(aPackage, aComponent, 'include', aDepFileName) in aParser._depregistry
+            lFsCalls = sum(lPathMaker.fscalls.values())
+            self._stack.append([0., 0])
+            t0 = lClock()
+            try:
+                lDepFile = aFunc(aPackage, aComponent, aDepFileName, aParentDep)
+            finally:
+                lElapsed = lClock() - t0
+                lChildTime, lChildFsCalls = self._stack.pop()
+                lFsCalls = sum(lPathMaker.fscalls.values()) - lFsCalls
+                if self._stack:
+                    self._stack[-1][0] += lElapsed
+                    self._stack[-1][1] += lFsCalls
+
+            if lKnown:
+                # Already parsed elsewhere in the tree
+                return lDepFile
+
+            p = self.files.setdefault(lDepFile.path, DepFileProfile(lDepFile.path))
+            p.reused = aParser._previous.get(lDepFile.path) is lDepFile
+            p.inclusive = lElapsed
+            p.exclusive = lElapsed - lChildTime
+            # Directory listings and stats, plus reading the file itself
+            p.fscalls = lFsCalls - lChildFsCalls + (0 if p.reused else 1)
+            return lDepFile
+        return wrapper
+
+    # -----------------------------------------------------------------------------
+    def instrument(self, aParser):
+        """
+        Returns a context manager instrumenting the parser while active
+        """
+        @contextlib.contextmanager
+        def ctx():
+            lPathMaker = aParser._pathMaker
+            lCmdParser = aParser.cmdparser
+            lPatches = [
+                (aParser, '_read_file', self._timed('read', aParser._read_file)),
+                (aParser, '_preprocess', self._timed('preprocess', aParser._preprocess)),
+                (aParser, '_line_process_assignments', self._timed('assignments', aParser._line_process_assignments)),
+                (aParser, '_line_process_conditional', self._timed('conditionals', aParser._line_process_conditional)),
+                (aParser, '_line_replace_vars', self._timed('substitution', aParser._line_replace_vars)),
+                (aParser, '_tokenize', self._timed('tokenize', aParser._tokenize)),
+                (lCmdParser, 'parse_line', self._timed('cmdparse', lCmdParser.parse_line)),
+                (lPathMaker, 'globall', self._timed('glob', lPathMaker.globall)),
+                (aParser, '_parse_file', self._timed_file(aParser, aParser._parse_file)),
+            ]
+            # Instance attributes shadow the methods of the class
+            for lObj, lName, lWrapper in lPatches:
+                setattr(lObj, lName, lWrapper)
+
+            lFsCalls = lPathMaker.fscalls.copy()
+            t0 = time.perf_counter()
+            try:
+                yield self
+            finally:
+                self.total += time.perf_counter() - t0
+                for lObj, lName, _ in lPatches:
+                    delattr(lObj, lName)
+                for k, v in lPathMaker.fscalls.items():
+                    self.fscalls[k] = self.fscalls.get(k, 0) + v - lFsCalls.get(k, 0)
+                self.fscalls['read'] = self.stages['read'][1]
+
+        return ctx()
+
+    # -----------------------------------------------------------------------------
+    def to_dict(self):
+        return OrderedDict([
+            ('total', self.total),
+            ('stages', OrderedDict((s, {'time': t, 'calls': n}) for s, (t, n) in self.stages.items())),
+            ('fscalls', self.fscalls),
+            ('files', [f.to_dict() for f in self.files.values()]),
+        ])
+
+    # -----------------------------------------------------------------------------
+    def dump(self, aFile):
+        """
+        Writes the profiling data to a file object, in JSON format
+        """
+        json.dump(self.to_dict(), aFile, indent=2)
+
+    # -----------------------------------------------------------------------------
+    def draw_stages(self):
+        """
+        Returns a table of the time spent in each line processing stage
+        """
+        from rich.table import Table
+
+        lTable = Table('stage', 'time (ms)', 'calls', 'per call (us)', title=f'parsing stages (total {self.total*1e3:.1f} ms)', title_justify='left')
+        for s, (t, n) in self.stages.items():
+            lTable.add_row(s, f'{t*1e3:.1f}', str(n), f'{t/n*1e6:.1f}' if n else '-')
+        lTable.add_row('fs calls', '', ', '.join(f'{k}: {v}' for k, v in self.fscalls.items()), '')
+        return lTable
+
+    # -----------------------------------------------------------------------------
+    def draw_files(self, aRootDir=None, aMaxFiles=20):
+        """
+        Returns a table of the dep files taking the longest to parse, exclusive of their children
+        """
+        from rich.table import Table
+        from os.path import relpath
+
+        lFiles = sorted(self.files.values(), key=lambda f: f.exclusive, reverse=True)[:aMaxFiles]
+        lTable = Table(
+            'dep file', 'exclusive (ms)', 'inclusive (ms)', 'fs calls',
+            title=f'slowest dep files ({len(lFiles)} of {len(self.files)})',
+            title_justify='left',
+        )
+        for f in lFiles:
+            lTable.add_row(
+                relpath(f.path, aRootDir) if aRootDir else f.path,
+                f'{f.exclusive*1e3:.1f}',
+                f'{f.inclusive*1e3:.1f}',
+                str(f.fscalls) + (' (reused)' if f.reused else ''),
+            )
+        return lTable
@@ -7,7 +7,6 @@ import textwrap
 
 from string import Template as tmpl
 from ..defaults import kTopEntity
-from ..utils import read_os_release
 from os.path import abspath, join, split, splitext
 
 
@@ -175,26 +174,21 @@ class VivadoProjectGenerator(object):
             cmd_types = ['ip', 'add', 'prop']
             if not set(lSrcCommandGroups.keys()).issubset(cmd_types):
                 raise RuntimeError(f"Command group mismatch {' '.join(lSrcCommandGroups.keys())}")
-            # There seems to be a terminal problem, which mainly
-            # manifests itself on RHEL 8-based systems, that hangs on
-            # long commands. For those platforms we apply a
-            # work-around.
-            os_info = read_os_release()
+            # Unframed consoles send the commands on the terminal line,
+            # where pexpect.sendline() hangs on very long ones: they
+            # report a maxcmdlen, and longer commands are split up.
+            # Framed consoles and scripts have no limit.
+            lMaxLen = getattr(aOutput, 'maxcmdlen', None)
             for t in cmd_types:
                 if t in lSrcCommandGroups:
                     for c, f in lSrcCommandGroups.get(t, {}).items():
                         files = ' '.join(f)
-                        # For some reason, pexpect.sendline() in the
-                        # Vivado console implementation hangs when the
-                        # commands sent are too long. The exact limit
-                        # is not clear, but empiric checks seem to
-                        # indicate that 33k characters is too
-                        # long. Therefore long commands (i.e., longer
-                        # than a somewhat arbitrary length) are split
-                        # up into multiple commands.
-                        MAX_FILES_LEN = 8192
+                        if lMaxLen is None:
+                            write(tmpl(c).substitute(files=files))
+                            continue
+
                         files_split = textwrap.wrap(files,
-                                                    MAX_FILES_LEN,
+                                                    lMaxLen,
                                                     break_long_words=False,
                                                     break_on_hyphens=False)
                         for tmp_files in files_split:
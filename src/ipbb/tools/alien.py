@@ -64,37 +64,116 @@ class AlienDict(dict):
                 value = self[name] = type(self)()
                 return value
 
+# ------------------------------------------------------------------------------
+class _AlienState(object):
+    """
+    State shared by all the branches of a tree: the lock and the flat index
+    of the tree nodes, by dotted key
+    """
+    __slots__ = ('locked', 'index')
+
+    def __init__(self):
+        self.locked = False
+        self.index = {}
+
+
 # ------------------------------------------------------------------------------
 class AlienBranch(object):
     """
     Utility class to easily build trees of key-values, useful for configuration
     tress
+
+    Every node of the tree (leaves and branches) is also stored in a flat
+    index by its dotted key, shared by all the branches of the tree. The index
+    is kept in sync by attribute assignment and autovivification.
     """
     def __init__(self):
         super().__init__()
-        self.__dict__['_locked'] = False
+        self.__dict__['_state'] = _AlienState()
+        self.__dict__['_path'] = ''
 
     def __repr__(self):
         return str({ k: v for k, v in self.__dict__.items() if not k.startswith('_')})
 
+    @property
+    def _locked(self):
+        return self._state.locked
+
+    def _key(self, name):
+        return self._path + '.' + name if self._path else name
+
+    def _adopt(self, aState, aPath):
+        """
+        Moves this branch and its children under another tree
+        """
+        self.__dict__['_state'] = aState
+        self.__dict__['_path'] = aPath
+        for b, o in self.__dict__.items():
+            if b.startswith('_'):
+                continue
+            lKey = aPath + '.' + b
+            aState.index[lKey] = o
+            if isinstance(o, AlienBranch):
+                o._adopt(aState, lKey)
+
+    def _drop(self):
+        """
+        Removes the children of this branch from the index
+        """
+        lIndex = self._state.index
+        for b, o in self.__dict__.items():
+            if b.startswith('_'):
+                continue
+            lIndex.pop(self._key(b), None)
+            if isinstance(o, AlienBranch):
+                o._drop()
+
     def __getattr__(self, name):
+        # Special attributes are never autovivified, and must raise
+        # AttributeError for pickle and copy to work
+        if name.startswith('__'):
+            raise AttributeError(name)
         try:
             return self.__dict__[name]
         except KeyError:
-            if self._locked or name.startswith('__'):
+            if name.startswith('_') or self._locked:
                 raise
             else:
-                value = self.__dict__[name] = type(self)()
+                value = type(self)()
+                self.__setattr__(name, value)
                 return value
 
+    def __getstate__(self):
+        return dict(self.__dict__)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
     def __setattr__(self, name, value):
-        if name not in self.__dict__ and name.startswith('_'):
+        if name.startswith('_'):
             raise AttributeError("Attributes starting with '_' are reserved ")
-        super().__setattr__(name, value)
+
+        lOld = self.__dict__.get(name)
+        if isinstance(lOld, AlienBranch) and lOld is not value:
+            lOld._drop()
+
+        lKey = self._key(name)
+        if isinstance(value, AlienBranch):
+            value._adopt(self._state, lKey)
+        self.__dict__[name] = value
+        self._state.index[lKey] = value
 
     def __getitem__(self, name):
+        try:
+            return self._state.index[self._key(name)]
+        except KeyError:
+            pass
+
         tokens = name.split('.', 1)
-        item = getattr(self, tokens[0])
+        try:
+            item = getattr(self, tokens[0])
+        except AttributeError as lExc:
+            raise KeyError(name) from lExc
         if len(tokens) == 1:
             return item
         else:
@@ -107,6 +186,9 @@ class AlienBranch(object):
         else:
             setattr(self[tokens[0]], tokens[1], value)
 
+    def __contains__(self, name):
+        return self._key(name) in self._state.index
+
     def __iter__(self):
         for b, o in self.__dict__.items():
             if b.startswith('_'):
@@ -148,10 +230,8 @@ class AlienBranch(object):
                 yield b, o
 
     def _lock(self, value):
-        self._locked = value
-        for b, o in self._iterbranches():
-            if isinstance(o, type(self)):
-                o._lock(value)
+        # The lock is shared by the whole tree
+        self._state.locked = value
 
     def _get(self, name, default=None):
         try:
@@ -192,8 +272,14 @@ class AlienTree(object):
     def __iter__(self):
         return self._trunk.__iter__()
 
+    def __contains__(self, name):
+        return name in self._trunk._state.index
+
     def __getitem__(self, name):
-        return self._trunk.__getitem__(name)
+        try:
+            return self._trunk._state.index[name]
+        except KeyError:
+            return self._trunk.__getitem__(name)
 
     def __setitem__(self, name, value):
         return self._trunk.__setitem__(name, value)
@@ -0,0 +1,414 @@
+"""
+Local ipbb server, keeping the state of the work area between commands
+
+The server listens on a unix socket. Each connection carries one request,
+a JSON object on a single line, and its reply, a stream of JSON objects, one
+per line:
+
+    {"op": "run", "argv": [...], "cwd": ..., "env": {...}, "columns": ..., "tty": ...}
+        -> {"out": text}, {"err": text}, ..., {"exit": code}
+    {"op": "status"} -> {"status": {...}}
+    {"op": "stop"} -> {"status": {...}}
+
+This module only depends on the standard library, for the client side to
+start up quickly.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import select
+import signal
+import socket
+import shutil
+import struct
+import threading
+import socketserver
+
+# Disables the forwarding of commands to the server
+kNoDaemonEnvVar = 'IPBB_NO_DAEMON'
+
+
+# ------------------------------------------------------------------------------
+def connect(aSocketPath):
+    """
+    Returns a socket connected to the server, None if no server is listening
+    """
+    lSock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        lSock.connect(aSocketPath)
+    except OSError:
+        lSock.close()
+        return None
+    return lSock
+
+
+# ------------------------------------------------------------------------------
+def request(aSocketPath, aRequest):
+    """
+    Sends a request to the server, yields the messages of the reply
+
+    Raises:
+        ConnectionError: No server listening on aSocketPath
+    """
+    lSock = connect(aSocketPath)
+    if lSock is None:
+        raise ConnectionRefusedError(f"No ipbb daemon listening on {aSocketPath}")
+
+    with lSock, lSock.makefile('rwb') as f:
+        f.write(json.dumps(aRequest).encode() + b'\n')
+        f.flush()
+        for lLine in f:
+            yield json.loads(lLine)
+
+
+# ------------------------------------------------------------------------------
+def forward(aSocketPath, aArgs, aCwd=None, aStdout=None, aStderr=None):
+    """
+    Runs an ipbb command in the server, streaming its output
+
+    Returns:
+        int: Exit code of the command, None if no server is listening
+    """
+    lStdout = aStdout if aStdout is not None else sys.stdout
+    lStderr = aStderr if aStderr is not None else sys.stderr
+    lTty = lStdout.isatty()
+
+    lRequest = {
+        'op': 'run',
+        'argv': list(aArgs),
+        'cwd': aCwd if aCwd is not None else os.getcwd(),
+        'env': dict(os.environ),
+        'columns': shutil.get_terminal_size().columns if lTty else None,
+        'tty': lTty,
+    }
+
+    try:
+        for lMsg in request(aSocketPath, lRequest):
+            if 'out' in lMsg:
+                lStdout.write(lMsg['out'])
+                lStdout.flush()
+            elif 'err' in lMsg:
+                lStderr.write(lMsg['err'])
+                lStderr.flush()
+            elif 'exit' in lMsg:
+                return lMsg['exit']
+    except ConnectionRefusedError:
+        return None
+
+    lStderr.write('ERROR: connection to the ipbb daemon lost\n')
+    return 1
+
+
+# ------------------------------------------------------------------------------
+def find_socket(aSocketName, aDirPath, aWorkAreaFile, aVarDir):
+    """
+    Returns the path of the server socket of the work area including aDirPath, None if not found
+    """
+    lDirPath = aDirPath
+    while True:
+        if os.path.exists(os.path.join(lDirPath, aWorkAreaFile)):
+            lPath = os.path.join(lDirPath, aVarDir, aSocketName)
+            return lPath if os.path.exists(lPath) else None
+
+        lParent = os.path.dirname(lDirPath)
+        if lParent == lDirPath:
+            return None
+        lDirPath = lParent
+
+
+# ------------------------------------------------------------------------------
+class StreamProxy(object):
+    """
+    Stand-in for sys.stdout and sys.stderr, writing to the client of the current request
+
+    Objects binding the standard streams when created (e.g. the output
+    formatters of idle Vivado consoles) then write to the current client.
+    """
+
+    def __init__(self, aName, aFallback):
+        super().__init__()
+        self._name = aName
+        self._fallback = aFallback
+        self._reply = None
+        self._tty = False
+
+    def attach(self, aReply, aTty):
+        self._reply, self._tty = aReply, aTty
+
+    def detach(self):
+        self._reply, self._tty = None, False
+
+    @property
+    def encoding(self):
+        return 'utf-8'
+
+    def write(self, aText):
+        if self._reply is None:
+            return self._fallback.write(aText)
+        self._reply.send({self._name: aText})
+        return len(aText)
+
+    def flush(self):
+        if self._reply is None:
+            self._fallback.flush()
+
+    def isatty(self):
+        return self._tty
+
+    def fileno(self):
+        if self._reply is None:
+            return self._fallback.fileno()
+        # No file descriptor leads to the client: subprocesses given this stream
+        # (e.g. sh's _out and _err) have their output written through write()
+        raise io.UnsupportedOperation('fileno')
+
+
+# ------------------------------------------------------------------------------
+def peer_uid(aSock):
+    """
+    Returns the user id of the process at the other end of a unix socket, None if not available
+    """
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    lCreds = aSock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    _, lUid, _ = struct.unpack('3i', lCreds)
+    return lUid
+
+
+# ------------------------------------------------------------------------------
+class _HangupWatcher(threading.Thread):
+    """
+    Calls a function when the client closes its end of the connection
+
+    Clients send nothing after their request: the connection becomes
+    readable only once closed.
+    """
+
+    def __init__(self, aSock, aOnHangup, aPollInterval=0.2):
+        super().__init__(name='ipbb-hangup-watcher', daemon=True)
+        self._sock = aSock
+        self._onhangup = aOnHangup
+        self._interval = aPollInterval
+        self._lock = threading.Lock()
+        self._done = False
+        self.hungup = False
+
+    def run(self):
+        while True:
+            lReadable, _, _ = select.select([self._sock], [], [], self._interval)
+            with self._lock:
+                if self._done:
+                    return
+                if not lReadable:
+                    continue
+                try:
+                    lClosed = self._sock.recv(1, socket.MSG_PEEK) == b''
+                except OSError:
+                    lClosed = True
+                if not lClosed:
+                    continue
+                self.hungup = True
+                self._onhangup()
+                return
+
+    def stop(self):
+        with self._lock:
+            self._done = True
+
+
+# ------------------------------------------------------------------------------
+class _Reply(object):
+    """
+    Sends the reply messages of a request, ignoring clients gone away
+    """
+
+    def __init__(self, aFile):
+        super().__init__()
+        self._file = aFile
+        self.connected = True
+
+    def send(self, aMsg):
+        if not self.connected:
+            return
+        try:
+            self._file.write(json.dumps(aMsg).encode() + b'\n')
+            self._file.flush()
+        except OSError:
+            # The command keeps running, its output is lost
+            self.connected = False
+
+
+# ------------------------------------------------------------------------------
+class _RequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        try:
+            lRequest = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+
+        lReply = _Reply(self.wfile)
+        lOp = lRequest.get('op')
+        if lOp == 'run':
+            lReply.send({'exit': self.server.run(lRequest, lReply, self.connection)})
+        elif lOp == 'status':
+            lReply.send({'status': self.server.status()})
+        elif lOp == 'stop':
+            self.server.running = False
+            lReply.send({'status': self.server.status()})
+
+
+# ------------------------------------------------------------------------------
+class DaemonServer(socketserver.UnixStreamServer):
+    """
+    Unix socket server running the commands of its clients, one at a time
+
+    Commands are run by a service object, providing:
+        run(args, cwd, columns, tty): runs a command, returns its exit code
+        abort(): called when the client of the running command has gone away
+        status(): dictionary describing the state of the service
+        close(): releases the resources held by the service
+    The command runs in the client working directory and environment, with
+    the standard output and error streamed to the client. It is interrupted,
+    as by Ctrl-C, if the client goes away.
+
+    Only the user running the server can connect to it: the socket is
+    created readable and writable by its owner only, and connections from
+    other users are rejected.
+    """
+
+    # ------------------------------------------------------------------------------
+    def __init__(self, aSocketPath, aService, aIdleTimeout=None):
+        """
+        Args:
+            aSocketPath (str): Path of the socket
+            aService (object): Service running the commands
+            aIdleTimeout (float, optional): Seconds without requests before shutting down
+        """
+        # Left behind by a server that was not shut down
+        if os.path.exists(aSocketPath):
+            lSock = connect(aSocketPath)
+            if lSock is None:
+                os.remove(aSocketPath)
+            else:
+                lSock.close()
+
+        self.socketpath = aSocketPath
+        super().__init__(aSocketPath, _RequestHandler)
+        self.service = aService
+        self.timeout = aIdleTimeout
+        self.running = False
+        self.started = time.time()
+        self.requests = 0
+        # Thread running the commands
+        self._thread = None
+        self.stdout = StreamProxy('out', sys.stdout)
+        self.stderr = StreamProxy('err', sys.stderr)
+
+    # ------------------------------------------------------------------------------
+    def server_bind(self):
+        # Created with the final permissions, never accessible to other users
+        lUmask = os.umask(0o077)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(lUmask)
+        os.chmod(self.socketpath, 0o600)
+
+    # ------------------------------------------------------------------------------
+    def verify_request(self, aRequest, aClientAddress):
+        lUid = peer_uid(aRequest)
+        return lUid is None or lUid == os.getuid()
+
+    # ------------------------------------------------------------------------------
+    def serve(self):
+        """
+        Handles requests until stopped, or idle for longer than the timeout
+        """
+        lStreams = (sys.stdin, sys.stdout, sys.stderr)
+        sys.stdout, sys.stderr = self.stdout, self.stderr
+        # Commands cannot prompt the user
+        sys.stdin = open(os.devnull)
+        # Commands are interrupted with SIGINT, possibly ignored when started in the background
+        lSigInt = None
+        if threading.current_thread() is threading.main_thread():
+            lSigInt = signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        self.running = True
+        try:
+            while self.running:
+                self.handle_request()
+        finally:
+            if lSigInt is not None:
+                signal.signal(signal.SIGINT, lSigInt)
+            sys.stdin.close()
+            sys.stdin, sys.stdout, sys.stderr = lStreams
+            self.server_close()
+            if os.path.exists(self.socketpath):
+                os.remove(self.socketpath)
+            self.service.close()
+
+    # ------------------------------------------------------------------------------
+    def handle_timeout(self):
+        self.running = False
+
+    # ------------------------------------------------------------------------------
+    def _hangup(self):
+        """
+        Interrupts the running command, its client has gone away
+        """
+        self.service.abort()
+        # Only the main thread receives the signals, which also break out of blocking calls
+        if self._thread == threading.main_thread().ident:
+            signal.pthread_kill(self._thread, signal.SIGINT)
+
+    # ------------------------------------------------------------------------------
+    def run(self, aRequest, aReply, aConnection):
+        self.requests += 1
+        self._thread = threading.get_ident()
+
+        lCwd, lEnv = os.getcwd(), dict(os.environ)
+        self.stdout.attach(aReply, aRequest.get('tty', False))
+        self.stderr.attach(aReply, aRequest.get('tty', False))
+        lWatcher = _HangupWatcher(aConnection, self._hangup)
+        try:
+            lWatcher.start()
+            try:
+                os.environ.clear()
+                os.environ.update(aRequest.get('env', lEnv))
+                os.chdir(aRequest['cwd'])
+                lCode = self.service.run(aRequest['argv'], aRequest['cwd'], aRequest.get('columns'), aRequest.get('tty', False))
+            finally:
+                lWatcher.stop()
+                if lWatcher.hungup:
+                    # Lets the pending interrupt through, if not delivered yet
+                    time.sleep(0.01)
+        except SystemExit as lExc:
+            lCode = lExc.code
+        except KeyboardInterrupt:
+            lCode = 130
+        except Exception as lExc:
+            lCode = 1
+            self.stderr.write(f'ERROR: {type(lExc).__name__}: {lExc}\n')
+        finally:
+            self.stdout.detach()
+            self.stderr.detach()
+            os.chdir(lCwd)
+            os.environ.clear()
+            os.environ.update(lEnv)
+
+        if lCode is None:
+            return 0
+        return lCode if isinstance(lCode, int) else 1
+
+    # ------------------------------------------------------------------------------
+    def status(self):
+        return dict(
+            pid=os.getpid(),
+            uptime=time.time() - self.started,
+            requests=self.requests,
+            **self.service.status()
+        )
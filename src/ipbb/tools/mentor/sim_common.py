@@ -58,6 +58,8 @@ class ModelSimOutputFormatter(OutputFormatter):
 
         self.pendingchars = ''
         self.skiplines = []
+        # Lines starting with any of these are never shown
+        self.skipprefixes = ()
 
     def write(self, message):
         """Writes formatted message
@@ -90,7 +92,7 @@ class ModelSimOutputFormatter(OutputFormatter):
 
         # Iterate over pairs, line and newline match
         for lLine,lRet in zip(lines[::2], lines[1::2]):
-            if lLine in self.skiplines:
+            if lLine in self.skiplines or lLine.startswith(self.skipprefixes):
                 continue
 
             lColor = None
@@ -8,7 +8,8 @@ import atexit
 import logging
 
 from ...utils import which, DEFAULT_ENCODING
-from ..tcl_console import consolectxmanager, TCLConsoleSnoozer
+from ..tcl_console import consolectxmanager, TCLConsoleSnoozer, TCLFramer
+from ..tcl_aioconsole import AsyncTCLConsole
 from .sim_common import autodetect, ModelSimNotFoundError, ModelSimOutputFormatter, _vsim, _vcom
 
 # ------------------------------------------------------------------
@@ -48,8 +49,13 @@ class ModelSimConsole(object):
             lInstance.close()
 
     # --------------------------------------------------------------
-    def __init__(self, executable=_vsim, prompt=None,  echo=True, sid=None, loglabel=None):
+    def __init__(self, executable=_vsim, prompt=None,  echo=True, sid=None, loglabel=None, framed=False):
+        """
+        Args:
+            framed (bool, optional): Frame the commands with sentinel lines (see TCLFramer), lifting the command length limit
+        """
         super().__init__()
+        self._framer = None
 
         # Set up logger first
         self._log = logging.getLogger('Modelsim')
@@ -110,6 +116,12 @@ class ModelSimConsole(object):
         self.__expectPrompt()
         self._log.debug('Modelsim up and running')
 
+        if framed:
+            lFramer = TCLFramer(maxlen=self.__cmdPromptMaxLen)
+            lFramer.setup(self._process, self._prompt)
+            self._out.skipprefixes += lFramer.skipprefixes
+            self._framer = lFramer
+
         # Method mapping
         self.isAlive = self._process.isalive
         # Add self to the list of instances
@@ -239,6 +251,9 @@ class ModelSimConsole(object):
         # Just in case
         self._process.terminate(True)
 
+        if self._framer is not None:
+            self._framer.close()
+
         self.__instances.remove(self)
 
     # --------------------------------------------------------------
@@ -246,6 +261,12 @@ class ModelSimConsole(object):
         if not isinstance(aCmd, str):
             raise TypeError('expected string')
 
+        if self._framer is not None:
+            lLines, lErrors, _ = self._framer.run(self._process, self._prompt, aCmd, self.__reError, aLabel='ModelsimConsole')
+            if lErrors:
+                raise ModelSimConsoleError(lErrors, aCmd)
+            return tuple(lLines[-aMaxLen:] if aMaxLen else lLines)
+
         if aCmd.count('\n') != 0:
             raise ValueError('format error. Newline not allowed in commands')
 
@@ -278,6 +299,71 @@ class ModelSimSession(ModelSimConsole):
 ModelSimSnoozer = TCLConsoleSnoozer
 
 
+# ------------------------------------------------------------------
+class AsyncModelSimConsole(AsyncTCLConsole):
+    """ModelSim/QuestaSim TCL console driven by an asyncio event loop
+
+    Attributes:
+        variant (str): Simulator variant
+        version (str): Simulator version
+    """
+
+    kErrorRe = re.compile(r'^# \*\* Error')
+    kCriticalWarningRe = None
+    kQuitCmd = 'quit -f'
+    # No echo, a single prompt per command
+    __promptMap = {
+        'ModelSim': re.compile(r'ModelSim> '),
+        'QuestaSim': re.compile(r'QuestaSim> '),
+    }
+    __cmdPromptMaxLen = 500
+
+    # --------------------------------------------------------------
+    def __init__(self, executable=_vsim, prompt=None, echo=True, sid=None, loglabel=None):
+        """
+        Args:
+            executable (str): Executable name
+            prompt (str, optional): Prompt string, autodetected by default
+            echo (bool): Switch to enable echo messages
+            sid (str): Session id, prefixing the output lines
+            loglabel (None, optional): transcript file name
+
+        Raises:
+            ModelSimNotFoundError: executable not found in PATH
+        """
+        if not which(executable):
+            raise ModelSimNotFoundError(
+                executable
+                + " not found in PATH. Have you sourced Vivado\'s setup script?"
+            )
+
+        self.variant, self.version = autodetect()
+        if prompt is None or prompt == 'autodetect':
+            prompt = self.__promptMap[self.variant]
+
+        # Modelsim doesn't like to operate without TERM (hangs)
+        lEnv = dict(os.environ)
+        if 'TERM' not in lEnv:
+            lEnv['TERM'] = 'vt100'
+
+        loglabel = loglabel if loglabel else sid
+        lLogName = 'transcript' + (('_' + loglabel) if loglabel else '')
+        super().__init__(
+            executable,
+            ['-c', '-l', lLogName],
+            prompt=prompt,
+            out=ModelSimOutputFormatter(sid),
+            name=self.variant,
+            echo=echo,
+            env=lEnv,
+            maxlen=self.__cmdPromptMaxLen,
+        )
+
+    # --------------------------------------------------------------
+    def _error(self, aCmd, aErrors, aCriticalWarns):
+        return ModelSimConsoleError(aErrors, aCmd)
+
+
 
 # ------------------------------------------------------------------
 @atexit.register
@@ -0,0 +1,396 @@
+"""
+asyncio engine for the TCL consoles
+
+The console process runs on a pseudo-terminal, whose output is read without
+blocking by the event loop. Commands are framed with sentinel lines (see
+TCLFramer): `execute` returns as soon as the end line of the command has been
+received. Consoles are independent of each other, several tool sessions can
+be driven concurrently from a single event loop, e.g.
+
+    async def build(aProjects):
+        lConsoles = [AsyncVivadoConsole(sid=p) for p in aProjects]
+        await asyncio.gather(*(c.start() for c in lConsoles))
+        try:
+            await asyncio.gather(*(
+                c.execute('open_project {0}/{0}.xpr'.format(p)) for c, p in zip(lConsoles, aProjects)
+            ))
+        finally:
+            await asyncio.gather(*(c.close() for c in lConsoles))
+
+The output of each session goes through its own output formatter, complete
+lines prefixed by the session id.
+"""
+
+import asyncio
+import codecs
+import collections
+import fcntl
+import logging
+import os
+import pty
+import re
+import termios
+
+from ..utils import which, DEFAULT_ENCODING
+from .tcl_console import TCLFramer
+
+
+# -------------------------------------------------------------------------
+class TCLConsoleError(Exception):
+    """Exception raised for the commands failing in a TCL console
+
+    Attributes:
+        command (str): input command in which the error occurred
+        errors (list): Error messages
+        criticalWarns (list): Critical warning messages
+    """
+
+    def __init__(self, command, errors, criticalWarns=None):
+
+        self.errors = errors
+        self.criticalWarns = criticalWarns
+        self.command = command
+
+    def __str__(self):
+        return self.__class__.__name__ + '(\'{}\', errors: {}, critical warnings {})'.format(self.command, len(self.errors), len(self.criticalWarns or []))
+
+
+# -------------------------------------------------------------------------
+def _setctty():
+    # Run in the child, the pseudo-terminal becomes its controlling terminal:
+    # the console is hung up when the parent process goes away
+    os.setsid()
+    fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+
+
+# -------------------------------------------------------------------------
+class AsyncTCLConsole(object):
+    """TCL console driven by an asyncio event loop
+
+    Attributes:
+        name (str): Name of the tool, for the progress messages
+        banner (str): Console output up to the first prompt
+        ready (bool): Console started and waiting for commands
+    """
+
+    kErrorRe = re.compile(r'^ERROR:')
+    kCriticalWarningRe = re.compile(r'^CRITICAL WARNING:')
+    kQuitCmd = 'exit'
+    kReadSize = 65536
+    # Seconds given to the console to quit before killing it
+    kQuitTimeout = 10.
+
+    # --------------------------------------------------------------
+    def __init__(
+        self, executable, args=(), prompt=re.compile(r'%\s'), out=None, name=None, stopOnCWarnings=False, echo=True,
+        showbanner=False, env=None, maxlen=TCLFramer.kMaxLineLen, timeout=30,
+    ):
+        """
+        Args:
+            executable (str): Executable name
+            args (list, optional): Command line arguments
+            prompt (str or re.Pattern): Console prompt
+            out (OutputFormatter, optional): Formatter of the console output, not shown if None
+            name (str, optional): Name of the tool, the executable name by default
+            stopOnCWarnings (bool): Stop on Critical Warnings
+            echo (bool): Switch to enable echo messages
+            showbanner (bool, optional): Show the startup banner
+            env (dict, optional): Environment of the console process
+            maxlen (int, optional): Maximum length of a command sent on the command line
+            timeout (float, optional): Seconds without output before printing a progress message
+
+        Raises:
+            FileNotFoundError: executable not found in PATH
+        """
+        super().__init__()
+
+        if not which(executable):
+            raise FileNotFoundError(executable + " not found in PATH")
+
+        self._executable = executable
+        self._args = list(args)
+        self._prompt = re.compile(prompt) if isinstance(prompt, str) else prompt
+        self._out = out
+        self.name = name if name is not None else executable
+        self._stopOnCWarnings = stopOnCWarnings
+        self._echo = echo
+        self._showbanner = showbanner
+        self._env = env
+        self._timeout = timeout
+
+        self._log = logging.getLogger(self.name)
+        self._framer = TCLFramer(maxlen)
+        if self._out is not None:
+            self._out.skipprefixes += self._framer.skipprefixes
+
+        self._process = None
+        self._fd = None
+        self._decoder = codecs.getincrementaldecoder(DEFAULT_ENCODING)(errors='replace')
+        self._buffer = ''
+        self._eof = False
+        self._data = None
+        self._lock = None
+        self._ready = False
+        self.banner = None
+
+    # --------------------------------------------------------------
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    # --------------------------------------------------------------
+    async def __aexit__(self, type, value, traceback):
+        await self.close()
+
+    # --------------------------------------------------------------
+    @property
+    def ready(self):
+        return self._ready
+
+    # --------------------------------------------------------------
+    @property
+    def pid(self):
+        return self._process.pid if self._process is not None else None
+
+    # --------------------------------------------------------------
+    @property
+    def stopOnCWarnings(self):
+        return self._stopOnCWarnings
+
+    # --------------------------------------------------------------
+    @stopOnCWarnings.setter
+    def stopOnCWarnings(self, stop):
+        self._stopOnCWarnings = stop
+
+    # --------------------------------------------------------------
+    @property
+    def sessionid(self):
+        return self._out.prefix if self._out is not None else None
+
+    # --------------------------------------------------------------
+    def isAlive(self):
+        return self._process is not None and self._process.returncode is None
+
+    # --------------------------------------------------------------
+    def _write(self, aText):
+        if self._out is not None:
+            self._out.write(aText)
+
+    # --------------------------------------------------------------
+    def _quiet(self, aQuiet):
+        if self._out is not None:
+            self._out.quiet = aQuiet
+
+    # --------------------------------------------------------------
+    def _error(self, aCmd, aErrors, aCriticalWarns):
+        """
+        Exception raised for a failed command
+        """
+        return TCLConsoleError(aCmd, aErrors, aCriticalWarns)
+
+    # --------------------------------------------------------------
+    async def start(self):
+        """
+        Starts the console process and waits for its prompt
+        """
+        if self._process is not None:
+            return
+
+        self._log.debug('Starting %s', self.name)
+        self._write('\n' + '- Starting {} -'.format(self.name) + '-' * 40 + '\n')
+        self._quiet(not self._showbanner)
+
+        lLoop = asyncio.get_running_loop()
+        self._data = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+        # No echo, the framed commands are followed by their end line
+        lMaster, lSlave = pty.openpty()
+        lAttrs = termios.tcgetattr(lSlave)
+        lAttrs[3] &= ~termios.ECHO
+        termios.tcsetattr(lSlave, termios.TCSANOW, lAttrs)
+        try:
+            self._process = await asyncio.create_subprocess_exec(
+                self._executable, *self._args,
+                stdin=lSlave, stdout=lSlave, stderr=lSlave,
+                env=self._env,
+                preexec_fn=_setctty,
+            )
+        except BaseException:
+            os.close(lMaster)
+            raise
+        finally:
+            os.close(lSlave)
+
+        self._fd = lMaster
+        os.set_blocking(self._fd, False)
+        lLoop.add_reader(self._fd, self._read)
+
+        self.banner, _ = await self._expect(self._prompt)
+
+        # Hides the startup prompt, the next one heads the first command line
+        await self._send(self._framer.definition())
+        self._write('\n')
+        self._quiet(not self._echo)
+        self._started()
+        await self._expect(self._prompt)
+
+        self._log.debug('%s up and running', self.name)
+        self._ready = True
+
+    # --------------------------------------------------------------
+    def _started(self):
+        """
+        Called once the startup banner has been received
+        """
+        pass
+
+    # --------------------------------------------------------------
+    def _read(self):
+        try:
+            lData = os.read(self._fd, self.kReadSize)
+        except BlockingIOError:
+            return
+        except OSError:
+            # EIO once the console process has gone
+            lData = b''
+
+        if not lData:
+            self._eof = True
+            asyncio.get_running_loop().remove_reader(self._fd)
+            lText = self._decoder.decode(b'', final=True)
+        else:
+            lText = self._decoder.decode(lData)
+
+        self._buffer += lText
+        self._write(lText)
+        self._data.set()
+
+    # --------------------------------------------------------------
+    async def _expect(self, aPattern):
+        """
+        Waits for a pattern in the console output
+
+        Returns:
+            tuple: output preceding the match, and the match
+        """
+        lPos = 0
+        lWaited = 0
+        while True:
+            m = aPattern.search(self._buffer, lPos)
+            if m is not None:
+                lBefore = self._buffer[:m.start()]
+                self._buffer = self._buffer[m.end():]
+                return lBefore, m
+
+            if self._eof:
+                raise EOFError('{} terminated (pid {})'.format(self.name, self.pid))
+
+            # Only the tail can complete a match with the data to come
+            lPos = max(0, len(self._buffer) - TCLFramer.kSearchWindow)
+            self._data.clear()
+            try:
+                await asyncio.wait_for(self._data.wait(), self._timeout)
+            except asyncio.TimeoutError:
+                lWaited += 1
+                print("{0} {1}>> Time since last command: {2}s".format(
+                    self.name, (self.sessionid + ' ') if self.sessionid else '', lWaited * self._timeout
+                ))
+
+    # --------------------------------------------------------------
+    async def _send(self, aLine):
+        lData = (aLine + '\n').encode(DEFAULT_ENCODING)
+        while lData:
+            try:
+                n = os.write(self._fd, lData)
+            except BlockingIOError:
+                # Terminal buffer full, the console is still reading
+                await asyncio.sleep(0.01)
+                continue
+            lData = lData[n:]
+
+    # --------------------------------------------------------------
+    async def run(self, aCmd):
+        """
+        Runs a command
+
+        Args:
+            aCmd (str): TCL command
+
+        Returns:
+            tuple: output lines, error lines and critical warning lines
+        """
+        if not self._ready:
+            raise RuntimeError('{} not started'.format(self.name))
+
+        async with self._lock:
+            lCount, lLine = self._framer.command(aCmd)
+            # In place of the echo of the framed command
+            self._write(aCmd + '\n')
+            await self._send(lLine)
+
+            lText, m = await self._expect(self._framer.endpattern(lCount))
+            lCode = int(m.group(1))
+            await self._expect(self._prompt)
+
+        lLines, lErrors, lCriticalWarnings, lErrorMsg = self._framer.parse(
+            lCount, lText, self.kErrorRe, self.kCriticalWarningRe
+        )
+        # Errors not reported as messages, e.g. unknown commands
+        if lCode == 1 and not lErrors:
+            lErrors = [lErrorMsg]
+        return lLines, lErrors, lCriticalWarnings
+
+    # --------------------------------------------------------------
+    async def execute(self, aCmd, aMaxLen=1):
+        """
+        Executes a command, raising an exception if it fails
+
+        Args:
+            aCmd (str): TCL command
+            aMaxLen (int, optional): Number of output lines returned, all if None
+
+        Returns:
+            tuple: last output lines, (None,) if there is no output
+        """
+        if not isinstance(aCmd, str):
+            raise TypeError('expected string, found '+str(type(aCmd)))
+
+        lLines, lErrors, lCriticalWarnings = await self.run(aCmd)
+
+        if lErrors or (self._stopOnCWarnings and lCriticalWarnings):
+            raise self._error(aCmd, lErrors, lCriticalWarnings)
+
+        lBuffer = collections.deque(lLines, aMaxLen)
+        if not lBuffer:
+            lBuffer.append(None)
+        return tuple(lBuffer)
+
+    # --------------------------------------------------------------
+    async def close(self):
+        """
+        Quits the console, killing it if it does not respond
+        """
+        if self._process is None:
+            return
+
+        if self.isAlive():
+            self._log.debug('Shutting %s down', self.name)
+            if self._ready and not self._eof:
+                try:
+                    await self._send(self.kQuitCmd)
+                    await asyncio.wait_for(self._process.wait(), self.kQuitTimeout)
+                except (OSError, asyncio.TimeoutError):
+                    pass
+            if self.isAlive():
+                self._process.kill()
+            await self._process.wait()
+            self._write('\n' + '- Terminating {} (pid {}) -'.format(self.name, self._process.pid) + '-' * 40 + '\n')
+
+        self._ready = False
+        if self._fd is not None:
+            if not self._eof:
+                asyncio.get_running_loop().remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+        self._framer.close()
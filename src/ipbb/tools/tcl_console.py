@@ -1,3 +1,12 @@
+# Modules
+import collections
+import mmap
+import os
+import re
+import tempfile
+import uuid
+
+
 
 # -------------------------------------------------------------------------
 def consolectxmanager(aTCLConsoleClass):
@@ -64,3 +73,505 @@ class TCLConsoleSnoozer(object):
         self._console.quiet = self._quiet
     # --------------------------------------------------------------
 
+
+
+# -------------------------------------------------------------------------
+TclResult = collections.namedtuple('TclResult', ['command', 'code', 'result', 'errors', 'criticalWarns'])
+TclResult.__doc__ = """
+Outcome of a command run in a batch
+
+Attributes:
+    command (str): TCL command
+    code (int): Return code, as reported by catch (1 for errors)
+    result (str): Command result, or error message
+    errors (list): Error messages printed by the command
+    criticalWarns (list): Critical warning messages printed by the command
+"""
+
+
+# -------------------------------------------------------------------------
+def tclquote(aText):
+    """
+    Quotes a string as a single TCL word
+
+    Args:
+        aText (str): Text to quote
+
+    Returns:
+        str: aText, within braces if possible, backslash-escaped otherwise
+    """
+    lDepth = 0
+    lEscaped = False
+    for c in aText:
+        if lEscaped:
+            lEscaped = False
+        elif c == '\\':
+            lEscaped = True
+        elif c == '{':
+            lDepth += 1
+        elif c == '}':
+            lDepth -= 1
+            if lDepth < 0:
+                break
+
+    if aText and lDepth == 0 and not lEscaped:
+        return '{' + aText + '}'
+    return re.sub(r'([\\{}\[\]$";\s])', r'\\\1', aText) if aText else '{}'
+
+
+# -------------------------------------------------------------------------
+_kTclEscapes = {'n': '\n', 't': '\t', 'r': '\r', 'a': '\a', 'b': '\b', 'f': '\f', 'v': '\v'}
+
+
+def _tclunescape(aText):
+    return re.sub(r'\\(.)', lambda m: _kTclEscapes.get(m.group(1), m.group(1)), aText, flags=re.S)
+
+
+# -------------------------------------------------------------------------
+def tclsplit(aText):
+    """
+    Splits a TCL list into its elements
+
+    Args:
+        aText (str): TCL list
+
+    Returns:
+        list: Elements of the list, as strings
+
+    Raises:
+        ValueError: aText is not a well formed list
+    """
+    lItems = []
+    i, n = 0, len(aText)
+    while True:
+        while i < n and aText[i].isspace():
+            i += 1
+        if i == n:
+            return lItems
+
+        if aText[i] == '{':
+            lDepth, j = 1, i + 1
+            while j < n and lDepth:
+                c = aText[j]
+                if c == '\\':
+                    j += 1
+                elif c == '{':
+                    lDepth += 1
+                elif c == '}':
+                    lDepth -= 1
+                j += 1
+            if lDepth:
+                raise ValueError('unmatched open brace in list')
+            lItems.append(aText[i+1:j-1])
+        elif aText[i] == '"':
+            j = i + 1
+            while j < n and aText[j] != '"':
+                j += 2 if aText[j] == '\\' else 1
+            if j >= n:
+                raise ValueError('unmatched open quote in list')
+            lItems.append(_tclunescape(aText[i+1:j]))
+            j += 1
+        else:
+            j = i
+            while j < n and not aText[j].isspace():
+                j += 2 if aText[j] == '\\' else 1
+            lItems.append(_tclunescape(aText[i:j]))
+
+        if j < n and not aText[j].isspace():
+            raise ValueError('list element followed by "{}" instead of space'.format(aText[j]))
+        i = j
+
+
+# -------------------------------------------------------------------------
+class TCLResultFile(object):
+    """
+    Side channel for the results of console commands
+
+    The console writes the result of a command to a temporary file, read back
+    with mmap, instead of printing it. Large results do not go through the
+    console output, and are not mixed with the messages of the command.
+
+    Attributes:
+        path (str): Path of the file
+    """
+
+    # --------------------------------------------------------------
+    def __init__(self):
+        super().__init__()
+        lFd, self.path = tempfile.mkstemp(prefix='ipbb_', suffix='.out')
+        os.close(lFd)
+
+    # --------------------------------------------------------------
+    def __del__(self):
+        self.close()
+
+    # --------------------------------------------------------------
+    def close(self):
+        """
+        Removes the file
+        """
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+
+    # --------------------------------------------------------------
+    def command(self, aScript):
+        """
+        Wraps a TCL script, to write its return code and result to the file
+
+        Args:
+            aScript (str): TCL script, on a single line
+
+        Returns:
+            str: TCL command
+        """
+        return (
+            'set _ipbb_rc [catch {} _ipbb_res];'
+            ' set _ipbb_f [open {} w]; fconfigure $_ipbb_f -encoding utf-8;'
+            ' puts $_ipbb_f $_ipbb_rc; puts -nonewline $_ipbb_f $_ipbb_res; close $_ipbb_f;'
+            ' unset _ipbb_f _ipbb_res _ipbb_rc'
+        ).format(tclquote(aScript), tclquote(self.path))
+
+    # --------------------------------------------------------------
+    def text(self):
+        """
+        Contents of the file
+
+        Returns:
+            str: Text written to the file
+        """
+        with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ''
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                return m[:].decode('utf-8')
+
+    # --------------------------------------------------------------
+    def read(self):
+        """
+        Result of the last command wrapped by `command`
+
+        Returns:
+            tuple: Return code and result of the command
+        """
+        lCode, _, lResult = self.text().partition('\n')
+        return int(lCode), lResult
+
+
+# -------------------------------------------------------------------------
+class TCLBatch(object):
+    """
+    Runs a list of TCL commands with a single console round trip
+
+    The commands are passed to a helper procedure, defined once per console,
+    evaluating each of them in the global scope within `catch`. The return
+    code and result of each command are printed on a single line, starting
+    with a marker unique to the batch object, the messages printed by the
+    command precede it.
+
+    Attributes:
+        marker (str): Prefix of the result lines
+        maxlen (int): Maximum length of a batch command line, None for no limit
+    """
+
+    __reError = re.compile(r'^ERROR:')
+    __reCriticalWarning = re.compile(r'^CRITICAL WARNING:')
+    __reEscape = re.compile(r'\\(.)')
+    __unescape = {'n': '\n', 'r': '\r'}
+
+    # Terminal lines longer than 4k are truncated, stay well below that
+    kMaxLineLen = 3072
+
+    # --------------------------------------------------------------
+    def __init__(self, maxlen=kMaxLineLen):
+        super().__init__()
+        self.marker = '@ipbb:' + uuid.uuid4().hex[:8]
+        self.maxlen = maxlen
+        self.procname = 'ipbb_batch_' + self.marker[-8:]
+
+    # --------------------------------------------------------------
+    def definition(self):
+        """
+        TCL command defining the helper procedure
+
+        Returns:
+            str: Single line procedure definition
+        """
+        return (
+            'proc ' + self.procname + ' {stop args} {'
+            ' set i 0;'
+            ' foreach c $args {'
+            ' set rc [catch {uplevel #0 $c} res];'
+            ' puts "' + self.marker + ' $i $rc [string map {\\\\ \\\\\\\\ \\n \\\\n \\r \\\\r} $res]";'
+            ' incr i;'
+            ' if {$rc == 1 && $stop} break'
+            ' }'
+            ' }'
+        )
+
+    # --------------------------------------------------------------
+    def lines(self, aCmds, aStopOnError=True):
+        """
+        Splits the commands in batch command lines
+
+        Args:
+            aCmds (list): TCL commands
+            aStopOnError (bool): Skip the rest of the batch after a command raising an error
+
+        Yields:
+            tuple: command line and the commands it runs
+        """
+        lHead = '{} {}'.format(self.procname, int(aStopOnError))
+        lLine, lChunk = lHead, []
+        for lCmd in aCmds:
+            if not isinstance(lCmd, str):
+                raise TypeError('expected string, found '+str(type(lCmd)))
+            if '\n' in lCmd:
+                raise ValueError('Format error. Newline not allowed in commands')
+
+            lWord = ' ' + tclquote(lCmd)
+            if lChunk and self.maxlen is not None and len(lLine) + len(lWord) > self.maxlen:
+                yield lLine, lChunk
+                lLine, lChunk = lHead, []
+            lLine += lWord
+            lChunk.append(lCmd)
+
+        if lChunk:
+            yield lLine, lChunk
+
+    # --------------------------------------------------------------
+    def parse(self, aCmds, aLines):
+        """
+        Collects the results of a batch from the console output
+
+        Args:
+            aCmds (list): Commands run by the batch
+            aLines (iterable): Console output lines
+
+        Returns:
+            list: TclResult of the commands that were run
+        """
+        lResults = []
+        lErrors, lCWarns = [], []
+        for lLine in aLines:
+            if lLine is None:
+                continue
+
+            if not lLine.startswith(self.marker + ' '):
+                if self.__reError.match(lLine):
+                    lErrors.append(lLine)
+                elif self.__reCriticalWarning.match(lLine):
+                    lCWarns.append(lLine)
+                continue
+
+            lIdx, lCode, lResult = (lLine[len(self.marker)+1:].split(' ', 2) + [''])[:3]
+            lResult = self.__reEscape.sub(lambda m: self.__unescape.get(m.group(1), m.group(1)), lResult)
+            lResults.append(TclResult(aCmds[int(lIdx)], int(lCode), lResult, lErrors, lCWarns))
+            lErrors, lCWarns = [], []
+
+        return lResults
+
+
+# -------------------------------------------------------------------------
+class TCLFramer(object):
+    """
+    Frames the commands sent to a TCL console with sentinel lines
+
+    Commands are run by a helper procedure, defined once per console, which
+    evaluates them in the global scope within `catch`, between a begin and an
+    end line carrying the command counter and its return code. The output of a
+    command is read in one go up to its end line, with no need to match the
+    echo of the command line. Long or multi-line commands are passed to the
+    procedure through a temporary file, avoiding the terminal line limits.
+
+    Attributes:
+        marker (str): Prefix of the sentinel lines
+        procname (str): Name of the helper procedure
+        maxlen (int): Maximum length of a command sent on the command line
+    """
+
+    __reEscape = re.compile(r'\\(.)')
+    __unescape = {'n': '\n', 'r': '\r'}
+    __reNewLines = re.compile(r'\r*\n')
+
+    # Sentinel lines may be prefixed by the console (e.g. '# ' in ModelSim)
+    kLinePrefixes = ('', '# ')
+    kMaxLineLen = 1024
+    # The end line follows the output, only the tail of the buffer needs searching
+    kSearchWindow = 4096
+
+    # --------------------------------------------------------------
+    def __init__(self, maxlen=kMaxLineLen):
+        super().__init__()
+        lId = uuid.uuid4().hex[:8]
+        self.marker = '@ipbb:' + lId
+        self.procname = 'ipbb_run_' + lId
+        self.maxlen = maxlen
+        self._count = 0
+        self._cmdfile = None
+
+    # --------------------------------------------------------------
+    def __del__(self):
+        self.close()
+
+    # --------------------------------------------------------------
+    def close(self):
+        """
+        Removes the command file, if any
+        """
+        if self._cmdfile is not None and os.path.exists(self._cmdfile):
+            os.remove(self._cmdfile)
+        self._cmdfile = None
+
+    # --------------------------------------------------------------
+    @property
+    def skipprefixes(self):
+        """
+        Prefixes of the sentinel lines, to be hidden from the output
+        """
+        return tuple(p + self.marker for p in self.kLinePrefixes)
+
+    # --------------------------------------------------------------
+    def definition(self):
+        """
+        TCL command defining the helper procedure
+
+        Returns:
+            str: Single line procedure definition
+        """
+        return (
+            'proc ' + self.procname + ' {id cmd {path ""}} {'
+            ' if {$path ne ""} { set f [open $path]; fconfigure $f -encoding utf-8; set cmd [read $f]; close $f };'
+            ' puts "' + self.marker + ':$id:begin";'
+            ' set rc [catch {uplevel #0 $cmd} res];'
+            ' if {$rc == 1} { puts "' + self.marker + ':$id:error:[string map {\\\\ \\\\\\\\ \\n \\\\n \\r \\\\r} $res]" } elseif {$res ne ""} { puts $res };'
+            ' puts "' + self.marker + ':$id:end:$rc"'
+            ' }'
+        )
+
+    # --------------------------------------------------------------
+    def setup(self, aProcess, aPrompt):
+        """
+        Defines the helper procedure in a console process
+
+        Args:
+            aProcess (pexpect.spawn): Console process, waiting at the prompt
+            aPrompt (str or re.Pattern): Console prompt
+        """
+        aProcess.sendline(self.definition())
+        aProcess.expect(aPrompt)
+
+    # --------------------------------------------------------------
+    def command(self, aCmd):
+        """
+        Frames a command
+
+        Args:
+            aCmd (str): TCL command
+
+        Returns:
+            tuple: Command counter and the framed command line
+        """
+        if not isinstance(aCmd, str):
+            raise TypeError('expected string, found '+str(type(aCmd)))
+
+        self._count += 1
+        lWord = tclquote(aCmd)
+        if '\n' not in aCmd and len(lWord) <= self.maxlen:
+            return self._count, '{} {} {}'.format(self.procname, self._count, lWord)
+
+        if self._cmdfile is None:
+            lFd, self._cmdfile = tempfile.mkstemp(prefix='ipbb_', suffix='.tcl')
+            os.close(lFd)
+        with open(self._cmdfile, 'w', encoding='utf-8') as f:
+            f.write(aCmd)
+        return self._count, '{} {} {{}} {}'.format(self.procname, self._count, tclquote(self._cmdfile))
+
+    # --------------------------------------------------------------
+    def endpattern(self, aCount):
+        """
+        Regex matching the end line of a command
+
+        Args:
+            aCount (int): Command counter
+        """
+        return re.compile(
+            r'\r*\n(?:{})?{}:{}:end:(-?\d+)\r*\n'.format(
+                '|'.join(re.escape(p) for p in self.kLinePrefixes if p),
+                re.escape(self.marker),
+                aCount
+            )
+        )
+
+    # --------------------------------------------------------------
+    def parse(self, aCount, aText, aErrorRe, aCWarnRe=None):
+        """
+        Splits the output of a command
+
+        Args:
+            aCount (int): Command counter
+            aText (str): Console output up to the end line
+            aErrorRe (re.Pattern): Regex matching the error lines
+            aCWarnRe (re.Pattern, optional): Regex matching the critical warning lines
+
+        Returns:
+            tuple: output lines, error lines, critical warning lines and the error message, if the command failed
+        """
+        lBegin = '{}:{}:begin'.format(self.marker, aCount)
+        lStart = aText.find(lBegin)
+        if lStart != -1:
+            # Nothing after the begin line if the command printed nothing
+            lStart = aText.find('\n', lStart)
+            aText = aText[lStart + 1:] if lStart != -1 else ''
+
+        lLines = self.__reNewLines.split(aText) if aText else []
+
+        lErrorMsg = None
+        lError = '{}:{}:error:'.format(self.marker, aCount)
+        for i, lLine in enumerate(lLines):
+            j = lLine.find(lError)
+            if j != -1 and lLine[:j] in self.kLinePrefixes:
+                lErrorMsg = self.__reEscape.sub(lambda m: self.__unescape.get(m.group(1), m.group(1)), lLine[j+len(lError):])
+                del lLines[i]
+                break
+
+        lErrors = [l for l in lLines if aErrorRe.match(l)]
+        lCWarns = [l for l in lLines if aCWarnRe.match(l)] if aCWarnRe is not None else []
+        return lLines, lErrors, lCWarns, lErrorMsg
+
+    # --------------------------------------------------------------
+    def run(self, aProcess, aPrompt, aCmd, aErrorRe, aCWarnRe=None, aLabel='TCLConsole'):
+        """
+        Runs a framed command in a console process
+
+        Args:
+            aProcess (pexpect.spawn): Console process, set up by `setup`
+            aPrompt (str or re.Pattern): Console prompt
+            aCmd (str): TCL command
+            aErrorRe (re.Pattern): Regex matching the error lines
+            aCWarnRe (re.Pattern, optional): Regex matching the critical warning lines
+            aLabel (str): Name of the console, for the progress messages
+
+        Returns:
+            tuple: output lines, error lines and critical warning lines
+        """
+        import pexpect
+
+        lCount, lLine = self.command(aCmd)
+        aProcess.sendline(lLine)
+
+        lEnd = self.endpattern(lCount)
+        lTimeoutCounts = 0
+        while aProcess.expect([lEnd, pexpect.TIMEOUT], searchwindowsize=self.kSearchWindow) == 1:
+            lTimeoutCounts += 1
+            print("{0} >> Time since last command: {1}s".format(aLabel, lTimeoutCounts * aProcess.timeout))
+
+        lCode = int(aProcess.match.group(1))
+        lText = aProcess.before
+        aProcess.expect(aPrompt)
+
+        lLines, lErrors, lCWarns, lErrorMsg = self.parse(lCount, lText, aErrorRe, aCWarnRe)
+        # Errors not reported as messages, e.g. unknown commands
+        if lCode == 1 and not lErrors:
+            lErrors = [lErrorMsg]
+        return lLines, lErrors, lCWarns
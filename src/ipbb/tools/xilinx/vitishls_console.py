@@ -17,7 +17,8 @@ from os.path import join, split, exists, splitext, basename
 from ...utils import which, DEFAULT_ENCODING
 from ..common import OutputFormatter
 from ..termui import *
-from ..tcl_console import consolectxmanager, TCLConsoleSnoozer
+from ..tcl_console import consolectxmanager, TCLConsoleSnoozer, TCLFramer
+from ..tcl_aioconsole import AsyncTCLConsole
 
 kHLSLogDebug = False
 
@@ -86,12 +87,14 @@ class VitisHLSOutputFormatter(OutputFormatter):
     Attributes:
         pendingchars (str): Description
         skiplines (list): Regexes which, if matched, will skip the writing of a line
+        skipprefixes (tuple): Prefixes of lines never written
     """
     def __init__(self, prefix=None, sep=' | ', quiet=False):
         super().__init__(prefix, sep, quiet)
 
         self.pendingchars = ''
         self.skiplines = [u'\r\x1b[12C\r', u'\r\x1b[11C\r']
+        self.skipprefixes = ()
 
     def write(self, message):
         """Writes formatted message
@@ -137,7 +140,7 @@ class VitisHLSOutputFormatter(OutputFormatter):
 
         # Iterate over pairs, line and newline match
         for lLine,lRet in zip(lines[::2], lines[1::2]):
-            if lLine in self.skiplines:
+            if lLine in self.skiplines or lLine.startswith(self.skipprefixes):
                 continue
 
             lColor = None
@@ -238,7 +241,7 @@ class VitisHLSConsole(object):
     # --------------------------------------------------------------
 
     # --------------------------------------------------------------
-    def __init__(self, executable='vitis_hls', prompt=None, stopOnCWarnings=False, echo=True, showbanner=False, sid=None, loglabel=None ):
+    def __init__(self, executable='vitis_hls', prompt=None, stopOnCWarnings=False, echo=True, showbanner=False, sid=None, loglabel=None, framed=False):
         """
         Args:
             sessionid (str): Name of the VitisHLS session
@@ -247,8 +250,10 @@ class VitisHLSConsole(object):
             executable (str): Executable name
             prompt (str):
             stopOnCWarnings (bool): Stop on Critical Warnings
+            framed (bool): Frame the commands with sentinel lines (see TCLFramer) instead of checking their echo
         """
         super().__init__()
+        self._framer = None
         self._execname = self.__nameMap[executable]
         self._cmdSentAck = self.__cmdSentAckMap[executable]
 
@@ -306,6 +311,12 @@ class VitisHLSConsole(object):
         self._log.debug(f'{self._execname} up and running')
         self._out.write('\n' + '- Started {self.variant} {self.version} -'+'-' * 40 + '\n')
 
+        if framed:
+            lFramer = TCLFramer()
+            lFramer.setup(self._process, self._prompt)
+            self._out.skipprefixes += lFramer.skipprefixes
+            self._framer = lFramer
+
         # Create a process descriptor
         self._processinfo = psutil.Process(self._process.pid)
         # Method mapping
@@ -446,6 +457,9 @@ class VitisHLSConsole(object):
         # Just in case
         self._process.terminate(True)
 
+        if self._framer is not None:
+            self._framer.close()
+
         # Remove self from the list of instances
         self.__instances.remove(self)
 
@@ -464,11 +478,19 @@ class VitisHLSConsole(object):
         if not isinstance(aCmd, str):
             raise TypeError('expected string, found '+str(type(aCmd)))
 
-        if aCmd.count('\n') != 0:
-            raise ValueError('Format error. Newline not allowed in commands')
+        if self._framer is not None:
+            lLines, lErrors, lCriticalWarnings = self._framer.run(
+                self._process, self._prompt, aCmd, self.__reError, self.__reCriticalWarning, 'VitisHLSConsole'
+            )
+            lBuffer = collections.deque(lLines, aMaxLen)
+            if not lBuffer:
+                lBuffer.append(None)
+        else:
+            if aCmd.count('\n') != 0:
+                raise ValueError('Format error. Newline not allowed in commands')
 
-        self.__send(aCmd)
-        lBuffer, lErrors, lCriticalWarnings = self.__expectPrompt(aMaxLen)
+            self.__send(aCmd)
+            lBuffer, lErrors, lCriticalWarnings = self.__expectPrompt(aMaxLen)
 
         if lErrors or (self._stopOnCWarnings and lCriticalWarnings):
             raise VitisHLSConsoleError(aCmd, lErrors, lCriticalWarnings)
@@ -504,6 +526,67 @@ class VitisHLSSession(VitisHLSConsole):
 
 VitisHLSSnoozer = TCLConsoleSnoozer
 
+
+# -------------------------------------------------------------------------
+class AsyncVitisHLSConsole(AsyncTCLConsole):
+    """VitisHLS TCL console driven by an asyncio event loop
+
+    Attributes:
+        variant (str): VitisHLS variant
+        version (str): VitisHLS version
+    """
+
+    kQuitCmd = 'quit'
+    __nameMap = {
+        'vitis_hls': 'VitisHLS',
+        'vivado_hls': 'VivadoHLS',
+    }
+    __promptMap = {
+        'vitis_hls': re.compile(r'vitis_hls>\s'),
+        'vivado_hls': re.compile(r'vivado_hls>\s'),
+    }
+
+    # --------------------------------------------------------------
+    def __init__(self, executable='vitis_hls', prompt=None, stopOnCWarnings=False, echo=True, showbanner=False, sid=None, loglabel=None):
+        """
+        Args:
+            executable (str): Executable name
+            prompt (str, optional): Prompt string
+            stopOnCWarnings (bool): Stop on Critical Warnings
+            echo (bool): Switch to enable echo messages
+            showbanner (bool, optional): Show the startup banner
+            sid (str): Session id, prefixing the output lines
+            loglabel (None, optional): log file name
+
+        Raises:
+            VitisHLSNotFoundError: executable not found in PATH
+        """
+        if not which(executable):
+            raise VitisHLSNotFoundError(executable + " not found in PATH. Have you sourced VitisHLS\'s setup script?")
+
+        loglabel = loglabel if loglabel else sid
+        lLogName = executable + (('_' + loglabel) if loglabel else '')
+        super().__init__(
+            executable,
+            ['-i', '-l', lLogName+'.log'],
+            prompt=prompt if prompt is not None else self.__promptMap[executable],
+            out=VitisHLSOutputFormatter(sid),
+            name=self.__nameMap[executable],
+            stopOnCWarnings=stopOnCWarnings,
+            echo=echo,
+            showbanner=showbanner,
+        )
+        self.variant = self.version = None
+
+    # --------------------------------------------------------------
+    def _started(self):
+        self.variant, self.version = _parseversion(self.banner)
+        self._write('- Started {} {} -'.format(self.variant, self.version)+'-' * 40 + '\n')
+
+    # --------------------------------------------------------------
+    def _error(self, aCmd, aErrors, aCriticalWarns):
+        return VitisHLSConsoleError(aCmd, aErrors, aCriticalWarns)
+
 @atexit.register
 def __goodbye():
     VitisHLSConsole.killAllInstances()
@@ -88,6 +88,8 @@ class VivadoOutputFormatter(OutputFormatter):
 
         self.pendingchars = ''
         self.skiplines = ['\r\x1b[12C\r']
+        # Lines starting with any of these are never shown
+        self.skipprefixes = ()
         self.loglevel = self.__log_levels[loglevel]
 
     def write(self, message):
@@ -121,7 +123,7 @@ class VivadoOutputFormatter(OutputFormatter):
 
         # Iterate over pairs, line and newline match
         for lLine,lRet in zip(lines[::2], lines[1::2]):
-            if lLine in self.skiplines:
+            if lLine in self.skiplines or lLine.startswith(self.skipprefixes):
                 continue
 
             if self.quiet:
@@ -10,14 +10,17 @@ import os.path
 import atexit
 import sh
 import tempfile
+import threading
 import psutil
 
 # Elements
 from os.path import join, split, exists, splitext, basename
+from concurrent.futures import Future
 from click import style
 from ...utils import which, DEFAULT_ENCODING
 # from ..termui import *
-from ..tcl_console import consolectxmanager, TCLConsoleSnoozer
+from ..tcl_console import consolectxmanager, TCLConsoleSnoozer, TCLBatch, TCLFramer, TCLResultFile, tclquote
+from ..tcl_aioconsole import AsyncTCLConsole
 from .vivado_common import VivadoNotFoundError, autodetect, VivadoOutputFormatter, _parseversion
 
 # ------------------------------------------------
@@ -93,6 +96,8 @@ class VivadoConsole(object):
         'vivado_lab': re.compile(r'vivado_lab%\s')
     }
     __newlines = [u'\r\n']
+    # Longer commands may hang the console, unless framed
+    kMaxCmdLen = 8192
 
     # --------------------------------------------------------------
     @classmethod
@@ -120,7 +125,10 @@ class VivadoConsole(object):
     # --------------------------------------------------------------
 
     # --------------------------------------------------------------
-    def __init__(self, executable='vivado', prompt=None, stopOnCWarnings=False, echo=True, showbanner=False, sid=None, loglabel=None, loglevel='all'):
+    def __init__(
+        self, executable='vivado', prompt=None, stopOnCWarnings=False, echo=True, showbanner=False, sid=None,
+        loglabel=None, loglevel='all', framed=False, wait=True,
+    ):
         """
         Args:
             executable (str): Executable name
@@ -130,12 +138,18 @@ class VivadoConsole(object):
             showbanner (bool, optional): Show Vivado startup banner
             sid (str): Session id
             loglabel (None, optional): log files name
+            framed (bool, optional): Frame the commands with sentinel lines (see TCLFramer) instead of checking their echo
+            wait (bool, optional): Wait for Vivado to start up, otherwise `wait` must be called before using the console
         
         Raises:
             VivadoNotFoundError: Description
         
         """
         super().__init__()
+        self._framer = None
+        self._framed = framed
+        self._ready = False
+        self._variant = self._version = None
 
         # Set up logger first
         self._log = logging.getLogger('Vivado')
@@ -183,21 +197,45 @@ class VivadoConsole(object):
         # Set send delay
         self._process.delaybeforesend = 0.00  # 1
 
+        # Create a process descriptor
+        self._processinfo = psutil.Process(self._process.pid)
+        # Helpers for batched commands and query results, set up on first use
+        self._batch = None
+        self._results = None
+        self._echo = echo
+
+        # Method mapping
+        self.isAlive = self._process.isalive
+        # Add self to the list of instances
+        self.__instances.add(self)
+
+        if wait:
+            self.wait()
+
+    # --------------------------------------------------------------
+    def wait(self):
+        """
+        Waits for Vivado to start up, can be called from a different thread
+        """
+        if self._ready:
+            return
+
         # Wait for vivado to wake up
         startupstr = self.__expectPrompt()
         
         # Extract version infomation
         self._variant, self._version = _parseversion(''.join(startupstr[0]))
-        self._out.quiet = (not echo)
+        self._out.quiet = (not self._echo)
         self._log.debug('Vivado up and running')
         self._out.write('\n' + '- Started {} {} -'.format(self.variant, self.version)+'-' * 40 + '\n')
 
-        # Create a process descriptor
-        self._processinfo = psutil.Process(self._process.pid)
-        # Method mapping
-        self.isAlive = self._process.isalive
-        # Add self to the list of instances
-        self.__instances.add(self)
+        if self._framed:
+            lFramer = TCLFramer()
+            lFramer.setup(self._process, self._prompt)
+            self._out.skipprefixes += lFramer.skipprefixes
+            self._framer = lFramer
+
+        self._ready = True
 
     # --------------------------------------------------------------
     @property
@@ -219,6 +257,24 @@ class VivadoConsole(object):
     def stopOnCWarnings(self, stop):
         self._stopOnCWarnings = stop
 
+    # --------------------------------------------------------------
+    @property
+    def framed(self):
+        return self._framed
+
+    # --------------------------------------------------------------
+    @property
+    def ready(self):
+        return self._ready
+
+    # --------------------------------------------------------------
+    @property
+    def maxcmdlen(self):
+        """
+        Maximum command length, None if unlimited
+        """
+        return None if self.framed else self.kMaxCmdLen
+
     # --------------------------------------------------------------
     @property
     def sessionid(self):
@@ -329,7 +385,13 @@ class VivadoConsole(object):
     # --------------------------------------------------------------
 
     # --------------------------------------------------------------
-    def close(self):
+    def close(self, force=False):
+        """
+        Quits Vivado
+
+        Args:
+            force (bool, optional): Terminate Vivado without sending `quit`, e.g. if busy with an interrupted command
+        """
 
         # Return immediately of already dead
         if not hasattr(self, '_process') or not self._process.isalive():
@@ -342,37 +404,133 @@ class VivadoConsole(object):
             return
 
         self._log.debug('Shutting Vivado down')
-        try:
-            self.execute('quit')
-        except pexpect.ExceptionPexpect:
-            pass
+        # Still starting up, no prompt to send the command to
+        if self._ready and not force:
+            try:
+                self.execute('quit')
+            except pexpect.ExceptionPexpect:
+                pass
 
         # Write one last newline
         self._out.write('- Terminating Vivado (pid {}) -'.format(self._process.pid)+'-' * 40 + '\n')
         # Just in case
         self._process.terminate(True)
 
+        if self._framer is not None:
+            self._framer.close()
+        if self._results is not None:
+            self._results.close()
+
         # Remove self from the list of instances
         self.__instances.remove(self)
 
-
-    
     # --------------------------------------------------------------
-    def execute(self, aCmd, aMaxLen=1):
-        if not isinstance(aCmd, str):
-            raise TypeError('expected string, found '+str(type(aCmd)))
+    def __run(self, aCmd, aMaxLen):
+        if self._framer is not None:
+            lLines, lErrors, lCriticalWarnings = self._framer.run(
+                self._process, self._prompt, aCmd, self.__reError, self.__reCriticalWarning, 'VivadoConsole'
+            )
+            lBuffer = collections.deque(lLines, aMaxLen)
+            if not lBuffer:
+                lBuffer.append(None)
+            return lBuffer, lErrors, lCriticalWarnings
 
         if aCmd.count('\n') != 0:
             raise ValueError('Format error. Newline not allowed in commands')
 
         self.__send(aCmd)
-        lBuffer, lErrors, lCriticalWarnings = self.__expectPrompt(aMaxLen)
+        return self.__expectPrompt(aMaxLen)
+
+
+    # --------------------------------------------------------------
+    def execute(self, aCmd, aMaxLen=1):
+        if not isinstance(aCmd, str):
+            raise TypeError('expected string, found '+str(type(aCmd)))
+
+        lBuffer, lErrors, lCriticalWarnings = self.__run(aCmd, aMaxLen)
 
         if lErrors or (self._stopOnCWarnings and lCriticalWarnings):
             raise VivadoConsoleError(aCmd, lErrors, lCriticalWarnings)
 
         return tuple(lBuffer)
 
+    # --------------------------------------------------------------
+    def execute_many(self, aCmds, aStopOnError=True):
+        """Executes a list of commands, with a single round trip for up to a few kB of commands
+
+        Args:
+            aCmds (list): TCL commands
+            aStopOnError (bool): Skip the commands following the first failing one
+
+        Returns:
+            list: TclResult of each command run
+
+        Raises:
+            VivadoConsoleError: First failing command, if any
+        """
+        if self._batch is None:
+            # Framed commands have no length limit
+            lBatch = TCLBatch(maxlen=None) if self.framed else TCLBatch()
+            self.execute(lBatch.definition())
+            self._out.skipprefixes += (lBatch.marker,)
+            self._batch = lBatch
+
+        lResults = []
+        lFailed = None
+        for lLine, lCmds in self._batch.lines(aCmds, aStopOnError):
+            lBuffer, _, _ = self.__run(lLine, None)
+
+            for r in self._batch.parse(lCmds, lBuffer):
+                lResults.append(r)
+                if lFailed is None and (r.code == 1 or r.errors or (self._stopOnCWarnings and r.criticalWarns)):
+                    lFailed = r
+
+            if lFailed is not None and aStopOnError:
+                break
+
+        if lFailed is not None:
+            raise VivadoConsoleError(lFailed.command, lFailed.errors or [lFailed.result], lFailed.criticalWarns)
+
+        return lResults
+
+    # --------------------------------------------------------------
+    def query(self, aScript):
+        """Evaluates a TCL script, reading its result back from a file rather than the console output
+
+        Args:
+            aScript (str): TCL script, on a single line
+
+        Returns:
+            str: Result of the script, use tclsplit to unpack lists
+
+        Raises:
+            VivadoConsoleError: The script failed
+        """
+        if self._results is None:
+            self._results = TCLResultFile()
+
+        self.execute(self._results.command(aScript))
+        lCode, lResult = self._results.read()
+        if lCode == 1:
+            raise VivadoConsoleError(aScript, [lResult], [])
+        return lResult
+
+    # --------------------------------------------------------------
+    def report(self, aCmd):
+        """Runs a report command, returning the report written with `-file`
+
+        Args:
+            aCmd (str): Report command (e.g. report_utilization), without -file
+
+        Returns:
+            str: Report text
+        """
+        if self._results is None:
+            self._results = TCLResultFile()
+
+        self.execute('{} -file {}'.format(aCmd, tclquote(self._results.path)))
+        return self._results.text()
+
     # --------------------------------------------------------------
     def changeMsgSeverity(self, aIds, aSeverity):
         """Change the severity of a single/multiple messages
@@ -382,8 +540,9 @@ class VivadoConsole(object):
             aSeverity (str): Target severity
         """
         lIds = aIds if isinstance(aIds, list) else [aIds]
-        for c in ('reset_msg_config -id {{{}}} -default_severity; set_msg_config -id {{{}}} -new_severity {{{}}}'.format(i, i, aSeverity) for i in lIds):
-            self.execute(c)
+        self.execute_many([
+            'reset_msg_config -id {{{}}} -default_severity; set_msg_config -id {{{}}} -new_severity {{{}}}'.format(i, i, aSeverity) for i in lIds
+        ])
 
 
 #-------------------------------------------------------------------------------
@@ -399,6 +558,70 @@ class VivadoSession(VivadoConsole):
 VivadoSnoozer = TCLConsoleSnoozer
 
 
+# -------------------------------------------------------------------------
+class AsyncVivadoConsole(AsyncTCLConsole):
+    """Vivado TCL console driven by an asyncio event loop
+
+    Sessions started with different ids can run commands concurrently:
+
+        async with AsyncVivadoConsole(sid='proj_a') as a, AsyncVivadoConsole(sid='proj_b') as b:
+            await asyncio.gather(a.execute('launch_runs synth_1 -jobs 4'), b.execute('launch_runs synth_1 -jobs 4'))
+
+    Attributes:
+        variant (str): Vivado variant
+        version (str): Vivado version
+    """
+
+    kQuitCmd = 'quit'
+    __promptMap = {
+        'vivado': re.compile(r'Vivado%\s'),
+        'vivado_lab': re.compile(r'vivado_lab%\s')
+    }
+
+    # --------------------------------------------------------------
+    def __init__(self, executable='vivado', prompt=None, stopOnCWarnings=False, echo=True, showbanner=False, sid=None, loglabel=None, loglevel='all'):
+        """
+        Args:
+            executable (str): Executable name
+            prompt (std, optional): Prompt string
+            stopOnCWarnings (bool): Stop on Critical Warnings
+            echo (bool): Switch to enable echo messages
+            showbanner (bool, optional): Show Vivado startup banner
+            sid (str): Session id, prefixing the output lines
+            loglabel (None, optional): log files name
+            loglevel (str, optional): Lowest severity of the messages shown
+
+        Raises:
+            VivadoNotFoundError: executable not found in PATH
+        """
+        if not which(executable):
+            raise VivadoNotFoundError(executable + " not found in PATH. Have you sourced Vivado\'s setup script?")
+
+        # If loglabel is not specified, use sid
+        loglabel = loglabel if loglabel else sid
+        lLogName = executable + (('_' + loglabel) if loglabel else '')
+        super().__init__(
+            executable,
+            ['-mode', 'tcl', '-log', lLogName+'.log', '-journal', lLogName+'.jou'],
+            prompt=prompt if prompt is not None else self.__promptMap[executable],
+            out=VivadoOutputFormatter(sid, loglevel=loglevel),
+            name='Vivado',
+            stopOnCWarnings=stopOnCWarnings,
+            echo=echo,
+            showbanner=showbanner,
+        )
+        self.variant = self.version = None
+
+    # --------------------------------------------------------------
+    def _started(self):
+        self.variant, self.version = _parseversion(self.banner)
+        self._write('- Started {} {} -'.format(self.variant, self.version)+'-' * 40 + '\n')
+
+    # --------------------------------------------------------------
+    def _error(self, aCmd, aErrors, aCriticalWarns):
+        return VivadoConsoleError(aCmd, aErrors, aCriticalWarns)
+
+
 # ------------------------------------------------------------------------------
 class VivadoSessionContextAdapter(object):
 
@@ -430,6 +653,61 @@ class VivadoSessionContextAdapter(object):
             self._console = None
     
 
+# ------------------------------------------------------------------------------
+class VivadoConsolePool(object):
+    """
+    Idle Vivado consoles, kept alive to be reused by the next commands
+
+    Consoles are only reused in the working directory and with the output
+    settings they were started with. At most `maxidle` consoles are kept.
+    """
+
+    def __init__(self, maxidle=2):
+        super().__init__()
+        self.maxidle = maxidle
+        self._idle = []
+
+    def __len__(self):
+        return len(self._idle)
+
+    @staticmethod
+    def _key(echo, loglevel, framed):
+        return (os.getcwd(), echo, loglevel, framed)
+
+    def acquire(self, echo, loglevel, framed=False):
+        """
+        Returns an idle console, None if no suitable console is available
+        """
+        lKey = self._key(echo, loglevel, framed)
+        for i, (k, lConsole) in enumerate(self._idle):
+            if k == lKey:
+                del self._idle[i]
+                if lConsole.isAlive():
+                    return lConsole
+                lConsole.close()
+                return self.acquire(echo, loglevel, framed)
+        return None
+
+    def release(self, aConsole, echo, loglevel):
+        """
+        Returns a console to the pool, closing the oldest idle one if the pool is full
+        """
+        if not aConsole.isAlive():
+            return
+
+        # Back to the default output settings
+        aConsole.quiet = (not echo)
+        aConsole.sessionid = None
+
+        self._idle.append((self._key(echo, loglevel, aConsole.framed), aConsole))
+        while len(self._idle) > self.maxidle:
+            self._idle.pop(0)[1].close()
+
+    def close(self):
+        while self._idle:
+            self._idle.pop()[1].close()
+
+
 # ------------------------------------------------------------------------------
 class VivadoSessionManager(object):
     """docstring for VivadoSessionManager
@@ -437,33 +715,97 @@ class VivadoSessionManager(object):
     Attributes:
         persistent (TYPE): Description
     """
-    def __init__(self, keep=False, echo=True, loglabel=None, loglevel='all'):
+    def __init__(self, keep=False, echo=True, loglabel=None, loglevel='all', pool=None, framed=False):
         """Constructor
         
         Args:
             keep (TYPE): Description
+            pool (VivadoConsolePool, optional): Idle consoles to start from, and to return the kept console to
+            framed (bool, optional): Start the consoles in framed mode
         """
         super().__init__()
         self._keep = keep
         self._echo = echo
         self._loglabel = loglabel
         self._loglevel = loglevel
+        self._pool = pool
+        self._framed = framed
+        # Console starting up in the background, and its startup outcome
+        self._starting = None
         if self._keep:
             self._console = None
 
     def __del__(self):
-        if self._keep and self._console:
-            self._console.close()
+        self.close()
+
+    def close(self, release=True):
+        """
+        Closes the kept console, or returns it to the pool
+
+        A console still starting up is killed.
+
+        Args:
+            release (bool, optional): Return the kept console to the pool, if any. Otherwise the console
+                is closed, without waiting for the command it may be running.
+        """
+        if self._starting is not None:
+            lConsole, _ = self._starting
+            self._starting = None
+            lConsole.close()
+
+        if not self._keep or not self._console:
+            return
+
+        if self._pool is not None and release:
+            self._pool.release(self._console, self._echo, self._loglevel)
+        else:
+            self._console.close(force=not release)
+        self._console = None
+
+    def prewarm(self):
+        """
+        Starts the kept console in the background, to be picked up by the first session
+
+        Vivado is spawned right away, and its start up awaited in a separate
+        thread. Idle consoles of the pool are used first.
+        """
+        if not self._keep or self._console or self._starting is not None:
+            return
+
+        if self._pool is not None:
+            self._console = self._pool.acquire(self._echo, self._loglevel, self._framed)
+            if self._console:
+                return
+
+        lConsole = VivadoConsole(loglabel=self._loglabel, echo=self._echo, loglevel=self._loglevel, framed=self._framed, wait=False)
+        lStartup = Future()
+
+        def wait():
+            try:
+                lConsole.wait()
+                lStartup.set_result(lConsole)
+            except BaseException as lExc:
+                lStartup.set_exception(lExc)
+
+        # Daemon thread, not to hold the interpreter exit if the console is never used
+        threading.Thread(target=wait, name='vivado-prewarm', daemon=True).start()
+        self._starting = (lConsole, lStartup)
 
     def _getconsole(self, sid):
 
         if self._keep:
+            if not self._console and self._starting is not None:
+                _, lStartup = self._starting
+                self._starting = None
+                self._console = lStartup.result()
+            if not self._console and self._pool is not None:
+                self._console = self._pool.acquire(self._echo, self._loglevel, self._framed)
             if not self._console:
-                self._console = VivadoConsole(sid=sid, loglabel=self._loglabel, echo=self._echo, loglevel=self._loglevel)
+                self._console = VivadoConsole(sid=sid, loglabel=self._loglabel, echo=self._echo, loglevel=self._loglevel, framed=self._framed)
             self._console.sessionid = sid
             return self._console
         else:
-            return VivadoConsole(sid=sid, loglabel=self._loglabel, echo=self._echo, loglevel=self._loglevel)
+            return VivadoConsole(sid=sid, loglabel=self._loglabel, echo=self._echo, loglevel=self._loglevel, framed=self._framed)
 
 
     def getctx(self, sid):
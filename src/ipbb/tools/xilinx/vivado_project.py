@@ -2,6 +2,7 @@
 from os.path import join, dirname, splitext, abspath
 from collections import OrderedDict
 from .vivado_console import VivadoConsole
+from ..tcl_console import tclsplit, tclquote
 
 # ------------------------------------------------------------------------------
 class VivadoProject(object):
@@ -65,21 +66,21 @@ class VivadoProject(object):
             None
         """
 
-        cp = self.current()
-        if cp:
-            # cp_dir = self.console('get_property DIRECTORY [current_project]')[0]
-            cp_dir = self.get_property('DIRECTORY')
-
+        # Project file of the current project, if any
+        cp_path = self.console('if {[current_project -quiet] ne ""} {file join [get_property DIRECTORY [current_project]] [current_project].xpr}')[0]
+        lCmds = []
+        if cp_path:
             # Use the path to check if the open project and the requested are the same
-            if abspath(join(cp_dir, cp+'.xpr')) == abspath(aPath):
+            if abspath(cp_path) == abspath(aPath):
                 # They are, do nothing
                 return
 
             # Close it otherwise
-            self.close()
+            lCmds.append('close_project')
 
         # Open the right one
-        self.console('open_project {}'.format(aPath))
+        lCmds.append('open_project {}'.format(aPath))
+        self.console.execute_many(lCmds)
 
     # ------------------------------------------------------------------------------
     # def create(self):
@@ -98,18 +99,17 @@ class VivadoProject(object):
 
     # ------------------------------------------------------------------------------
     def reset_runs(self, *args):
-        for r in args:
-            self.console('reset_run {}'.format(r))
+        self.console.execute_many(['reset_run {}'.format(r) for r in args])
 
     # ------------------------------------------------------------------------------
     def read_run_info(self, aProps=None):
-        """Reads 
+        """Reads the properties of all runs, with a single query
         
         Args:
-            aProps (None, optional): Description
+            aProps (list, optional): Run properties to read
         
         Returns:
-            TYPE: Description
+            dict: Properties of each run, by run name
         """
         lInfos = {}
         lProps = aProps if aProps is not None else (
@@ -122,15 +122,15 @@ class VivadoProject(object):
             # 'STATS.ELAPSED',
         )
 
-        # Gather data about existing runs
-        lRuns = self.console('get_runs')[0].split()
-
-        for lRun in sorted(lRuns):
+        # Gather data about existing runs, as a list of {run value1 value2 ...}
+        lRows = tclsplit(self.console.query(
+            'set l {{}}; foreach r [get_runs] {{ set v [list $r]; foreach p {} {{ lappend v [get_property $p [get_runs $r]] }}; lappend l $v }}; set l'.format(
+                tclquote(' '.join(lProps))
+            )
+        ))
 
-            lValues = (
-                    self.console(f'get_property {p} [get_runs {lRun}]')[0]
-                    for p in lProps
-                )
+        for lRow in sorted(lRows):
+            lRun, *lValues = tclsplit(lRow)
             lInfos[lRun] = OrderedDict(zip(lProps, lValues))
 
         return lInfos
@@ -141,13 +141,21 @@ class VivadoProject(object):
         lConsole = self.console
         lFiles = {}
         lFileSets = lConsole('get_filesets')[0].split()
-        for s in lFileSets:
-            x = lConsole('get_files -quiet -of [get_fileset {}]'.format(s))[0]
-            lFiles[s] = x.split() if x else None
         lIPs = lConsole('get_ips -quiet')[0]
-        lXcis = []
-        for ip in lIPs.split():
-            lXcis += lConsole('get_property IMPORTED_FROM [get_files -quiet -of [get_filesets {0}] {{{1}}}]'.format(ip, ' '.join([ip+ext for ext in ['.xci', '.xcix']]) ))
+        lIPs = lIPs.split() if lIPs else []
+
+        lResults = lConsole.execute_many(
+            ['get_files -quiet -of [get_fileset {}]'.format(s) for s in lFileSets] +
+            [
+                'get_property IMPORTED_FROM [get_files -quiet -of [get_filesets {0}] {{{1}}}]'.format(
+                    ip, ' '.join([ip+ext for ext in ['.xci', '.xcix']])
+                )
+                for ip in lIPs
+            ]
+        )
+
+        for s, r in zip(lFileSets, lResults):
+            lFiles[s] = r.result.split() if r.result else None
         
-        lFiles['ips'] = lXcis
+        lFiles['ips'] = [r.result for r in lResults[len(lFileSets):]]
         return lFiles
\ No newline at end of file
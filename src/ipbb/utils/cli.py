@@ -56,6 +56,22 @@ def validateMultiplePackageOrComponents(ctx, param: str, value: str ) -> tuple:
 
     return tuple(pocs)
 
+# ------------------------------------------------------------------------------
+def validateMultipleComponentDepFiles(ctx, param: str, value: str) -> tuple:
+    """
+    Validate a sequence of package:component[:depfile] strings
+    """
+    lTops = []
+    for v in value:
+        lTop = tuple(v.split(':'))
+        # Validate the format
+        if len(lTop) not in (2, 3) or not all(lTop):
+            raise BadParameter('Malformed top dep file : %s. Expected <package>:<component>[:<dep file>]' % v)
+
+        lTops.append(lTop)
+
+    return tuple(lTops)
+
 # ------------------------------------------------------------------------------
 def validateOptionalComponent(ctx, param: str, value: str) -> tuple:
     """
@@ -2,9 +2,6 @@ from typing import NoReturn
 
 from ..tools.alien import AlienBranch
 from ..console import cprint, console
-from rich.table import Table
-from rich.panel import Panel
-from rich.style import Style
 
 
 # ------------------------------------------------------------------------------
@@ -15,6 +12,8 @@ def printDictTable(aDict, aHeader=True, aSort=True, aFmtr=None):
 # ------------------------------------------------------------------------------
 def formatDictTable(aDict, aHeader=True, aSort=True, aFmtr=str):
 
+    from rich.table import Table
+
     lDictTable = Table('name', 'value', show_header=aHeader)
     for k in (sorted(aDict) if aSort else aDict):
         v = aDict[k]
@@ -29,6 +28,8 @@ def printAlienTable(aBranch, aHeader=True, aSort=True, aFmtr=None):
 
 # ------------------------------------------------------------------------------
 def formatAlienTable(aBranch, aHeader=True, aSort=True, aFmtr=str):
+    from rich.table import Table
+
     lAlienTable = Table('name', 'value', show_header=aHeader)
 
     for k in (sorted(aBranch) if aSort else aBranch):
@@ -43,6 +44,9 @@ def formatAlienTable(aBranch, aHeader=True, aSort=True, aFmtr=str):
 # ------------------------------------------------------------------------------
 def notice_panel(message: str, title: str, color: str):
 
+    from rich.panel import Panel
+    from rich.style import Style
+
     cprint(Panel(f"{message}", title=title, style=Style(color=color, italic=True)))
 
 # ------------------------------------------------------------------------------
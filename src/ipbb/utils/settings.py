@@ -0,0 +1,86 @@
+import os
+import copy
+import threading
+
+# Parsed yaml files: path -> (stamp, content)
+_kYamlCache = {}
+# Compiled cerberus validators: (schema id, options) -> (schema, validator)
+_kValidators = {}
+_kLock = threading.Lock()
+
+
+# ------------------------------------------------------------------------------
+def file_stamp(aPath):
+    """
+    Returns the modification time and size of a file, None if it doesn't exist
+    """
+    try:
+        st = os.stat(aPath)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+# ------------------------------------------------------------------------------
+def _yaml_loader():
+    import yaml
+
+    # The libyaml loader is much faster, if available
+    return getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+# ------------------------------------------------------------------------------
+def load_yaml(aPath):
+    """
+    Loads a yaml file, reusing the content parsed earlier if the file is unchanged
+
+    The content is memoized by path, modification time and size. A copy is
+    returned, callers are free to modify it.
+    """
+    import yaml
+
+    lStamp = file_stamp(aPath)
+    with _kLock:
+        lEntry = _kYamlCache.get(aPath)
+
+    if lEntry is None or lStamp is None or lEntry[0] != lStamp:
+        with open(aPath, 'r') as f:
+            lData = yaml.load(f, Loader=_yaml_loader())
+        lEntry = (lStamp, lData)
+        with _kLock:
+            _kYamlCache[aPath] = lEntry
+
+    return copy.deepcopy(lEntry[1])
+
+
+# ------------------------------------------------------------------------------
+def dump_yaml(aData, aPath, **kwargs):
+    """
+    Writes a yaml file, forgetting its memoized content
+    """
+    import yaml
+
+    with _kLock:
+        _kYamlCache.pop(aPath, None)
+    with open(aPath, 'w') as f:
+        yaml.safe_dump(aData, f, **kwargs)
+
+
+# ------------------------------------------------------------------------------
+def get_validator(aSchema, **kwargs):
+    """
+    Returns a cerberus validator for a schema, compiled on first use
+
+    Validators are shared, and hold the state of the last validation: they are
+    not meant to be used by several threads at once.
+    """
+    import cerberus
+
+    lKey = (id(aSchema), tuple(sorted(kwargs.items())))
+    with _kLock:
+        lEntry = _kValidators.get(lKey)
+        if lEntry is None:
+            # The schema is kept alive with its validator, so its id cannot be reused
+            lEntry = (aSchema, cerberus.Validator(aSchema, **kwargs))
+            _kValidators[lKey] = lEntry
+    return lEntry[1]
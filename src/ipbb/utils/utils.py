@@ -10,8 +10,6 @@ import re
 
 from click import get_current_context, ClickException, Abort, BadParameter
 from os.path import join, relpath, exists, split, realpath
-from rich.prompt import Confirm
-from rich.table import Table
 from typing import NoReturn
 
 from locale import getpreferredencoding
@@ -239,6 +237,8 @@ def ensureNoMissingFiles(aCurrentProj, aDepFileParser):
     ), style='red')
     cprint(fmt.draw_unresolved_files(), style='red')
 
+    from rich.prompt import Confirm
+
     cprint("")
     if not Confirm.ask("Do you want to continue anyway?"):
         raise Abort()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Synthetic dep tree generator, for parser benchmarks.
+
+The generated trees are described in the same layout as the `tests/repogen`
+files, i.e. a `{directory: {file: content}}` dictionary, so that small trees
+can be dumped to yaml and inspected with `tests/scripts/generate-ipbb-repo.py`.
+
+Tree structure:
+- a `top` package, whose `top` component defines the settings and includes
+  the root component of every package;
+- each package holds a tree of components of the given depth and fan-out,
+  each including its children and globbing `files` source files;
+- a fraction of the commands are guarded by conditionals on the settings.
+"""
+import os
+import click
+import yaml
+
+from collections import namedtuple
+from os.path import join
+
+
+DepTreeSpec = namedtuple(
+    'DepTreeSpec',
+    ['packages', 'depth', 'fanout', 'files', 'conditionals', 'settings'],
+)
+
+# Tree sizes used by the benchmarks, roughly 10^3, 10^4 and 10^5 source files
+kSizes = {
+    'small': DepTreeSpec(packages=2, depth=2, fanout=3, files=40, conditionals=0.2, settings=20),
+    'medium': DepTreeSpec(packages=5, depth=3, fanout=3, files=50, conditionals=0.2, settings=100),
+    'large': DepTreeSpec(packages=10, depth=3, fanout=4, files=120, conditionals=0.2, settings=500),
+}
+
+
+# -----------------------------------------------------------------------------
+def _components(aDepth, aFanout, aPrefix='c'):
+    """
+    Yields the components of a tree, with their children, parents first
+    """
+    lChildren = [f'{aPrefix}/c{i}' for i in range(aFanout)] if aDepth > 0 else []
+    yield aPrefix, lChildren
+    for c in lChildren:
+        yield from _components(aDepth - 1, aFanout, c)
+
+
+# -----------------------------------------------------------------------------
+def make_deptree(aSpec):
+    """
+    Creates the description of a synthetic dep tree
+
+    Returns:
+        dict: repogen-like description, with `files` and `top` entries, plus
+            the number of dep files and source files expected from parsing
+    """
+    lFiles = {}
+    lLines = [f'@bench.s{i} = {i}' for i in range(aSpec.settings)]
+    lLines += [f'include -c pkg{p}:c' for p in range(aSpec.packages)]
+    lFiles['top/top/firmware/cfg'] = {'top.dep': '\n'.join(lLines) + '\n'}
+
+    # One command every 1/conditionals is guarded by an (always true) conditional
+    lStride = round(1 / aSpec.conditionals) if aSpec.conditionals > 0 else 0
+    lCount = 0
+
+    def guard(aLine):
+        nonlocal lCount
+        lCount += 1
+        if lStride and lCount % lStride == 0:
+            return f'? bench.s{lCount % max(aSpec.settings, 1)} >= 0 ? {aLine}'
+        return aLine
+
+    lNumDepFiles = 1
+    for p in range(aSpec.packages):
+        for lCmp, lChildren in _components(aSpec.depth, aSpec.fanout):
+            lName = lCmp.split('/')[-1]
+            lLines = [f'# {lCmp}']
+            lLines += [guard(f'include -c {c}') for c in lChildren]
+            lLines += [guard('src *.vhd'), guard(f'src -l lib{p} --vhdl2008 pkg/{lName}_pkg.vhd')]
+            lFiles[f'pkg{p}/{lCmp}/firmware/cfg'] = {f'{lName}.dep': '\n'.join(lLines) + '\n'}
+            lFiles[f'pkg{p}/{lCmp}/firmware/hdl'] = {f'{lName}_f{i}.vhd': '' for i in range(aSpec.files)}
+            lFiles[f'pkg{p}/{lCmp}/firmware/hdl/pkg'] = {f'{lName}_pkg.vhd': ''}
+            lNumDepFiles += 1
+
+    return {
+        'name': 'bench',
+        'multi_pkg': True,
+        'files': lFiles,
+        'top': [{'pkg': 'top', 'cmp': 'top', 'file': 'top.dep'}],
+        'depfiles': lNumDepFiles,
+        # globbed files, plus the package file
+        'srcs': (lNumDepFiles - 1) * (aSpec.files + 1),
+    }
+
+
+# -----------------------------------------------------------------------------
+def write_deptree(aTree, aDest):
+    """
+    Writes the tree files under aDest, as generate-ipbb-repo.py does
+    """
+    for d, fs in aTree['files'].items():
+        ad = join(aDest, d)
+        os.makedirs(ad, exist_ok=True)
+        for f, t in fs.items():
+            with open(join(ad, f), 'w') as lFile:
+                lFile.write(t)
+
+
+# -----------------------------------------------------------------------------
+@click.command()
+@click.argument('dest', type=click.Path())
+@click.option('-s', '--size', type=click.Choice(list(kSizes)), default=None, help='Predefined tree size.')
+@click.option('-p', '--packages', type=int, default=2, show_default=True)
+@click.option('-d', '--depth', type=int, default=2, show_default=True, help='Include depth within each package.')
+@click.option('-f', '--fanout', type=int, default=3, show_default=True, help='Components included by each component.')
+@click.option('-n', '--files', type=int, default=10, show_default=True, help='Source files matched by each glob.')
+@click.option('-c', '--conditionals', type=float, default=0.2, show_default=True, help='Fraction of commands guarded by conditionals.')
+@click.option('--settings', type=int, default=20, show_default=True, help='Number of settings defined in the top dep file.')
+@click.option('--yaml', 'as_yaml', is_flag=True, help='Dump the tree as a repogen yaml file instead.')
+def main(dest, size, packages, depth, fanout, files, conditionals, settings, as_yaml):
+    '''Generates a synthetic dep tree in DEST'''
+    lSpec = kSizes[size] if size else DepTreeSpec(packages, depth, fanout, files, conditionals, settings)
+    lTree = make_deptree(lSpec)
+
+    if as_yaml:
+        with open(dest, 'w') as f:
+            yaml.safe_dump({k: lTree[k] for k in ('name', 'multi_pkg', 'files', 'top')}, f)
+    else:
+        write_deptree(lTree, dest)
+    click.echo(f"{lSpec}: {lTree['depfiles']} dep files, {lTree['srcs']} source files")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Settings tree benchmarks, with 10k settings
+
+Run with:
+    pytest tests/benchmarks --benchmark-group-by=func
+"""
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from ipbb.tools.alien import AlienTree
+from ipbb.depparser import DepFileParser, Pathmaker
+
+kNumSettings = 10000
+kKeys = [f'grp{i % 100}.sub{i % 7}.s{i}' for i in range(kNumSettings)]
+
+
+# -----------------------------------------------------------------------------
+def test_assign(benchmark):
+
+    def assign():
+        # Same access pattern as dep file assignments
+        tree = AlienTree()
+        for i, k in enumerate(kKeys):
+            assert k not in tree
+            tree.lock(True)
+            tree.lock(False)
+            tree[k] = i
+        return tree
+
+    tree = benchmark(assign)
+    assert len(list(tree.keys())) == kNumSettings
+
+
+# -----------------------------------------------------------------------------
+def test_lookup(benchmark):
+    tree = AlienTree()
+    for i, k in enumerate(kKeys):
+        tree[k] = i
+    tree.lock(True)
+
+    def lookup():
+        for k in kKeys:
+            tree[k]
+            tree.get(k)
+
+    benchmark(lookup)
+
+
+# -----------------------------------------------------------------------------
+def test_parse_assignments(benchmark, tmp_path):
+    cfg = tmp_path / 'pkg' / 'cmp' / 'firmware' / 'cfg'
+    cfg.mkdir(parents=True)
+    (cfg / 'top.dep').write_text(''.join(f'@{k} = {i}\n' for i, k in enumerate(kKeys)))
+
+    def parse():
+        dp = DepFileParser('vivado', Pathmaker(str(tmp_path)))
+        dp.parse('pkg', 'cmp', 'top.dep')
+        return dp
+
+    dp = benchmark.pedantic(parse, rounds=3)
+    assert dp.settings[kKeys[-1]] == kNumSettings - 1
@@ -0,0 +1,40 @@
+"""
+Dep command parser micro-benchmarks
+
+Run with:
+    pytest tests/benchmarks --benchmark-group-by=func
+"""
+import pytest
+import shlex
+
+pytest.importorskip('pytest_benchmark')
+
+from ipbb.depparser._cmdparser import DepCmdParser, split_line
+
+kLines = [
+    'src a.vhd b.vhd c.vhd',
+    'src -c pkg:cmp -l mylib --vhdl2008 ipbus_decode_top.vhd',
+    'src -u sim --simflags=-novopt tb.vhd',
+    'src -f simulation sim.xdc',
+    'include -c pkg:cmp sub.dep',
+    'include',
+    'setup -f finalise.tcl',
+    'addrtab -t top.xml',
+    'hlssrc --tb -i pkg:cmp --cflags=-O2 tb.cpp',
+    'iprepo ip',
+] * 100
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize('fastpath', [True, False], ids=['fastpath', 'argparse'])
+def test_parse_lines(benchmark, fastpath):
+
+    parser = DepCmdParser()
+    parser.fastpath = fastpath
+    tokenize = split_line if fastpath else shlex.split
+
+    def parse():
+        for l in kLines:
+            parser.parse_line(tokenize(l), current_package='p', current_component='c')
+
+    benchmark(parse)
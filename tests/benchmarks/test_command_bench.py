@@ -0,0 +1,99 @@
+"""
+Command objects memory and throughput benchmarks, compared with the former
+dict-based implementation copied with deepcopy.
+
+Run with:
+    pytest tests/benchmarks --benchmark-group-by=func
+"""
+import pytest
+import copy
+import tracemalloc
+
+pytest.importorskip('pytest_benchmark')
+
+from ipbb.depparser._cmdtypes import SrcCommand
+
+kEntries = 50000
+
+
+# -----------------------------------------------------------------------------
+class LegacySrcCommand(object):
+    """
+    Dict-based SrcCommand, as before the introduction of slots
+    """
+    def __init__(self, aCmd, aFilePath, aPackage, aComponent, aCd, aLib, aVhdl2008, aVhdl2019, aUseInSynth, aUseInSim, aUseFor, aSimflags):
+        self.cmd = aCmd
+        self.filepath = aFilePath
+        self.package = aPackage
+        self.component = aComponent
+        self.cd = aCd
+        self.lib = aLib
+        self.vhdl2008 = aVhdl2008
+        self.vhdl2019 = aVhdl2019
+        self.useInSynth = aUseInSynth
+        self.useInSim = aUseInSim
+        self.useFor = aUseFor
+        self.simflags = aSimflags
+
+
+# -----------------------------------------------------------------------------
+def _legacy_copy(aCmd, aFilePath, aPkg, aCmp):
+    cmd = copy.deepcopy(aCmd)
+    cmd.filepath = aFilePath
+    cmd.package = aPkg
+    cmd.component = aCmp
+    return cmd
+
+
+# -----------------------------------------------------------------------------
+def _slots_copy(aCmd, aFilePath, aPkg, aCmp):
+    return aCmd.clone(aFilePath, aPkg, aCmp)
+
+
+kImpls = {
+    'slots': (SrcCommand, _slots_copy),
+    'legacy': (LegacySrcCommand, _legacy_copy),
+}
+
+
+# -----------------------------------------------------------------------------
+def _expand(aImpl, aCount):
+    lClass, lCopy = kImpls[aImpl]
+    lTemplate = lClass('src', ['*.vhd'], 'pkg', 'cmp', None, 'mylib', True, None, True, True, ['synthesis', 'implementation'], None)
+    return [lCopy(lTemplate, f'/path/to/pkg/cmp/firmware/hdl/file_{i}.vhd', 'pkg', 'cmp') for i in range(aCount)]
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize('impl', list(kImpls))
+def test_command_copy(benchmark, impl):
+    benchmark(_expand, impl, 1000)
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize('impl', list(kImpls))
+def test_command_memory(benchmark, impl):
+
+    def measure():
+        tracemalloc.start()
+        lCmds = _expand(impl, kEntries)
+        lSize, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del lCmds
+        return lSize
+
+    lSize = benchmark.pedantic(measure, rounds=1, iterations=1)
+    benchmark.extra_info['bytes_per_command'] = lSize / kEntries
+
+
+# -----------------------------------------------------------------------------
+def test_command_memory_reduction():
+    tracemalloc.start()
+    lSizes = {}
+    for impl in kImpls:
+        lBefore, _ = tracemalloc.get_traced_memory()
+        lCmds = _expand(impl, kEntries)
+        lSizes[impl] = tracemalloc.get_traced_memory()[0] - lBefore
+        del lCmds
+    tracemalloc.stop()
+
+    assert lSizes['slots'] < lSizes['legacy']
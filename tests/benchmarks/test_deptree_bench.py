@@ -0,0 +1,76 @@
+"""
+Dep tree parsing and formatting on synthetic trees of increasing size.
+
+The 'large' tree (about 10^5 source files) takes a while to generate and is
+only included when IPBB_BENCH_LARGE is set.
+
+Run with:
+    pytest tests/benchmarks --benchmark-group-by=func
+"""
+import pytest
+import io
+import os
+import tracemalloc
+
+pytest.importorskip('pytest_benchmark')
+
+from rich.console import Console
+
+from ipbb.depparser import DepFileParser, DepFormatter, Pathmaker
+from deptree_gen import kSizes, make_deptree, write_deptree
+
+kSizeParams = [
+    pytest.param(s, marks=pytest.mark.skipif(s == 'large' and not os.environ.get('IPBB_BENCH_LARGE'), reason='IPBB_BENCH_LARGE not set'))
+    for s in kSizes
+]
+
+
+# -----------------------------------------------------------------------------
+@pytest.fixture(scope='module', params=kSizeParams)
+def deptree(request, tmp_path_factory):
+    lTree = make_deptree(kSizes[request.param])
+    lPath = tmp_path_factory.mktemp(request.param)
+    write_deptree(lTree, str(lPath))
+    return lPath, lTree
+
+
+# -----------------------------------------------------------------------------
+def _parse(aPath, aTree):
+    dp = DepFileParser('vivado', Pathmaker(str(aPath)))
+    lTop = aTree['top'][0]
+    dp.parse(lTop['pkg'], lTop['cmp'], lTop['file'])
+    assert len(dp.commands['src']) == aTree['srcs']
+    assert len(dp._depregistry) == aTree['depfiles']
+    assert not dp.errors and not dp.unresolved
+    return dp
+
+
+# -----------------------------------------------------------------------------
+def test_parse(benchmark, deptree):
+    lPath, lTree = deptree
+
+    benchmark.extra_info['depfiles'] = lTree['depfiles']
+    benchmark.extra_info['srcs'] = lTree['srcs']
+    benchmark.pedantic(_parse, args=deptree, rounds=3)
+
+    # Peak memory of a separate run, tracing slows parsing down
+    tracemalloc.start()
+    try:
+        _parse(lPath, lTree)
+        benchmark.extra_info['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+# -----------------------------------------------------------------------------
+def test_formatter(benchmark, deptree):
+    dp = _parse(*deptree)
+
+    def render():
+        lConsole = Console(file=io.StringIO(), width=200)
+        lFmt = DepFormatter(dp)
+        lConsole.print(lFmt.draw_summary())
+        lConsole.print(lFmt.draw_depfile_tree())
+        lConsole.print(lFmt.draw_components())
+
+    benchmark.pedantic(render, rounds=3)
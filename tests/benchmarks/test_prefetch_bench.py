@@ -0,0 +1,77 @@
+"""
+Dep tree parsing on a cold tree, with and without prefetching.
+
+Each run starts from a new parser and Pathmaker, and file system accesses
+are slowed down to mimic a network file system.
+
+Run with:
+    pytest tests/benchmarks --benchmark-group-by=func
+"""
+import pytest
+import os
+import time
+
+pytest.importorskip('pytest_benchmark')
+
+import ipbb.depparser._prefetch as prefetch
+from ipbb.depparser import DepFileParser, Pathmaker
+
+kLatency = 0.001
+
+
+# -----------------------------------------------------------------------------
+@pytest.fixture(scope='module')
+def cold_tree(tmp_path_factory):
+    src = tmp_path_factory.mktemp('src')
+    top = src / 'pkg' / 'top' / 'firmware'
+    (top / 'cfg').mkdir(parents=True)
+    (top / 'cfg' / 'top.dep').write_text(''.join(f'include -c cmp{i}\n' for i in range(20)))
+
+    for i in range(20):
+        cmp = src / 'pkg' / f'cmp{i}' / 'firmware'
+        (cmp / 'cfg').mkdir(parents=True)
+        (cmp / 'hdl').mkdir(parents=True)
+        (cmp / 'cfg' / f'cmp{i}.dep').write_text(
+            ''.join(f'include -c cmp{i}/sub{j}\n' for j in range(5)) + 'src *.vhd\n'
+        )
+        for j in range(5):
+            sub = src / 'pkg' / f'cmp{i}' / f'sub{j}' / 'firmware'
+            (sub / 'cfg').mkdir(parents=True)
+            (sub / 'hdl').mkdir(parents=True)
+            (sub / 'cfg' / f'sub{j}.dep').write_text('src *.vhd\n')
+            for k in range(10):
+                (sub / 'hdl' / f'f{k}.vhd').write_text('')
+    return src
+
+
+# -----------------------------------------------------------------------------
+@pytest.fixture
+def slow_fs(monkeypatch):
+    scandir = os.scandir
+
+    def slow_scandir(*args):
+        time.sleep(kLatency)
+        return scandir(*args)
+
+    def slow_open(*args, **kwargs):
+        time.sleep(kLatency)
+        return open(*args, **kwargs)
+
+    monkeypatch.setattr(os, 'scandir', slow_scandir)
+    monkeypatch.setattr(prefetch, 'open', slow_open, raising=False)
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize('workers', [0, 8], ids=['sequential', 'prefetch'])
+def test_parse_cold_tree(benchmark, cold_tree, slow_fs, workers):
+
+    def setup():
+        dp = DepFileParser('vivado', Pathmaker(str(cold_tree)))
+        dp.prefetch_workers = workers
+        return (dp,), {}
+
+    def parse(dp):
+        dp.parse('pkg', 'top', 'top.dep')
+        assert len(dp.commands['src']) == 1000
+
+    benchmark.pedantic(parse, setup=setup, rounds=5)
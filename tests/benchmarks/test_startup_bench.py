@@ -0,0 +1,26 @@
+"""
+Start-up time of the ipbb command line, compared with a bare interpreter.
+
+Run with:
+    pytest tests/benchmarks --benchmark-group-by=func
+"""
+import pytest
+import subprocess
+import sys
+
+pytest.importorskip('pytest_benchmark')
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize('statement', [
+    'pass',
+    'import ipbb.console_scripts.builder',
+    'import ipbb.console_scripts.builder as b; b._compose_cli()',
+], ids=['python', 'import', 'compose'])
+def test_startup_time(benchmark, statement):
+    benchmark.pedantic(
+        subprocess.run,
+        args=([sys.executable, '-c', statement],),
+        kwargs={'check': True},
+        rounds=10,
+    )
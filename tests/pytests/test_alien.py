@@ -123,3 +123,49 @@ def test_alientree_dict():
     assert tree.dict() == d
 
 
+
+
+# -----------------------------------------------------------------------------
+def test_alientree_index():
+    tree = AlienTree()
+    tree['a.b.c'] = 1
+    tree.trunk.x.y = 2
+
+    assert 'a.b.c' in tree and 'a.b' in tree and 'x.y' in tree
+    assert 'a.c' not in tree and 'a.b.c.d' not in tree
+    assert tree['x.y'] == 2
+    assert tree['x']['y'] == 2
+
+    # Replacing a branch drops its children
+    tree['a.b'] = 3
+    assert 'a.b.c' not in tree
+    assert tree['a.b'] == 3
+    assert set(tree) == {'a', 'a.b', 'x', 'x.y'}
+
+    # Branches assigned to the tree are indexed too
+    branch = AlienBranch()
+    branch.p.q = 4
+    tree['z'] = branch
+    assert tree['z.p.q'] == 4 and 'z.p' in tree
+
+    # The lock is shared by the whole tree
+    tree.lock(True)
+    assert tree.trunk.z.p._locked
+    with pytest.raises(KeyError):
+        tree.trunk.z.r
+    tree.lock(False)
+    tree.trunk.z.r
+    assert 'z.r' in tree
+
+
+# -----------------------------------------------------------------------------
+def test_alientree_pickle():
+    import pickle
+
+    tree = AlienTree()
+    tree['a.b'] = 1
+    tree = pickle.loads(pickle.dumps(tree))
+    tree['a.c'] = 2
+
+    assert 'a.b' in tree and 'a.c' in tree
+    assert tree.dict() == {'a': {'b': 1, 'c': 2}}
@@ -0,0 +1,182 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import ipbb
+from ipbb.defaults import kWorkAreaFile, kVarDir, kWorkDaemonSocket
+
+
+# -----------------------------------------------------------------------------
+@pytest.fixture
+def work_area(tmp_path):
+    (tmp_path / kWorkAreaFile).write_text('')
+    (tmp_path / 'src' / 'pkg' / 'cmp' / 'firmware' / 'cfg').mkdir(parents=True)
+    (tmp_path / 'proj').mkdir()
+    yield tmp_path
+
+    # Never leave a daemon behind
+    if (tmp_path / kVarDir / kWorkDaemonSocket).exists():
+        ipbb_cli(tmp_path, 'daemon', 'stop')
+
+
+# -----------------------------------------------------------------------------
+def ipbb_cli(aCwd, *aArgs, **aEnv):
+    lEnv = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(ipbb.__file__)), **aEnv)
+    return subprocess.run(
+        [sys.executable, '-c', 'from ipbb.console_scripts.client import main; main()', *aArgs],
+        cwd=str(aCwd),
+        env=lEnv,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        timeout=60,
+    )
+
+
+# -----------------------------------------------------------------------------
+def test_daemon(work_area):
+    lLocal = ipbb_cli(work_area, 'info')
+    assert lLocal.returncode == 0
+
+    lStart = ipbb_cli(work_area, 'daemon', 'start')
+    assert lStart.returncode == 0, lStart.stderr
+    assert (work_area / kVarDir / kWorkDaemonSocket).exists()
+    assert ipbb_cli(work_area, 'daemon', 'start').returncode != 0
+
+    # Same output and exit codes as when run locally
+    for _ in range(2):
+        lForwarded = ipbb_cli(work_area / 'src', 'info')
+        assert (lForwarded.returncode, lForwarded.stdout) == (lLocal.returncode, lLocal.stdout)
+
+    lLocalErr = ipbb_cli(work_area, 'dep', 'ls', 'bogus', IPBB_NO_DAEMON='1')
+    lForwardedErr = ipbb_cli(work_area, 'dep', 'ls', 'bogus')
+    assert lForwardedErr.returncode == lLocalErr.returncode != 0
+    assert lForwardedErr.stderr == lLocalErr.stderr
+
+    lStatus = ipbb_cli(work_area, 'daemon', 'status')
+    assert 'requests' in lStatus.stdout
+
+    lStop = ipbb_cli(work_area, 'daemon', 'stop')
+    assert '3 commands' in lStop.stdout
+    assert not (work_area / kVarDir / kWorkDaemonSocket).exists()
+
+
+# -----------------------------------------------------------------------------
+kSleepyServer = '''
+import sys, time
+from ipbb.tools.daemon import DaemonServer
+
+class Service(object):
+    def __init__(self, aLogPath):
+        self.log = open(aLogPath, 'w', buffering=1)
+    def run(self, aArgs, aCwd, aColumns, aTty):
+        try:
+            print('started', flush=True)
+            for _ in range(600):
+                time.sleep(0.1)
+        except KeyboardInterrupt:
+            self.log.write('interrupted\\n')
+            raise
+    def abort(self):
+        self.log.write('aborted\\n')
+    def status(self):
+        return {}
+    def close(self):
+        self.log.close()
+
+DaemonServer(sys.argv[1], Service(sys.argv[2])).serve()
+'''
+
+
+# -----------------------------------------------------------------------------
+def start_server(aScript, aSocketPath, *aArgs):
+    import time
+    from ipbb.tools.daemon import connect
+
+    lEnv = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(ipbb.__file__)))
+    lProc = subprocess.Popen([sys.executable, '-c', aScript, aSocketPath, *aArgs], env=lEnv)
+    t0 = time.time()
+    while connect(aSocketPath) is None:
+        if lProc.poll() is not None or time.time() - t0 > 30:
+            lProc.kill()
+            pytest.fail('server not started')
+        time.sleep(0.05)
+    return lProc
+
+
+# -----------------------------------------------------------------------------
+def test_daemon_server(tmp_path):
+    import socket
+    import stat
+    import time
+    from ipbb.tools.daemon import request, peer_uid
+
+    lSocketPath, lLogPath = str(tmp_path / 'd.sock'), tmp_path / 'service.log'
+    lProc = start_server(kSleepyServer, lSocketPath, str(lLogPath))
+    try:
+        # Reserved to the owner
+        assert stat.S_IMODE(os.stat(lSocketPath).st_mode) == 0o600
+        a, b = socket.socketpair(socket.AF_UNIX)
+        assert peer_uid(a) in (None, os.getuid())
+        a.close(), b.close()
+
+        # The command stops when its client goes away
+        lReply = request(lSocketPath, {'op': 'run', 'argv': [], 'cwd': str(tmp_path)})
+        assert next(lReply) == {'out': 'started'}
+        lReply.close()
+
+        t0 = time.time()
+        while lLogPath.read_text() != 'aborted\ninterrupted\n':
+            assert time.time() - t0 < 10, lLogPath.read_text()
+            time.sleep(0.05)
+
+        next(request(lSocketPath, {'op': 'stop'}))
+        assert lProc.wait(timeout=10) == 0
+    finally:
+        lProc.kill()
+
+
+# -----------------------------------------------------------------------------
+kSubprocessServer = '''
+import sys
+import sh
+from ipbb.tools.daemon import DaemonServer
+
+class Service(object):
+    def run(self, aArgs, aCwd, aColumns, aTty):
+        sh.echo('to stdout', _out=sys.stdout)
+        sh.sh('-c', 'echo to stderr >&2', _err=sys.stderr)
+        return 3
+    def abort(self):
+        pass
+    def status(self):
+        return {}
+    def close(self):
+        pass
+
+DaemonServer(sys.argv[1], Service()).serve()
+'''
+
+
+# -----------------------------------------------------------------------------
+def test_daemon_subprocess_output(tmp_path):
+    import io
+    from ipbb.tools.daemon import forward, request
+
+    pytest.importorskip('sh')
+
+    lSocketPath = str(tmp_path / 'd.sock')
+    lProc = start_server(kSubprocessServer, lSocketPath)
+    try:
+        # The output of the subprocesses of the command reaches the client
+        lOut, lErr = io.StringIO(), io.StringIO()
+        assert forward(lSocketPath, [], str(tmp_path), lOut, lErr) == 3
+        assert lOut.getvalue() == 'to stdout\n'
+        assert lErr.getvalue() == 'to stderr\n'
+
+        next(request(lSocketPath, {'op': 'stop'}))
+        assert lProc.wait(timeout=10) == 0
+    finally:
+        lProc.kill()
@@ -1,7 +1,17 @@
+import argparse
 import pytest
+import shlex
+import yaml
 
-from ipbb.depparser._cmdparser import DepCmdParser
+from pathlib import Path
+
+from ipbb.depparser._cmdparser import DepCmdParser, DepCmdParserError, split_line
 from ipbb.depparser._cmdtypes import IncludeCommand, SetupCommand
+from ipbb.depparser._fileparser import DepFileParser
+from ipbb.depparser._pathmaker import Pathmaker
+
+kRepoGenDir = Path(__file__).parent.parent / 'repogen'
+
 
 # -----------------------------------------------------------------------------
 def test_cmdparser_include():
@@ -29,3 +39,97 @@ def test_cmdparser_setup():
     assert args.package == 'a'
     assert args.component == 'b'
     assert args.filepath == ['afile.vhd']
+
+
+# -----------------------------------------------------------------------------
+# Differential tests between the fast parser and argparse
+# -----------------------------------------------------------------------------
+def _outcome(aParser, aTokens):
+    try:
+        c = aParser.parse_line(aTokens, current_package='p', current_component='c')
+    # Errors reported by argparse and by the source type actions
+    except (DepCmdParserError, ValueError, argparse.ArgumentTypeError) as e:
+        return type(e), str(e)
+    return type(c), {a: getattr(c, a) for a in c._fields}
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize('line', [
+    'src a.vhd b.vhd',
+    'src -c x:y -l mylib --vhdl2008 -u sim -f simulation --simflags=-x a.vhd',
+    'src --cd ../x -u synth,sim a.vhd',
+    'src --vhdl2008 --vhdl2019 a.vhd',
+    'src --vhdl2008 --vhdl2008 a.vhd',
+    'src -u foo a.vhd',
+    'src a.vhd -l lib b.vhd',
+    'src -l',
+    'src -l -c a.vhd',
+    'src',
+    'src --comp x a.vhd',
+    'src -lmylib a.vhd',
+    'src -l=mylib --cd=../x --simflags= a.vhd',
+    'src --vhdl2008=1 a.vhd',
+    'src -- -a.vhd',
+    'hlssrc --tb -i a:b -i c --cflags=-O2 a.cpp',
+    'hlssrc --cflags -O2 a.cpp',
+    'include',
+    'include -c a:b:c x.dep',
+    'include -c pkg: x.dep',
+    'setup -f',
+    'addrtab -t a.xml',
+    'util x.tcl',
+    'iprepo ip',
+    'foo a.vhd',
+])
+def test_cmdparser_fastpath(line):
+
+    fast = DepCmdParser()
+    slow = DepCmdParser()
+    slow.fastpath = False
+
+    tokens = split_line(line)
+    assert tokens == shlex.split(line)
+    assert _outcome(fast, tokens) == _outcome(slow, tokens)
+
+
+# -----------------------------------------------------------------------------
+def _dump(aParser):
+    lCmds = []
+    for k, v in aParser.commands.items():
+        for c in v:
+            lCmds.append((k, type(c), {a: (c.depfile.path if a == 'depfile' else getattr(c, a)) for a in c._fields}))
+    lErrors = [(e[:-1], type(e[-1]), str(e[-1])) for e in aParser.errors]
+    return lCmds, lErrors, aParser.unresolved
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize('repofile', sorted(kRepoGenDir.glob('*.yml')), ids=lambda p: p.stem)
+def test_cmdparser_fastpath_repogen(repofile, tmp_path):
+
+    repocfg = yaml.safe_load(repofile.read_text())
+    name = repocfg['name']
+    repopath = tmp_path / name
+
+    for d, fs in repocfg['files'].items():
+        (repopath / d).mkdir(parents=True, exist_ok=True)
+        for f, t in fs.items():
+            (repopath / d / f).write_text(t)
+            if Path(f).suffix in ('.dep', '.d3'):
+                for l in t.splitlines():
+                    assert split_line(l) == shlex.split(l)
+
+    pm = Pathmaker(str(repopath if repocfg.get('multi_pkg', False) else tmp_path))
+
+    for t in repocfg['top']:
+        results = []
+        # Fast parser and argparse, with and without prefetching
+        for fastpath, prefetch in ((True, 8), (False, 8), (True, 0)):
+            dp = DepFileParser('vivado', pm, {}, 0)
+            dp.cmdparser.fastpath = fastpath
+            dp.prefetch_workers = prefetch
+            try:
+                dp.parse(t.get('pkg', name), t['cmp'], t['file'])
+            except OSError:
+                pass
+            results.append(_dump(dp))
+        assert results[0] == results[1] == results[2]
@@ -82,3 +82,498 @@ def test_assign_invalid_value(dep_parser):
     dep_info = ("dummy", 0)
     dep_parser._line_process_assignments('@ a = print(3)', dep_info)
 
+
+
+# -----------------------------------------------------------------------------
+@pytest.fixture
+def dep_tree(tmp_path):
+    src = tmp_path / 'src'
+    cfg = src / 'pkg' / 'cmp' / 'firmware' / 'cfg'
+    hdl = src / 'pkg' / 'cmp' / 'firmware' / 'hdl'
+    cfg.mkdir(parents=True)
+    hdl.mkdir(parents=True)
+    (cfg / 'top.dep').write_text('src *.vhd\n')
+    (hdl / 'a.vhd').write_text('')
+    return tmp_path
+
+
+# -----------------------------------------------------------------------------
+def test_deptree_cache(dep_tree):
+    from ipbb.depparser import DepTreeCache
+
+    def parse():
+        dp = DepFileParser('sim', Pathmaker(str(dep_tree / 'src')))
+        cache = DepTreeCache(str(dep_tree / 'deptree.cache'))
+        restored = cache.restore(dp, 'pkg', 'cmp', 'top.dep')
+        if not restored:
+            dp.parse('pkg', 'cmp', 'top.dep')
+            cache.store(dp, 'pkg', 'cmp', 'top.dep')
+        return restored, sorted(c.filepath for c in dp.commands['src'])
+
+    restored, files = parse()
+    assert not restored and len(files) == 1
+    assert parse() == (True, files)
+
+    # A new file matching the glob invalidates the cache
+    (dep_tree / 'src' / 'pkg' / 'cmp' / 'firmware' / 'hdl' / 'b.vhd').write_text('')
+    restored, files = parse()
+    assert not restored and len(files) == 2
+
+
+# -----------------------------------------------------------------------------
+def test_deptree_cache_current(dep_tree):
+    from ipbb.depparser import DepTreeCache
+
+    cache = DepTreeCache(str(dep_tree / 'deptree.cache'))
+    dp = DepFileParser('sim', Pathmaker(str(dep_tree / 'src')))
+    assert not cache.current(dp, 'pkg', 'cmp', 'top.dep')
+
+    dp.parse('pkg', 'cmp', 'top.dep')
+    cache.store(dp, 'pkg', 'cmp', 'top.dep')
+    assert cache.current(dp, 'pkg', 'cmp', 'top.dep')
+
+    # Another parser storing its results takes over the cache
+    dp2 = DepFileParser('sim', Pathmaker(str(dep_tree / 'src')))
+    dp2.parse('pkg', 'cmp', 'top.dep')
+    cache.store(dp2, 'pkg', 'cmp', 'top.dep')
+    assert not cache.current(dp, 'pkg', 'cmp', 'top.dep')
+    assert cache.current(dp2, 'pkg', 'cmp', 'top.dep')
+
+    (dep_tree / 'src' / 'pkg' / 'cmp' / 'firmware' / 'hdl' / 'b.vhd').write_text('')
+    assert not cache.current(dp2, 'pkg', 'cmp', 'top.dep')
+
+
+# -----------------------------------------------------------------------------
+def test_deptree_incremental(dep_tree):
+    from ipbb.depparser import DepTreeCache
+
+    cfg = dep_tree / 'src' / 'pkg' / 'cmp' / 'firmware' / 'cfg'
+    (cfg / 'top.dep').write_text('include a.dep\ninclude b.dep\n')
+    (cfg / 'a.dep').write_text('@x = 1\n')
+    (cfg / 'b.dep').write_text('? x == 1 ? src a.vhd\n')
+
+    def parse():
+        dp = DepFileParser('sim', Pathmaker(str(dep_tree / 'src')))
+        cache = DepTreeCache(str(dep_tree / 'deptree.cache'))
+        if not cache.restore(dp, 'pkg', 'cmp', 'top.dep'):
+            dp.parse('pkg', 'cmp', 'top.dep', aPrevious=cache.reusable)
+            cache.store(dp, 'pkg', 'cmp', 'top.dep')
+        return dp, cache
+
+    dp, cache = parse()
+    assert len(dp.commands['src']) == 1
+
+    # Only the modified depfile and its ancestors are parsed again
+    (cfg / 'top.dep').write_text('include a.dep\ninclude b.dep\n\n')
+    dp, cache = parse()
+    assert sorted(cache.reusable) == [str(cfg / 'a.dep'), str(cfg / 'b.dep')]
+    assert len(dp.commands['src']) == 1
+
+    # b.dep is unchanged, but depends on a setting defined in a.dep
+    (cfg / 'a.dep').write_text('@x = 2\n')
+    dp, cache = parse()
+    assert str(cfg / 'b.dep') in cache.reusable
+    assert len(dp.commands['src']) == 0
+
+
+# -----------------------------------------------------------------------------
+def test_conditional_cache(dep_parser):
+
+    dep_info = ("dummy", 0)
+    dep_parser._line_process_assignments('@ a.x = 1', dep_info)
+    assert dep_parser._line_process_conditional('? a.x == 1 ? src x.vhd', dep_info) == 'src x.vhd'
+    assert dep_parser._line_process_conditional('? a.x == 1 ? src x.vhd', dep_info) == 'src x.vhd'
+    assert dep_parser.exprcache.reused == 1
+
+    # Changing a referenced setting invalidates the cached result
+    dep_parser._line_process_assignments('@ a.y = 2', dep_info)
+    dep_parser._line_process_conditional('? a.x == 1 ? src x.vhd', dep_info)
+    assert dep_parser.exprcache.reused == 1
+    assert dep_parser.exprcache.misses == 3
+
+
+# -----------------------------------------------------------------------------
+def test_iterparse(dep_tree, monkeypatch):
+    import threading
+
+    cfg = dep_tree / 'src' / 'pkg' / 'cmp' / 'firmware' / 'cfg'
+    hdl = dep_tree / 'src' / 'pkg' / 'cmp' / 'firmware' / 'hdl'
+    (cfg / 'top.d3').write_text('setup s.tcl\nsrc -l mylib b.vhd\nsrc a.vhd\ninclude late.dep\nsrc a.vhd\n')
+    (cfg / 'late.dep').write_text('@package_to_lib_mapping = {"pkg": "pkglib"}\nsrc c.vhd\n')
+    (cfg / 's.tcl').write_text('')
+    for f in ('b.vhd', 'c.vhd'):
+        (hdl / f).write_text('')
+
+    dp = DepFileParser('sim', Pathmaker(str(dep_tree / 'src')))
+    dp.parse('pkg', 'cmp', 'top.d3')
+
+    # late.dep is only read once the first commands have been received
+    released = threading.Event()
+    dp_iter = DepFileParser('sim', Pathmaker(str(dep_tree / 'src')))
+    dp_iter.prefetch_workers = 0
+    load = dp_iter._load
+    def blocking_load(aPath):
+        if aPath.endswith('late.dep'):
+            assert released.wait(10)
+        return load(aPath)
+    monkeypatch.setattr(dp_iter, '_load', blocking_load)
+
+    stream = dp_iter.iterparse('pkg', 'cmp', 'top.d3')
+    first = next(stream)
+    assert 'late.dep' not in [f.name for f in dp_iter._depregistry.values()]
+    released.set()
+    streamed = [first] + list(stream)
+
+    # Resolved order, sources without library last, with the package defaults applied
+    assert [(c.cmd, c.filepath.rsplit('/', 1)[-1], getattr(c, 'lib', None)) for c in streamed] == [
+        ('setup', 's.tcl', None),
+        ('src', 'b.vhd', 'mylib'),
+        ('src', 'a.vhd', 'pkglib'),
+        ('src', 'c.vhd', 'pkglib'),
+    ]
+    assert {k: sorted(c.filepath for c in streamed if c.cmd == k) for k in dp.commands} == {
+        k: sorted(c.filepath for c in v) for k, v in dp.commands.items()
+    }
+
+    # The parser is left in the same state as after parse
+    assert dp_iter.commands == dp.commands
+    assert not dp_iter.unresolved
+
+
+# -----------------------------------------------------------------------------
+def test_iterparse_error(dep_tree):
+
+    dp = DepFileParser('sim', Pathmaker(str(dep_tree / 'src')))
+    with pytest.raises(OSError):
+        list(dp.iterparse('pkg', 'cmp', 'missing.dep'))
+
+
+# -----------------------------------------------------------------------------
+def test_profile(dep_tree):
+    import io
+    import json
+    from ipbb.depparser import DepParserProfile
+
+    cfg = dep_tree / 'src' / 'pkg' / 'cmp' / 'firmware' / 'cfg'
+    (cfg / 'top.dep').write_text('@x = 1\n? x == 1 ? include a.dep\n')
+    (cfg / 'a.dep').write_text('# comment\nsrc *.vhd\n')
+
+    dp = DepFileParser('sim', Pathmaker(str(dep_tree / 'src')))
+    profile = DepParserProfile()
+    with profile.instrument(dp):
+        dp.parse('pkg', 'cmp', 'top.dep')
+
+    # The instrumentation is removed once done
+    assert '_parse_file' not in vars(dp)
+    assert len(dp.commands['src']) == 1
+
+    stages = {s: n for s, (t, n) in profile.stages.items()}
+    assert stages['read'] == 2
+    assert stages['preprocess'] == 2
+    assert stages['assignments'] == 3
+    assert stages['cmdparse'] == stages['glob'] == 2
+
+    top, a = (profile.files[str(cfg / f)] for f in ('top.dep', 'a.dep'))
+    assert top.inclusive >= a.inclusive + top.exclusive - 1e-6
+    assert a.fscalls >= 2
+
+    f = io.StringIO()
+    profile.dump(f)
+    data = json.loads(f.getvalue())
+    assert [p['path'] for p in data['files']] == [a.path, top.path]
+    assert data['fscalls']['read'] == 2
+
+
+# -----------------------------------------------------------------------------
+def test_unresolved_index(dep_tree, monkeypatch):
+    import os
+
+    cfg = dep_tree / 'src' / 'pkg' / 'cmp' / 'firmware' / 'cfg'
+    (cfg / 'top.dep').write_text(
+        ''.join(f'src missing{i}.vhd\n' for i in range(50))
+        + ''.join(f'src -c nopkg:nocmp{i % 5} missing{i}.vhd\n' for i in range(50))
+    )
+
+    dp = DepFileParser('sim', Pathmaker(str(dep_tree / 'src')))
+    calls = []
+    exists = os.path.exists
+    monkeypatch.setattr(os.path, 'exists', lambda p: calls.append(p) or exists(p))
+    dp.parse('pkg', 'cmp', 'top.dep')
+
+    # One check per package and component
+    assert len(calls) == len(set(calls)) == 1 + 1 + 1 + 5
+
+    assert len(dp.unresolved_paths) == 100
+    assert dp.unresolved_packages == {'nopkg'}
+    assert dp.unresolved_components == {'nopkg': {f'nocmp{i}' for i in range(5)}}
+    assert len(dp.unresolved_files['pkg']['cmp']) == 50
+    assert len(calls) == 8
+
+    # Indexes follow changes to the list of unresolved entries
+    dp.unresolved = dp.unresolved[:50]
+    assert not dp.unresolved_packages
+
+
+# -----------------------------------------------------------------------------
+def test_ast_cache(dep_tree):
+    from ipbb.depparser import DepAstCache
+
+    cfg = dep_tree / 'src' / 'pkg' / 'cmp' / 'firmware' / 'cfg'
+    hdl = dep_tree / 'src' / 'pkg' / 'cmp' / 'firmware' / 'hdl'
+    (cfg / 'top.dep').write_text(
+        '# comment\n@f = "b"\nsrc a.vhd\n? toolset == "sim" ? src ${f}.vhd\n? toolset == "vivado" ? src -l lib "c.vhd"\n'
+    )
+    for f in ('b.vhd', 'c.vhd'):
+        (hdl / f).write_text('')
+
+    def parse(toolset):
+        dp = DepFileParser(toolset, Pathmaker(str(dep_tree / 'src')))
+        dp.astcache = DepAstCache(str(dep_tree / 'var' / 'depast.cache'))
+        reads = []
+        read_file = dp._read_file
+        dp._read_file = lambda *args: reads.append(args[-1]) or read_file(*args)
+        dp.parse('pkg', 'cmp', 'top.dep')
+        dp.astcache.store()
+        return [(c.filepath[len(str(hdl)) + 1:], c.lib) for c in dp.commands['src']], reads
+
+    expected = {'sim': [('b.vhd', None), ('a.vhd', None)], 'vivado': [('c.vhd', 'lib'), ('a.vhd', None)]}
+
+    assert parse('sim') == (expected['sim'], [str(cfg / 'top.dep')])
+    # The cache is shared across toolsets, only the settings dependent evaluation is redone
+    assert parse('vivado') == (expected['vivado'], [])
+    assert parse('sim') == (expected['sim'], [])
+
+    # Modified files are read again
+    (cfg / 'top.dep').write_text('src a.vhd\n')
+    assert parse('sim') == ([('a.vhd', None)], [str(cfg / 'top.dep')])
+
+
+# -----------------------------------------------------------------------------
+def test_ast_cache_no_reads(dep_tree, monkeypatch):
+    import builtins
+    from ipbb.depparser import DepAstCache
+
+    src = dep_tree / 'src'
+    cfg = src / 'pkg' / 'cmp' / 'firmware' / 'cfg'
+    sub = src / 'pkg' / 'sub' / 'firmware' / 'cfg'
+    sub.mkdir(parents=True)
+    (cfg / 'top.dep').write_text('include a.dep\ninclude -c pkg:sub\n')
+    (cfg / 'a.dep').write_text('src *.vhd\n')
+    (sub / 'sub.dep').write_text('include b.dep\n')
+    (sub / 'b.dep').write_text('src -c pkg:cmp a.vhd\n')
+
+    opened = []
+    builtin_open = builtins.open
+    def counting_open(file, *args, **kwargs):
+        if str(file).endswith(('.dep', '.d3')):
+            opened.append(str(file))
+        return builtin_open(file, *args, **kwargs)
+    monkeypatch.setattr(builtins, 'open', counting_open)
+
+    def parse():
+        del opened[:]
+        dp = DepFileParser('sim', Pathmaker(str(src)))
+        dp.astcache = DepAstCache(str(dep_tree / 'var' / 'depast.cache'))
+        dp.parse('pkg', 'cmp', 'top.dep')
+        dp.astcache.store()
+        assert len(dp.commands['src']) == 1
+        return sorted(opened)
+
+    # Cold: each dep file read once, the missing default sub.d3 is not
+    assert parse() == sorted(str(p) for p in (cfg / 'top.dep', cfg / 'a.dep', sub / 'sub.dep', sub / 'b.dep'))
+    # Warm: the includes are followed from the cached tokens
+    assert parse() == []
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_check_deptrees(dep_tree, jobs):
+    from ipbb.depparser import DepCheckTarget, check_deptrees
+
+    cfg = dep_tree / 'src' / 'pkg' / 'cmp' / 'firmware' / 'cfg'
+    (cfg / 'bad.dep').write_text('src a.vhd\nsrc missing.vhd\n@x = (\n')
+    targets = [
+        DepCheckTarget('good', 'sim', 'pkg', 'cmp', 'top.dep', str(dep_tree / 'good.cache')),
+        DepCheckTarget('bad', 'vivado', 'pkg', 'cmp', 'bad.dep', None),
+        DepCheckTarget('none', 'sim', 'pkg', 'cmp', 'none.dep', None),
+    ]
+
+    def check():
+        results = list(check_deptrees(str(dep_tree / 'src'), targets, aAstCachePath=str(dep_tree / 'var' / 'depast.cache'), aJobs=jobs))
+        return {r.target.name: r for r in results}
+
+    results = check()
+    assert sorted(results) == ['bad', 'good', 'none']
+
+    good = results['good']
+    assert not good.failed and not good.restored
+    assert good.depfiles == 1 and good.commands['src'] == 1
+
+    bad = results['bad']
+    assert bad.failed and bad.exception is None
+    assert [(f, l) for f, l, _ in bad.errors] == [('pkg/cmp/firmware/cfg/bad.dep:2', '@x = (')]
+    assert bad.unresolved_files == [('pkg/cmp/firmware/hdl/missing.vhd', ('pkg/cmp/firmware/cfg/bad.dep',))]
+
+    assert results['none'].failed and 'OSError' in results['none'].exception
+
+    # The project dep tree cache and the shared dep ast cache are populated
+    assert (dep_tree / 'var' / 'depast.cache').exists()
+    assert check()['good'].restored
+
+
+# -----------------------------------------------------------------------------
+def test_check_deptrees_default_top(dep_tree):
+    from click import BadParameter
+    from ipbb.cmds.toolbox import _default_top_depfile
+    from ipbb.utils import validateMultipleComponentDepFiles
+
+    cfg = dep_tree / 'src' / 'pkg' / 'cmp' / 'firmware' / 'cfg'
+    pm = Pathmaker(str(dep_tree / 'src'))
+
+    # As include -c: <component>.d3 first, then <component>.dep
+    assert _default_top_depfile(pm, 'pkg', 'cmp') == 'cmp.dep'
+    (cfg / 'cmp.d3').write_text('')
+    assert _default_top_depfile(pm, 'pkg', 'cmp') == 'cmp.d3'
+    assert _default_top_depfile(pm, 'pkg', 'none') == 'none.dep'
+
+    assert validateMultipleComponentDepFiles(None, None, ('pkg:cmp', 'pkg:cmp:top.dep')) == (
+        ('pkg', 'cmp'), ('pkg', 'cmp', 'top.dep')
+    )
+    for v in ('pkg', 'pkg:', 'pkg:cmp:top.dep:x'):
+        with pytest.raises(BadParameter):
+            validateMultipleComponentDepFiles(None, None, (v,))
+
+
+# -----------------------------------------------------------------------------
+def test_check_depfiles_no_astcache(dep_tree):
+    from types import SimpleNamespace
+    from click import ClickException
+    from ipbb.cmds.toolbox import check_depfile, check_depfiles
+
+    # Outside a work area there is no dep ast cache
+    env = SimpleNamespace(srcdir=str(dep_tree / 'src'), deptreeDefaults={}, depAstCache=None, _verbosity=0)
+
+    check_depfile(env, 0, 'sim', ('pkg', 'cmp'), 'top.dep')
+    with pytest.raises(ClickException, match='Failed to parse dep file'):
+        check_depfile(env, 0, 'sim', ('pkg', 'cmp'), 'missing.dep')
+    check_depfiles(env, 1, 'sim', [('pkg', 'cmp', 'top.dep')])
+
+
+# -----------------------------------------------------------------------------
+def test_export(dep_tree):
+    import io
+    import json
+    from ipbb.depparser import DepExporter, kExportSections
+
+    cfg = dep_tree / 'src' / 'pkg' / 'cmp' / 'firmware' / 'cfg'
+    (cfg / 'top.dep').write_text('@a.b = 1\ninclude sub.dep\nsrc *.vhd\nsrc missing.vhd\n@x = (\n')
+    (cfg / 'sub.dep').write_text('src -l lib a.vhd\n')
+
+    dp = DepFileParser('sim', Pathmaker(str(dep_tree / 'src')))
+    dp.parse('pkg', 'cmp', 'top.dep')
+
+    out = io.StringIO()
+    DepExporter(dp).write(out, 'ndjson')
+    records = [json.loads(l) for l in out.getvalue().splitlines()]
+    by_type = {s: [r for r in records if r['type'] == s] for s in kExportSections}
+
+    assert {'type': 'settings', 'name': 'a.b', 'value': 1} in by_type['settings']
+    assert [(r['cmd'], r['lib']) for r in by_type['commands']] == [('src', None), ('src', 'lib')]
+    assert by_type['packages'] == [{'type': 'packages', 'package': 'pkg', 'components': ['cmp']}]
+    assert [(r['name'], r['depth']) for r in by_type['depfiles']] == [('top.dep', 0), ('sub.dep', 1)]
+    assert [r['text'] for r in by_type['errors']] == ['@x = (']
+    assert [r['path'].endswith('missing.vhd') for r in by_type['unresolved']] == [True]
+
+    # Same records in the json document, filtered and grouped by section
+    out = io.StringIO()
+    DepExporter(dp, aCmdFilter=lambda c: c.lib is None).write(out, 'json', ('commands', 'errors'))
+    doc = json.loads(out.getvalue())
+    assert list(doc) == ['commands', 'errors']
+    assert [r['lib'] for r in doc['commands']] == [None]
+    assert doc['errors'] == [{k: v for k, v in r.items() if k != 'type'} for r in by_type['errors']]
+
+
+# -----------------------------------------------------------------------------
+def test_referrers(dep_tree):
+    from ipbb.depparser import DepTreeCache, DepCheckTarget, check_deptrees
+
+    cfg = dep_tree / 'src' / 'pkg' / 'cmp' / 'firmware' / 'cfg'
+    hdl = dep_tree / 'src' / 'pkg' / 'cmp' / 'firmware' / 'hdl'
+    (cfg / 'top.dep').write_text('# top\ninclude sub.dep\nsrc *.vhd\n')
+    (cfg / 'sub.dep').write_text('\nsrc -l lib a.vhd\n')
+
+    def parse():
+        dp = DepFileParser('sim', Pathmaker(str(dep_tree / 'src')))
+        cache = DepTreeCache(str(dep_tree / 'deptree.cache'))
+        if not cache.restore(dp, 'pkg', 'cmp', 'top.dep'):
+            dp.parse('pkg', 'cmp', 'top.dep', aPrevious=cache.reusable)
+            cache.store(dp, 'pkg', 'cmp', 'top.dep')
+        # The reverse index is built with the dep tree, not on first lookup
+        dp._index_references = None
+        return dp
+
+    # Fresh, restored from cache and partially reused
+    dps = [parse(), parse()]
+    (cfg / 'top.dep').write_text('# top changed\ninclude sub.dep\nsrc *.vhd\n')
+    dps.append(parse())
+    for dp in dps:
+        refs = dp.referrers(str(hdl / 'a.vhd'))
+        assert sorted((r.depfile.name, r.line, r.command.cmd) for r in refs) == [('sub.dep', 1, 'src'), ('top.dep', 2, 'src')]
+        sub = next(r.depfile for r in refs if r.depfile.name == 'sub.dep')
+        assert [f.name for f in dp.include_chain(sub)] == ['top.dep', 'sub.dep']
+        assert [(r.depfile.name, r.line) for r in dp.referrers(str(cfg / 'sub.dep'))] == [('top.dep', 1)]
+        assert dp.referrers(str(hdl / 'none.vhd')) == []
+
+    target = DepCheckTarget('p', 'sim', 'pkg', 'cmp', 'top.dep', None)
+    result, = check_deptrees(str(dep_tree / 'src'), [target], aJobs=1, aQueryPaths=[str(cfg / 'top.dep'), str(cfg / 'sub.dep')])
+    assert [r[1:4] for r in result.references] == [
+        ('pkg/cmp/firmware/cfg/top.dep', None, 'top'),
+        ('pkg/cmp/firmware/cfg/top.dep', 1, 'include'),
+    ]
+
+
+# -----------------------------------------------------------------------------
+def test_component_index(tmp_path):
+    from ipbb.depparser import ComponentIndex
+
+    src = tmp_path / 'src'
+    for d in ('pkg/a/firmware/cfg/sub', 'pkg/a/b/firmware/cfg', 'pkg/.git/x/firmware', 'pkg/c/firmware/hdl', 'other/firmware/cfg'):
+        (src / d).mkdir(parents=True)
+    (src / 'pkg/a/firmware/cfg/top.dep').write_text('')
+    (src / 'pkg/a/firmware/cfg/sub/x.d3').write_text('')
+    (src / 'pkg/a/firmware/cfg/notes.txt').write_text('')
+    (src / 'pkg/a/b/firmware/cfg/b.dep').write_text('')
+    (tmp_path / 'ext/y/firmware').mkdir(parents=True)
+    (src / 'link').symlink_to(tmp_path / 'ext')
+
+    def index():
+        idx = ComponentIndex(str(src), str(tmp_path / 'var' / 'cmpindex.cache'))
+        return idx, idx.packages
+
+    idx, packages = index()
+    assert packages == ['link', 'other', 'pkg']
+    assert idx.components('pkg') == ['a', 'a/b', 'c']
+    assert idx.components('other') == ['.']
+    assert idx.components('link') == ['y']
+    assert idx.depfiles('pkg', 'a') == ['sub/x.d3', 'top.dep']
+    assert idx.depfiles('pkg', 'a/b/') == ['b.dep']
+    assert idx.depfiles('pkg', 'none') == []
+    assert idx.scanned > 0
+
+    # Persisted, nothing is listed again
+    idx, _ = index()
+    assert idx.components('pkg') == ['a', 'a/b', 'c'] and idx.scanned == 0
+
+    # Only the modified directories are listed again
+    (src / 'pkg/c/firmware/cfg').mkdir()
+    (src / 'pkg/c/firmware/cfg/c.dep').write_text('')
+    import shutil
+    shutil.rmtree(src / 'pkg/a/b')
+    idx, _ = index()
+    assert idx.components('pkg') == ['a', 'c']
+    assert idx.depfiles('pkg', 'c') == ['c.dep']
+    assert idx.scanned == 2
+
+    # New packages are picked up by the same index
+    (src / 'new').mkdir()
+    assert idx.packages == ['link', 'new', 'other', 'pkg']
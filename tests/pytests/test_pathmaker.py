@@ -0,0 +1,52 @@
+import pytest
+import os
+import glob
+
+from ipbb.depparser._pathmaker import Pathmaker
+
+
+# -----------------------------------------------------------------------------
+@pytest.fixture
+def src_tree(tmp_path):
+    for f in ['a.vhd', 'b.vhd', '.hidden.vhd', 'c.txt',
+              'sub/d.vhd', 'sub/e.v', 'sub/.git/f.vhd',
+              'sub/deep/g.vhd', 'sub/deep/deeper/h.vhd', 'other/b/i.vhd']:
+        p = tmp_path / f
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text('')
+    (tmp_path / 'empty').mkdir()
+    return tmp_path
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize('expr', [
+    '*', '*.vhd', '.*', '[ab].vhd', 'a.vhd', 'missing.vhd', 'sub', 'sub/*/*.vhd',
+    '*/b/*.vhd', 'missing/*.vhd', 'empty/*', '**', '**/*.vhd', 'sub/**',
+    'sub/**/*.vhd', 'sub/**/deeper/*.vhd', '**/deep', 'sub/.git/*',
+])
+def test_pathmaker_expand(src_tree, expr):
+    pm = Pathmaker(str(src_tree))
+    path = str(src_tree / expr)
+    assert pm.expand(path) == glob.glob(path, recursive=True)
+
+
+# -----------------------------------------------------------------------------
+def test_pathmaker_index(src_tree, monkeypatch):
+    pm = Pathmaker(str(src_tree))
+
+    calls = []
+    scandir = os.scandir
+    monkeypatch.setattr(os, 'scandir', lambda p: calls.append(p) or scandir(p))
+
+    for expr in ['*.vhd', 'a.vhd', 'b.vhd', 'missing.vhd', 'missing.vhd']:
+        pm.glob('', '', None, expr)
+    assert calls == [str(src_tree)]
+
+    # Unmatched expressions are cached too
+    pm.glob('', '', None, 'nodir/*.vhd')
+    pm.glob('', '', None, 'nodir/*.vhd')
+    assert calls == [str(src_tree), str(src_tree / 'nodir')]
+
+    pm.resetIndex()
+    pm.glob('', '', None, 'a.vhd')
+    assert len(calls) == 3
@@ -0,0 +1,62 @@
+import pytest
+
+from ipbb.utils.settings import load_yaml, dump_yaml, get_validator
+from ipbb.context import Context
+from ipbb.defaults import kWorkAreaFile, kRepoFile
+
+
+# -----------------------------------------------------------------------------
+def test_load_yaml(tmp_path, monkeypatch):
+    import yaml
+
+    lPath = str(tmp_path / 'settings.yml')
+    dump_yaml({'a': [1, 2]}, lPath)
+
+    lLoads = []
+    lLoad = yaml.load
+    monkeypatch.setattr(yaml, 'load', lambda *args, **kwargs: lLoads.append(1) or lLoad(*args, **kwargs))
+
+    s1 = load_yaml(lPath)
+    s1['a'].append(3)
+    s2 = load_yaml(lPath)
+    # Parsed once, and not affected by the changes of the callers
+    assert s2 == {'a': [1, 2]}
+    assert len(lLoads) == 1
+
+    dump_yaml({'a': [1, 2], 'b': 'c'}, lPath)
+    assert load_yaml(lPath) == {'a': [1, 2], 'b': 'c'}
+    assert len(lLoads) == 2
+
+
+# -----------------------------------------------------------------------------
+def test_get_validator():
+    lSchema = {'x': {'type': 'string'}}
+
+    v = get_validator(lSchema)
+    assert get_validator(lSchema) is v
+    assert get_validator(lSchema, allow_unknown=True) is not v
+    assert v.validate({'x': 'y'})
+    assert not v.validate({'x': 1})
+
+
+# -----------------------------------------------------------------------------
+def test_sources_info(tmp_path):
+    (tmp_path / kWorkAreaFile).write_text('')
+    lRepo = tmp_path / 'src' / 'pkg'
+    (lRepo / 'cmp' / 'firmware' / 'cfg').mkdir(parents=True)
+    (lRepo / kRepoFile).write_text('init: [a]\n')
+
+    ictx = Context(str(tmp_path))
+    lInfo = ictx.sources_info['pkg']
+    assert lInfo.repo_settings == {'init': ['a']}
+    # Kept across accesses
+    assert ictx.sources_info['pkg'] is lInfo
+    assert lInfo.repo_settings is lInfo.repo_settings
+
+    (lRepo / kRepoFile).write_text('init: [a, b]\n')
+    assert ictx.sources_info['pkg'].repo_settings == {'init': ['a', 'b']}
+
+    (lRepo / kRepoFile).write_text('init: 3\n')
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            lInfo.repo_settings
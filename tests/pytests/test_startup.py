@@ -0,0 +1,72 @@
+import subprocess
+import sys
+
+import pytest
+
+from click.testing import CliRunner
+
+from ipbb.console_scripts.builder import climain, _compose_cli
+from ipbb.context import Context
+
+# Modules that must not be imported just to start the command line
+kDeferredModules = (
+    'yaml',
+    'ruamel',
+    'cerberus',
+    'multiprocessing',
+    'pexpect',
+    'psutil',
+    'sh',
+    'rich.prompt',
+    'ipbb.depparser',
+    'ipbb.cmds',
+    'ipbb.cli.vivado',
+    'ipbb.tools.xilinx',
+)
+
+
+# -----------------------------------------------------------------------------
+def loaded_modules(aStatement):
+    """
+    Runs a statement in a new interpreter, returns the names of the modules loaded afterwards
+    """
+    lProc = subprocess.run(
+        [sys.executable, '-c', aStatement + '\nimport sys\nprint("\\n".join(sys.modules))'],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    return set(lProc.stdout.split())
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize('statement', [
+    'import ipbb.console_scripts.builder',
+    'import ipbb.console_scripts.builder as b; b._compose_cli()',
+])
+def test_startup_imports(statement):
+    lModules = loaded_modules(statement)
+
+    assert 'ipbb.console_scripts.builder' in lModules
+    lLoaded = [m for m in kDeferredModules if m in lModules]
+    assert lLoaded == []
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize('cmd', ['init', 'dep', 'toolbox', 'vivado', 'sim', 'vitis-hls'])
+def test_lazy_commands(cmd, tmp_path):
+    _compose_cli()
+
+    lResult = CliRunner().invoke(climain, [cmd, '--help'], obj=Context(str(tmp_path)))
+    assert lResult.exit_code == 0, lResult.output
+    assert climain.get_command(None, cmd).name == cmd
+
+
+# -----------------------------------------------------------------------------
+def test_lazy_common_commands():
+    _compose_cli()
+
+    lCtx = climain.make_context('ipbb', ['vivado'], resilient_parsing=True)
+    for lGroup, lCmds in (('vivado', ('cleanup', 'addrtab', 'user-config')), ('vitis-hls', ('cleanup',))):
+        lSubCmds = climain.get_command(lCtx, lGroup).list_commands(lCtx)
+        assert set(lCmds) <= set(lSubCmds)
@@ -0,0 +1,266 @@
+import pytest
+
+import os
+import re
+import shutil
+import subprocess
+
+from ipbb.tools.tcl_console import TCLBatch, TCLFramer, TCLResultFile, tclquote, tclsplit
+
+
+# -----------------------------------------------------------------------------
+@pytest.fixture(scope='module')
+def tclsh():
+    lPath = shutil.which('tclsh')
+    if lPath is None:
+        pytest.skip('tclsh not found')
+    return lPath
+
+
+# -----------------------------------------------------------------------------
+def run_batch(aTclsh, aBatch, aCmds, aStopOnError=True):
+    lResults = []
+    for lLine, lCmds in aBatch.lines(aCmds, aStopOnError):
+        lOut = subprocess.run(
+            [aTclsh], input=aBatch.definition() + '\n' + lLine + '\n',
+            stdout=subprocess.PIPE, universal_newlines=True, check=True
+        ).stdout
+        lResults += aBatch.parse(lCmds, lOut.splitlines())
+    return lResults
+
+
+# -----------------------------------------------------------------------------
+def test_tclquote():
+    assert tclquote('a b') == '{a b}'
+    assert tclquote('') == '{}'
+    assert tclquote('puts "}"') == 'puts\\ \\"\\}\\"'
+    assert tclquote('a\\') == 'a\\\\'
+
+
+# -----------------------------------------------------------------------------
+def test_tclsplit(tclsh):
+    lElements = ['a', 'b c', '', 'q"z', 'n{e}st', '\\back', '{br', '1 {2 3}', 'line\nbreak']
+
+    lResults = TCLResultFile()
+    lScript = 'list ' + ' '.join(tclquote(e) for e in lElements)
+    subprocess.run([tclsh], input=lResults.command(lScript) + '\n', universal_newlines=True, check=True)
+    lCode, lList = lResults.read()
+    lResults.close()
+
+    assert lCode == 0
+    assert tclsplit(lList) == lElements
+    assert tclsplit(' a  "b\\tc" ') == ['a', 'b\tc']
+    with pytest.raises(ValueError):
+        tclsplit('{a')
+
+
+# -----------------------------------------------------------------------------
+def test_batch(tclsh):
+    lCmds = [
+        'set a 3',
+        'expr {$a + 1}',
+        'puts "ERROR: boom"; string repeat x 2',
+        'error "multi\\nline \\\\ message"',
+        'puts "}"; set a',
+    ]
+
+    lResults = run_batch(tclsh, TCLBatch(), lCmds, aStopOnError=False)
+    assert [r.command for r in lResults] == lCmds
+    assert [r.code for r in lResults] == [0, 0, 0, 1, 0]
+    assert [r.result for r in lResults] == ['3', '4', 'xx', 'multi\nline \\ message', '3']
+    assert lResults[2].errors == ['ERROR: boom']
+    assert not lResults[3].errors
+
+
+# -----------------------------------------------------------------------------
+def test_batch_stop_on_error(tclsh):
+    lResults = run_batch(tclsh, TCLBatch(), ['set a 1', 'error x', 'set a 2'])
+    assert [(r.code, r.result) for r in lResults] == [(0, '1'), (1, 'x')]
+
+
+# -----------------------------------------------------------------------------
+def test_batch_split(tclsh):
+    lBatch = TCLBatch(maxlen=100)
+    lCmds = ['set v{} {}'.format(i, 'x' * (i+1)) for i in range(40)]
+
+    lLines = list(lBatch.lines(lCmds))
+    assert len(lLines) > 1
+    assert all(len(l) <= 100 for l, c in lLines if len(c) > 1)
+    assert [r.result for r in run_batch(tclsh, lBatch, lCmds)] == ['x' * (i+1) for i in range(40)]
+
+
+# -----------------------------------------------------------------------------
+@pytest.fixture
+def tclsh_console(tclsh):
+    pexpect = pytest.importorskip('pexpect')
+
+    lProc = pexpect.spawn(tclsh, encoding='utf-8', timeout=10)
+    lProc.expect('% ')
+    yield lProc
+    lProc.terminate(True)
+
+
+# -----------------------------------------------------------------------------
+def test_framer(tclsh_console):
+    lFramer = TCLFramer(maxlen=50)
+    tclsh_console.sendline(lFramer.definition())
+    tclsh_console.expect('% ')
+
+    def run(aCmd):
+        return lFramer.run(tclsh_console, '% ', aCmd, re.compile('^ERROR:'), re.compile('^CRITICAL WARNING:'))
+
+    assert run('set a 5') == (['5'], [], [])
+    assert run('list') == ([], [], [])
+    assert run('puts "ERROR: x"; puts "CRITICAL WARNING: y"; expr {$a * 2}') == (
+        ['ERROR: x', 'CRITICAL WARNING: y', '10'], ['ERROR: x'], ['CRITICAL WARNING: y']
+    )
+    # Errors without messages
+    assert run('unknown_cmd') == ([], ['invalid command name "unknown_cmd"'], [])
+    # Long and multi-line commands
+    assert run('set b ' + 'z' * 10000) == (['z' * 10000], [], [])
+    assert run('set c 1\nset d "multi\\nline"') == (['multi', 'line'], [], [])
+
+    lFramer.close()
+
+
+# -----------------------------------------------------------------------------
+kFakeVivadoRc = '''
+set tcl_prompt1 {puts -nonewline "Vivado% "}
+proc quit {} exit
+proc get_runs {{name *}} { lsearch -all -inline -glob {synth_1 impl_1 ip_synth_1} $name }
+proc get_property {name obj} { return "$name of $obj" }
+proc report_utilization {- path} { set f [open $path w]; puts $f "| Site Type | Used |"; close $f }
+'''
+
+
+# -----------------------------------------------------------------------------
+@pytest.fixture
+def fake_vivado(tclsh, tmp_path, monkeypatch):
+    """
+    Interactive tclsh standing in for Vivado
+    """
+    lBin = tmp_path / 'bin'
+    lBin.mkdir()
+    lExe = lBin / 'vivado'
+    lExe.write_text('#!/bin/sh\necho "Vivado v2020.2 (64-bit)"\nexec {}\n'.format(tclsh))
+    lExe.chmod(0o755)
+    (tmp_path / '.tclshrc').write_text(kFakeVivadoRc)
+
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('PATH', str(lBin) + os.pathsep + os.environ['PATH'])
+    monkeypatch.chdir(tmp_path)
+
+
+# -----------------------------------------------------------------------------
+def test_vivado_console_framed(fake_vivado):
+    from ipbb.tools.xilinx import VivadoConsole, VivadoConsoleError
+
+    lConsole = VivadoConsole(framed=True, echo=False)
+    try:
+        assert lConsole.maxcmdlen is None
+        assert lConsole('set a 3') == ('3',)
+        assert lConsole('list') == (None,)
+
+        lResults = lConsole.execute_many(['set x 1', 'set y [expr {$x + 1}]', 'list a {b c}'])
+        assert [r.result for r in lResults] == ['1', '2', 'a {b c}']
+
+        with pytest.raises(VivadoConsoleError) as lExc:
+            lConsole.execute_many(['set z 1', 'unknown_cmd', 'set z 2'])
+        assert lExc.value.command == 'unknown_cmd'
+        assert lConsole('set z') == ('1',)
+    finally:
+        lConsole.close()
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize('framed', [False, True])
+def test_vivado_console_query(fake_vivado, framed):
+    from ipbb.tools.xilinx import VivadoConsole, VivadoConsoleError, VivadoProject
+
+    lConsole = VivadoConsole(framed=framed, echo=True)
+    try:
+        assert tclsplit(lConsole.query('list a {b c}')) == ['a', 'b c']
+        with pytest.raises(VivadoConsoleError):
+            lConsole.query('error boom')
+
+        lInfos = VivadoProject(lConsole).read_run_info(['STATUS', 'PROGRESS'])
+        assert list(lInfos) == ['impl_1', 'ip_synth_1', 'synth_1']
+        assert lInfos['synth_1'] == {'STATUS': 'STATUS of synth_1', 'PROGRESS': 'PROGRESS of synth_1'}
+
+        assert lConsole.report('report_utilization') == '| Site Type | Used |\n'
+    finally:
+        lConsole.close()
+
+
+# -----------------------------------------------------------------------------
+def test_vivado_session_prewarm(fake_vivado):
+    from ipbb.tools.xilinx import VivadoSessionManager
+
+    lManager = VivadoSessionManager(keep=True, echo=False, framed=True)
+    lManager.prewarm()
+    lConsole, _ = lManager._starting
+    with lManager.getctx('s1') as c:
+        assert c is lConsole
+        assert c('set a 1') == ('1',)
+    lManager.close()
+    assert not lConsole.isAlive()
+
+    # Killed while starting up
+    lManager = VivadoSessionManager(keep=True, echo=False, framed=True)
+    lManager.prewarm()
+    lConsole, lStartup = lManager._starting
+    lManager.close()
+    assert not lConsole.isAlive()
+    assert lStartup.exception(timeout=10) is not None or lStartup.result() is lConsole
+
+
+# -----------------------------------------------------------------------------
+def test_aioconsole(tclsh, capsys):
+    import asyncio
+    import time
+    from ipbb.tools.tcl_aioconsole import AsyncTCLConsole, TCLConsoleError
+    from ipbb.tools.xilinx.vivado_common import VivadoOutputFormatter
+
+    async def session(aConsole):
+        async with aConsole:
+            assert await aConsole.execute('set a 3') == ('3',)
+            assert await aConsole.execute('list') == (None,)
+            assert await aConsole.execute('puts "x\\ny"; set b ' + 'z' * 2000, None) == ('x', 'y', 'z' * 2000)
+            with pytest.raises(TCLConsoleError) as lExc:
+                await aConsole.execute('unknown_cmd')
+            assert lExc.value.errors == ['invalid command name "unknown_cmd"']
+
+            t0 = time.time()
+            await aConsole.execute('after 1000; puts "done {}"'.format(aConsole.sessionid))
+            return time.time() - t0
+
+    async def main():
+        lConsoles = [AsyncTCLConsole(tclsh, out=VivadoOutputFormatter(s)) for s in ('s1', 's2')]
+        t0 = time.time()
+        lTimes = await asyncio.gather(*(session(c) for c in lConsoles))
+        return lConsoles, lTimes, time.time() - t0
+
+    lConsoles, lTimes, lElapsed = asyncio.run(main())
+    assert not any(c.isAlive() for c in lConsoles)
+    # The sessions wait in parallel
+    assert min(lTimes) >= 1. and lElapsed < sum(lTimes)
+
+    lOut = capsys.readouterr().out
+    assert 's1 | done s1\r' in lOut and 's2 | done s2\r' in lOut
+    assert '@ipbb' not in lOut
+
+
+# -----------------------------------------------------------------------------
+def test_async_vivado_console(fake_vivado):
+    import asyncio
+    from ipbb.tools.xilinx import AsyncVivadoConsole, VivadoConsoleError
+
+    async def main():
+        async with AsyncVivadoConsole(sid='a', echo=False) as lConsole:
+            assert (lConsole.variant, lConsole.version) == ('Vivado', '2020.2')
+            assert await lConsole.execute('get_runs synth*') == ('synth_1',)
+            with pytest.raises(VivadoConsoleError):
+                await lConsole.execute('error boom')
+        return lConsole
+
+    assert not asyncio.run(main()).isAlive()